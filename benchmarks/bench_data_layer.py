@@ -0,0 +1,181 @@
+# benchmarks/bench_data_layer.py
+
+"""
+Benchmark warstwy danych: agregacja SML/Dual Use, dopasowanie materiałów, kontekst szablonu
+Dane syntetyczne (benchmarks/synthetic_data.py) w kilku skalach materials.json.
+
+Uruchomienie z katalogu głównego projektu:
+    python -m benchmarks.bench_data_layer                      # porównanie z zapisanym punktem odniesienia
+    python -m benchmarks.bench_data_layer --save-baseline      # zapis nowego punktu odniesienia
+    python -m benchmarks.bench_data_layer --sizes 10 100 --check   # kod wyjścia 1 przy regresji
+
+Punkt odniesienia (benchmarks/baselines/data_layer.json) zależy od maszyny - zapisuj go
+na tym samym komputerze, na którym porównujesz.
+"""
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.synthetic_data import generate_dataset, make_loader, material_names, structure_queries
+
+BASELINE_PATH = Path(__file__).parent / 'baselines' / 'data_layer.json'
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+DEFAULT_TOLERANCE = 0.25
+QUERY_COUNT = 50
+BATCH_COUNT = 20
+
+
+def measure(func: Callable[[], int], repeat: int) -> Dict[str, float]:
+    """
+    Czas jednej operacji w µs (mediana i minimum z 'repeat' prób).
+    func wykonuje serię operacji i zwraca ich liczbę.
+    """
+    per_op = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ops = func()
+        per_op.append((time.perf_counter() - start) * 1e6 / ops)
+    return {'median_us': statistics.median(per_op), 'min_us': min(per_op)}
+
+
+def build_cases(material_count: int) -> Dict[str, Callable[[], int]]:
+    """Przypadki testowe dla jednej skali danych"""
+    from src.models.declaration import Declaration, Product, ClientData, ProductBatch
+    from src.utils.material_macher import MaterialMatcher
+
+    dataset = generate_dataset(material_count)
+    loader = make_loader(dataset)
+    names = material_names(material_count)
+    pairs = [MaterialMatcher.parse_structure(q, names)[0] for q in structure_queries(names, QUERY_COUNT, layers=2)]
+    triples = [MaterialMatcher.parse_structure(q, names)[0] for q in structure_queries(names, QUERY_COUNT, layers=3)]
+    layer_queries = [part for q in structure_queries(names, QUERY_COUNT) for part in q.split(' / ')]
+    structures = structure_queries(names, QUERY_COUNT, layers=3)
+
+    declaration = Declaration(declaration_type='bok', client=ClientData(client_name="Klient"),
+                              product=Product(name="PET/PE", structure="PET/PE"))
+    structure_data = loader.build_structure_data_trilayer(*triples[0], language='pl')
+    declaration.substances_table = structure_data['substances']
+    declaration.dual_use_list = structure_data['dual_use']
+    declaration.batches = [
+        ProductBatch(product_code=str(i), product_name=f"Wyrób {i}", production_date=datetime.date(2026, 1, 1),
+                     batch_number=f"{i}/26/ZK", thickness1="12", thickness2="40")
+        for i in range(BATCH_COUNT)
+    ]
+
+    def run_bilayer():
+        for mat1, mat2 in pairs:
+            loader.build_structure_data(mat1, mat2, language='pl')
+        return len(pairs)
+
+    def run_trilayer():
+        for mats in triples:
+            loader.build_structure_data_trilayer(*mats, language='en')
+        return len(triples)
+
+    def run_normalize():
+        for name in names:
+            MaterialMatcher.normalize(name)
+        return len(names)
+
+    def run_find_best_match():
+        for query in layer_queries:
+            MaterialMatcher.find_best_match(query, names)
+        return len(layer_queries)
+
+    def run_parse_structure():
+        for structure in structures:
+            MaterialMatcher.parse_structure(structure, names)
+        return len(structures)
+
+    def run_to_template_dict():
+        for _ in range(20):
+            declaration.to_template_dict()
+        return 20
+
+    return {
+        'build_structure_data': run_bilayer,
+        'build_structure_data_trilayer': run_trilayer,
+        'MaterialMatcher.normalize': run_normalize,
+        'MaterialMatcher.find_best_match': run_find_best_match,
+        'MaterialMatcher.parse_structure': run_parse_structure,
+        'Declaration.to_template_dict': run_to_template_dict,
+    }
+
+
+def run(sizes: List[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    """Wyniki: {'<przypadek>@<liczba materiałów>': {'median_us', 'min_us'}}"""
+    results = {}
+    for size in sizes:
+        for case, func in build_cases(size).items():
+            results[f"{case}@{size}"] = measure(func, repeat)
+    return results
+
+
+def load_baseline(path: Path) -> Dict:
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('results', {})
+
+
+def save_baseline(path: Path, results: Dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }, f, indent=2)
+
+
+def report(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Drukuje tabelę wyników; zwraca listę przypadków z regresją"""
+    regressions = []
+    print(f"{'przypadek':<48} | {'mediana [µs]':>12} | {'odniesienie':>11} | {'zmiana':>8}")
+    print("-" * 90)
+    for key, values in results.items():
+        median = values['median_us']
+        base = baseline.get(key, {}).get('median_us')
+        if base:
+            change = median / base - 1
+            flag = " ⚠️" if change > tolerance else ""
+            if flag:
+                regressions.append(key)
+            print(f"{key:<48} | {median:>12.1f} | {base:>11.1f} | {change:>+7.0%}{flag}")
+        else:
+            print(f"{key:<48} | {median:>12.1f} | {'-':>11} | {'-':>8}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Liczby materiałów")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Dopuszczalny wzrost mediany (0.25 = +25%%)")
+    parser.add_argument('--check', action='store_true', help="Kod wyjścia 1 przy regresji")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    regressions = report(results, load_baseline(args.baseline), args.tolerance)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\n✅ Zapisano punkt odniesienia: {args.baseline}")
+    if regressions:
+        print(f"\n⚠️ Regresje (> +{args.tolerance:.0%}): {', '.join(regressions)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
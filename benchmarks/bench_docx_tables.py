@@ -0,0 +1,62 @@
+# benchmarks/bench_docx_tables.py
+
+"""
+Benchmark zapisu tabel DOCX: write_table_cellwise (API python-docx) vs write_table_xml (jeden przebieg XML)
+Uruchomienie z katalogu głównego projektu:
+    python -m benchmarks.bench_docx_tables [--rows 10 100 1000] [--repeat 3]
+"""
+import argparse
+import time
+
+from docx import Document
+
+from src.utils.docx_table_writer import write_table_cellwise, write_table_xml
+
+
+def make_rows(row_count: int):
+    """Tabela jak SML: nagłówek + wiersze z 4 kolumnami, co 10 wiersz scalony pionowo (rowspan=3)"""
+    rows = [[{'text': t, 'align': 'center', 'header': True}
+             for t in ["Nr ref.", "Nr CAS", "Nazwa substancji", "Limit SML"]]]
+    covered = 0
+    for i in range(row_count):
+        if covered:
+            rows.append([{'text': f"CAS {i}"}, {'text': f"Substancja {i}"}, {'text': str(i % 60)}])
+            covered -= 1
+        elif i % 10 == 0 and i + 2 < row_count:
+            rows.append([{'text': f"{10000 + i}", 'rowspan': 3}, {'text': f"CAS {i}"},
+                         {'text': f"Substancja {i}"}, {'text': str(i % 60)}])
+            covered = 2
+        else:
+            rows.append([{'text': f"{10000 + i}", 'align': 'center'}, {'text': f"CAS {i}"},
+                         {'text': f"Substancja {i}"}, {'text': str(i % 60), 'align': 'center'}])
+    return rows
+
+
+def time_writer(writer, rows, repeat: int) -> float:
+    """Najlepszy czas (s) z 'repeat' prób - za każdym razem na świeżym dokumencie"""
+    best = float('inf')
+    for _ in range(repeat):
+        doc = Document()
+        start = time.perf_counter()
+        writer(doc, rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'wiersze':>8} | {'cellwise [ms]':>14} | {'xml [ms]':>10} | {'przyspieszenie':>14}")
+    print("-" * 56)
+    for row_count in args.rows:
+        rows = make_rows(row_count)
+        slow = time_writer(write_table_cellwise, rows, args.repeat)
+        fast = time_writer(write_table_xml, rows, args.repeat)
+        print(f"{row_count:>8} | {slow * 1000:>14.1f} | {fast * 1000:>10.1f} | {slow / fast:>13.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_import_time.py
+
+"""
+Benchmark czasu importu modułów programu (python -X importtime)
+Pilnuje, żeby ciężkie biblioteki (WeasyPrint, python-docx, BeautifulSoup, SQLAlchemy, Jinja2)
+nie były importowane przy starcie - ładują się leniwie lub w tle (src/utils/preload.py).
+
+Uruchomienie z katalogu głównego projektu:
+    python -m benchmarks.bench_import_time [--top 10] [--check]
+
+Każdy moduł importowany jest w osobnym procesie; --check kończy z kodem 1,
+jeśli któryś z nich wciągnął zabronioną bibliotekę.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+HEAVY = ('weasyprint', 'docx', 'bs4', 'sqlalchemy', 'jinja2')
+
+# Moduł → biblioteki, których nie może importować przy ładowaniu
+TARGETS = {
+    'src.gui.main_window': HEAVY,
+    'src.services.pdf_generator': HEAVY,
+    'src.services.database_service': ('sqlalchemy',),
+    'src.services.data_loader': HEAVY,
+    'src.cli': HEAVY,
+}
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Wiersze 'import time: self | cumulative | pakiet' → [{'module', 'depth', 'self_us', 'cumulative_us'}]"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # nagłówek
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        entries.append({
+            'module': stripped,
+            'depth': (len(name) - len(stripped) - 1) // 2,
+            'self_us': int(parts[0]),
+            'cumulative_us': int(parts[1]),
+        })
+    return entries
+
+
+def measure_import(module: str) -> Optional[Dict]:
+    """Import modułu w świeżym procesie; None jeśli import się nie powiódł"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    entries = parse_importtime(proc.stderr)
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"kod {proc.returncode}"
+        print(f"⚠️ {module}: {error}")
+        return None
+
+    target = next((e for e in reversed(entries) if e['module'] == module), None)
+    loaded = {e['module'] for e in entries}
+    return {
+        'total_ms': target['cumulative_us'] / 1000 if target else None,
+        'entries': entries,
+        'heavy_loaded': sorted(h for h in HEAVY if h in loaded),
+    }
+
+
+def report(module: str, result: Dict, forbidden: tuple, top: int) -> List[str]:
+    """Drukuje podsumowanie modułu; zwraca listę zabronionych bibliotek, które zostały zaimportowane"""
+    violations = [h for h in result['heavy_loaded'] if h in forbidden]
+    status = "⚠️ " + ", ".join(violations) if violations else "✅"
+    print(f"\n{module}: {result['total_ms']:.1f} ms  {status}")
+
+    heaviest = sorted((e for e in result['entries'] if e['module'] != module),
+                      key=lambda e: e['cumulative_us'], reverse=True)[:top]
+    for e in heaviest:
+        indent = "  " * min(e['depth'], 4)
+        print(f"    {e['cumulative_us'] / 1000:>8.1f} ms  {indent}{e['module']}")
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=list(TARGETS), help="Moduły do zmierzenia")
+    parser.add_argument('--top', type=int, default=10, help="Liczba najcięższych importów w raporcie")
+    parser.add_argument('--json', type=Path, help="Zapis wyników (bez szczegółów) do pliku JSON")
+    parser.add_argument('--check', action='store_true', help="Kod wyjścia 1, jeśli zaimportowano ciężką bibliotekę")
+    args = parser.parse_args()
+
+    summary, failed = {}, False
+    for module in args.modules:
+        result = measure_import(module)
+        if result is None:
+            continue
+        violations = report(module, result, TARGETS.get(module, HEAVY), args.top)
+        failed = failed or bool(violations)
+        summary[module] = {'total_ms': result['total_ms'], 'heavy_loaded': result['heavy_loaded']}
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    if failed and args.check:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+# benchmarks/bench_render.py
+
+"""
+Benchmark end-to-end renderowania deklaracji: budowa deklaracji, HTML (Jinja), PDF (WeasyPrint), DOCX
+Środowisko zastępcze:
+- folder tymczasowy zamiast udziału SMB (szablony, teksty, syntetyczny materials.json),
+- baza SQLite ze schematem ZO / View_Kontrahent zamiast MSSQL (deklaracje BOK ze zleceń).
+
+Przypadki: struktury 2- i 3-warstwowe, BOK z 1, 20 i 200 partiami, język pl i en.
+Raport: p50/p95 [ms], przepustowość [op/s] i szczytowe RSS [MB] dla każdego etapu.
+
+Uruchomienie z katalogu głównego projektu:
+    python -m benchmarks.bench_render [--iterations 5] [--materials 300] [--json wyniki.json]
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.synthetic_data import generate_dataset, synthetic_texts, write_dataset
+
+REPO_TEMPLATES = Path(__file__).resolve().parents[1] / 'archiwum'
+STAGES = ('build', 'html', 'pdf', 'docx')
+STRUCTURE_2L = "PET/PE"
+STRUCTURE_3L = "PET/ALU/PE"
+BOK_BATCH_COUNTS = (1, 20, 200)
+
+
+# === PAMIĘĆ ===
+
+def current_rss() -> Optional[int]:
+    """Bieżące RSS procesu w bajtach (psutil lub /proc; None jeśli niedostępne)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class PeakRss:
+    """Próbkuje RSS w tle podczas bloku with - szczyt w atrybucie 'peak'"""
+
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        self.peak: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+
+# === ŚRODOWISKO ZASTĘPCZE ===
+
+def prepare_share(share_dir: Path, material_count: int, templates_source: Optional[Path] = None):
+    """
+    Wypełnia folder zastępujący udział sieciowy i przestawia na niego stałe konfiguracji.
+    Musi być wywołane przed importem src.services.* (moduły kopiują ścieżki przy imporcie).
+    """
+    from src.config import constants
+
+    if any(name.startswith('src.services.') for name in sys.modules):
+        raise RuntimeError("prepare_share() musi być wywołane przed importem src.services")
+
+    templates_dir = share_dir / 'templates'
+    data_dir = share_dir / 'data'
+
+    # Szablony: podany folder, prawdziwy folder szablonów (jeśli dostępny) lub kopie z repozytorium
+    if templates_source is None:
+        real_templates = Path(constants.TEMPLATES_PATH)
+        templates_source = real_templates if real_templates.exists() else REPO_TEMPLATES
+    shutil.copytree(templates_source, templates_dir, dirs_exist_ok=True)
+
+    template_names = {}
+    for name in ('TEMPLATE_PL_TECH', 'TEMPLATE_EN_TECH', 'TEMPLATE_PL_BOK', 'TEMPLATE_EN_BOK'):
+        template_names[name] = Path(getattr(constants, name)).name
+    for en_name, pl_name in (('TEMPLATE_EN_TECH', 'TEMPLATE_PL_TECH'), ('TEMPLATE_EN_BOK', 'TEMPLATE_PL_BOK')):
+        en_path = templates_dir / template_names[en_name]
+        if not en_path.exists():
+            print(f"⚠️ Brak szablonu {en_path.name} - używam kopii {template_names[pl_name]}")
+            shutil.copy(templates_dir / template_names[pl_name], en_path)
+
+    # Dane: syntetyczny materials.json + teksty (prawdziwe, jeśli dostępne)
+    dataset_files = write_dataset(generate_dataset(material_count), data_dir)
+    texts_files = {}
+    for name, language in (('TEXTS_PL', 'pl'), ('TEXTS_EN', 'en')):
+        source = Path(getattr(constants, name))
+        target = data_dir / source.name
+        if source.exists():
+            shutil.copy(source, target)
+        else:
+            target.write_text(json.dumps(synthetic_texts(language), ensure_ascii=False), encoding='utf-8')
+        texts_files[name] = target
+
+    constants.USE_NETWORK = False
+    constants.SERVER_BASE = share_dir
+    constants.TEMPLATES_PATH = templates_dir
+    constants.DATA_PATH = data_dir
+    constants.OUTPUT_PATH = share_dir / 'output'
+    constants.MATERIALS_DB = dataset_files['materials']
+    constants.SUBSTANCES_MASTER = dataset_files['substances_master']
+    constants.DUAL_USE_MASTER = dataset_files['dual_use_master']
+    constants.TEXTS_PL = texts_files['TEXTS_PL']
+    constants.TEXTS_EN = texts_files['TEXTS_EN']
+    for name, file_name in template_names.items():
+        setattr(constants, name, templates_dir / file_name)
+
+
+# === PRZYPADKI ===
+
+def build_cases(data_loader, db_service) -> Dict[str, Callable]:
+    """{nazwa przypadku: funkcja budująca deklarację}"""
+    from src.services import declaration_factory as factory
+
+    cases = {}
+    for structure, layers in ((STRUCTURE_2L, '2L'), (STRUCTURE_3L, '3L')):
+        for language in ('pl', 'en'):
+            cases[f"tech-{layers}-{language}"] = (
+                lambda s=structure, l=language: factory.build_tech_declaration(
+                    data_loader, factory.match_structure(data_loader, s), l)
+            )
+
+    def bok(order_numbers, language):
+        declaration, _ = factory.build_bok_from_orders(data_loader, db_service, order_numbers, language=language)
+        return declaration
+
+    # Zlecenia 100000, 100002, ... mają strukturę 2L, nieparzyste - 3L (generate_orders)
+    for batch_count in BOK_BATCH_COUNTS:
+        orders_2l = [str(100000 + 2 * i) for i in range(batch_count)]
+        for language in ('pl', 'en'):
+            cases[f"bok-2L-{batch_count}-{language}"] = lambda o=orders_2l, l=language: bok(o, l)
+    cases["bok-3L-20-pl"] = lambda: bok([str(100001 + 2 * i) for i in range(20)], 'pl')
+    return cases
+
+
+# === POMIAR ===
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentyl metodą najbliższej rangi"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def measure_stage(func: Callable, iterations: int) -> Dict:
+    func()  # rozgrzewka (cache JSON, szablony, importy)
+    latencies = []
+    with PeakRss() as rss:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            latencies.append(time.perf_counter() - start)
+    return {
+        'n': iterations,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'ops_per_s': iterations / sum(latencies),
+        'peak_rss_mb': rss.peak / 2 ** 20 if rss.peak else None,
+    }
+
+
+def run(iterations: int, output_dir: Path, data_loader, db_service) -> Dict[str, Dict[str, Dict]]:
+    from src.services.pdf_generator import PDFGenerator
+
+    generator = PDFGenerator(data_loader)
+    try:
+        import weasyprint  # noqa: F401
+        pdf_available = True
+    except ImportError:
+        print("⚠️ Brak WeasyPrint - etap 'pdf' pominięty")
+        pdf_available = False
+
+    results = {}
+    for case, build in build_cases(data_loader, db_service).items():
+        declaration = build()
+        docx_path = output_dir / f"{case}.docx"
+        stages = {
+            'build': build,
+            'html': lambda d=declaration: generator.generate_html_content(d),
+            'pdf': (lambda d=declaration: generator.generate_pdf_bytes(d)) if pdf_available else None,
+            'docx': lambda d=declaration, p=docx_path: generator.generate_docx(d, str(p)),
+        }
+        results[case] = {stage: measure_stage(func, iterations)
+                         for stage, func in stages.items() if func is not None}
+        print(f"  ✓ {case}")
+    return results
+
+
+def report(results: Dict[str, Dict[str, Dict]]):
+    def fmt_rss(value):
+        return f"{value:>9.1f}" if value is not None else f"{'n/d':>9}"
+
+    print(f"\n{'przypadek':<16} {'etap':<6} | {'p50 [ms]':>9} | {'p95 [ms]':>9} | {'op/s':>8} | {'RSS [MB]':>9}")
+    print("-" * 70)
+    for case, stages in results.items():
+        for stage, r in stages.items():
+            print(f"{case:<16} {stage:<6} | {r['p50_ms']:>9.1f} | {r['p95_ms']:>9.1f} | "
+                  f"{r['ops_per_s']:>8.1f} | {fmt_rss(r['peak_rss_mb'])}")
+
+    print(f"\n{'etap':<6} | {'śr. p50 [ms]':>12} | {'max p95 [ms]':>12} | {'max RSS [MB]':>12}")
+    print("-" * 54)
+    for stage in STAGES:
+        rows = [stages[stage] for stages in results.values() if stage in stages]
+        if not rows:
+            continue
+        peaks = [r['peak_rss_mb'] for r in rows if r['peak_rss_mb'] is not None]
+        print(f"{stage:<6} | {sum(r['p50_ms'] for r in rows) / len(rows):>12.1f} | "
+              f"{max(r['p95_ms'] for r in rows):>12.1f} | "
+              f"{(max(peaks) if peaks else float('nan')):>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--materials', type=int, default=300, help="Liczba materiałów w syntetycznym materials.json")
+    parser.add_argument('--templates', type=Path, help="Folder z szablonami (domyślnie TEMPLATES_PATH lub archiwum/)")
+    parser.add_argument('--json', type=Path, help="Zapis wyników do pliku JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='declgen_bench_') as tmp:
+        share_dir = Path(tmp) / 'share'
+        prepare_share(share_dir, args.materials, args.templates)
+
+        from benchmarks.sqlite_fixture import create_fixture_engine, generate_orders
+        from src.services.data_loader import DataLoader
+        from src.services.database_service import DatabaseService
+
+        fixture = generate_orders([STRUCTURE_2L, STRUCTURE_3L], order_count=2 * max(BOK_BATCH_COUNTS))
+        engine = create_fixture_engine(Path(tmp) / 'production.sqlite', fixture['orders'], fixture['clients'])
+
+        output_dir = Path(tmp) / 'out'
+        output_dir.mkdir()
+        print(f"Renderowanie ({args.iterations} iteracji na etap):")
+        results = run(args.iterations, output_dir, DataLoader(), DatabaseService(engine=engine))
+        engine.dispose()
+
+    report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
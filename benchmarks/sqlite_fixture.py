@@ -0,0 +1,89 @@
+# benchmarks/sqlite_fixture.py
+
+"""
+SqliteFixture - Baza SQLite ze schematem ZO / View_Kontrahent (nazwy z config/databasaConst.py)
+Zastępuje bazę produkcji MSSQL w benchmarkach: DatabaseService(engine=create_fixture_engine(...))
+"""
+import datetime
+import random
+import sqlite3
+from pathlib import Path
+from typing import Dict, List
+
+from src.config.databasaConst import TABLE_NAMES, ZO_COLUMNS, CLIENT_COLUMNS
+
+# Typy kolumn - data produkcji jako DATE, żeby sqlite3 zwracał datetime.date jak sterownik MSSQL
+ZO_TYPES = {'production_date': 'DATE', 'client_number': 'INTEGER'}
+CLIENT_TYPES = {'client_number': 'INTEGER'}
+
+
+def _create_table(conn, table: str, columns: Dict[str, str], types: Dict[str, str], primary_key: str):
+    definitions = []
+    for key, column in columns.items():
+        definition = f"{column} {types.get(key, 'TEXT')}"
+        if key == primary_key:
+            definition += " PRIMARY KEY"
+        definitions.append(definition)
+    conn.exec_driver_sql(f"CREATE TABLE {table} ({', '.join(definitions)})")
+
+
+def _insert(conn, table: str, columns: Dict[str, str], rows: List[Dict]):
+    keys = [key for key in columns if any(key in row for row in rows)]
+    names = ", ".join(columns[key] for key in keys)
+    placeholders = ", ".join("?" for _ in keys)
+    conn.exec_driver_sql(f"INSERT INTO {table} ({names}) VALUES ({placeholders})",
+                         [tuple(row.get(key) for key in keys) for row in rows])
+
+
+def generate_orders(structures: List[str], order_count: int, client_count: int = 50,
+                    seed: int = 42) -> Dict[str, List[Dict]]:
+    """
+    Zlecenia i kontrahenci (klucze logiczne jak w ZO_COLUMNS / CLIENT_COLUMNS).
+    Numery zleceń: '100000', '100001', ... - zlecenie i ma strukturę structures[i % len(structures)].
+    """
+    rng = random.Random(seed)
+    clients = [
+        {
+            'client_number': cid,
+            'client_name': f"Kontrahent {cid} Sp. z o.o.",
+            'ulica': f"ul. Przemysłowa {cid}",
+            'kod_pocztowy': f"{rng.randint(10, 99)}-{rng.randint(100, 999)}",
+            'miasto': rng.choice(["Białystok", "Tychy", "Warszawa", "Poznań"]),
+            'clients': f"KONTRAHENT{cid}",
+        }
+        for cid in range(1, client_count + 1)
+    ]
+    start = datetime.date(2026, 1, 1)
+    orders = [
+        {
+            'order_number': str(100000 + i),
+            'article_index': f"IDX{i:05d}",
+            'client_article_index': f"ART{i:05d}",
+            'article_description': f"Laminat {structures[i % len(structures)]} - wyrób {i}",
+            'product_structure': structures[i % len(structures)],
+            'production_date': start + datetime.timedelta(days=i % 365),
+            'client_number': 1 + i % client_count,
+            'thickness1': str(rng.choice([12, 20, 30])),
+            'thickness2': str(rng.choice([40, 50, 60])),
+            'thickness3': str(rng.choice([0, 0, 9])),
+        }
+        for i in range(order_count)
+    ]
+    return {'orders': orders, 'clients': clients}
+
+
+def create_fixture_engine(db_path: Path, orders: List[Dict], clients: List[Dict]):
+    """Tworzy plik SQLite z danymi i zwraca engine SQLAlchemy"""
+    from sqlalchemy import create_engine
+
+    db_path = Path(db_path)
+    if db_path.exists():
+        db_path.unlink()
+
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={'detect_types': sqlite3.PARSE_DECLTYPES})
+    with engine.begin() as conn:
+        _create_table(conn, TABLE_NAMES['orders'], ZO_COLUMNS, ZO_TYPES, primary_key='order_number')
+        _create_table(conn, TABLE_NAMES['clients'], CLIENT_COLUMNS, CLIENT_TYPES, primary_key='client_number')
+        _insert(conn, TABLE_NAMES['orders'], ZO_COLUMNS, orders)
+        _insert(conn, TABLE_NAMES['clients'], CLIENT_COLUMNS, clients)
+    return engine
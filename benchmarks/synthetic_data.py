@@ -0,0 +1,140 @@
+# benchmarks/synthetic_data.py
+
+"""
+SyntheticData - Generatory danych testowych w formacie plików z serwera
+materials.json / substances_master.json / dual_use_master.json w dowolnej skali,
+deterministyczne (stałe ziarno) - wyniki benchmarków są porównywalne między uruchomieniami
+"""
+import json
+import random
+from pathlib import Path
+from typing import Dict, List
+
+# Człony nazw materiałów - kombinacje dają nazwy jak 'PE-EVOH 12', 'BOPP MET 40'
+BASE_NAMES = ["PET", "PE", "BOPP", "CPP", "OPA", "ALU", "PE-EVOH", "PETMET", "BOPP MET", "PA-PE", "PP", "PVC"]
+
+
+def material_names(count: int) -> List[str]:
+    """'count' unikalnych nazw materiałów"""
+    names = []
+    i = 0
+    while len(names) < count:
+        base = BASE_NAMES[i % len(BASE_NAMES)]
+        names.append(base if i < len(BASE_NAMES) else f"{base} {i // len(BASE_NAMES) * 5}")
+        i += 1
+    return names
+
+
+def generate_dataset(material_count: int, suppliers_per_material: int = 3, substance_count: int = 10000,
+                     dual_use_count: int = 500, sml_per_supplier: int = 40, dual_use_per_supplier: int = 5,
+                     seed: int = 42) -> Dict[str, Dict]:
+    """
+    Zestaw danych w formacie plików JSON z serwera.
+
+    Returns:
+        {'materials': <materials.json>, 'substances_master': {...}, 'dual_use_master': {...}}
+    """
+    rng = random.Random(seed)
+
+    substances_master = {
+        str(sid): {
+            'cas': f"{rng.randint(50, 99999)}-{rng.randint(10, 99)}-{rng.randint(0, 9)}",
+            'name_en': f"Substance {sid}",
+            'name_pl': f"Substancja {sid}" if sid % 7 else "",
+            'ref_no': f"{10000 + sid * 3}",
+        }
+        for sid in range(1, substance_count + 1)
+    }
+    dual_use_master = {
+        str(did): {
+            'cas': f"{rng.randint(50, 99999)}-{rng.randint(10, 99)}-{rng.randint(0, 9)}",
+            'name_en': f"Additive {did}",
+            'name_pl': f"Dodatek {did}",
+            'e_symbol': f"E{100 + did}",
+        }
+        for did in range(1, dual_use_count + 1)
+    }
+
+    materials = {}
+    for name in material_names(material_count):
+        materials[name] = [
+            {
+                'supplier': f"Dostawca {s + 1}",
+                'sml': [{'substanceId': sid, 'value': round(rng.uniform(0.01, 60), 2)}
+                        for sid in rng.sample(range(1, substance_count + 1), min(sml_per_supplier, substance_count))],
+                'dualUse': rng.sample(range(1, dual_use_count + 1), min(dual_use_per_supplier, dual_use_count)),
+            }
+            for s in range(suppliers_per_material)
+        ]
+
+    return {
+        'materials': {'materials': materials},
+        'substances_master': substances_master,
+        'dual_use_master': dual_use_master,
+    }
+
+
+def write_dataset(dataset: Dict[str, Dict], data_dir: Path) -> Dict[str, Path]:
+    """Zapisuje zestaw jako pliki JSON (np. do folderu tymczasowego udającego udział SMB)"""
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    files = {
+        'materials': data_dir / 'materials.json',
+        'substances_master': data_dir / 'substances_master.json',
+        'dual_use_master': data_dir / 'dual_use_master.json',
+    }
+    for key, path in files.items():
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dataset[key], f, ensure_ascii=False)
+    return files
+
+
+def make_loader(dataset: Dict[str, Dict]):
+    """
+    DataLoader z cache wypełnionym zestawem syntetycznym - bez dostępu do plików i sieci.
+    Osobna instancja poza singletonem, żeby kilka zestawów mogło istnieć obok siebie.
+    """
+    from src.config.constants import MATERIALS_DB, SUBSTANCES_MASTER, DUAL_USE_MASTER
+    from src.services.data_loader import DataLoader
+
+    return DataLoader.from_documents({
+        MATERIALS_DB: dataset['materials'],
+        SUBSTANCES_MASTER: dataset['substances_master'],
+        DUAL_USE_MASTER: dataset['dual_use_master'],
+    })
+
+
+def structure_queries(names: List[str], count: int, layers: int = 2, seed: int = 7) -> List[str]:
+    """Struktury w zapisie jak w bazie zleceń: różna wielkość liter, spacje, myślniki"""
+    rng = random.Random(seed)
+    variants = [
+        lambda n: n,
+        lambda n: n.lower(),
+        lambda n: n.replace(' ', '-'),
+        lambda n: n.replace('-', ' ').lower(),
+    ]
+    queries = []
+    for _ in range(count):
+        parts = [rng.choice(variants)(rng.choice(names)) for _ in range(layers)]
+        queries.append(" / ".join(parts))
+    return queries
+
+
+# Klucze tekstów używane przez szablony HTML i DocxBuilder
+REGULATION_KEYS = ['eu_1935_2004', 'eu_10_2011', 'eu_2023_2006', 'eu_1895_2005', 'eu_2022_1616',
+                   'directive_94_62', 'pl_food_safety', 'pl_packaging', 'pl_product_safety', 'pl_waste']
+STATEMENT_KEYS = ['materials_compliance', 'allowed_substances', 'migration_limits', 'migration_test',
+                  'nias_available', 'printing_inks', 'no_bisphenol', 'reach_compliance', 'heavy_metals',
+                  'food_contact_conditions']
+
+
+def synthetic_texts(language: str = 'pl') -> Dict:
+    """Teksty deklaracji o długości zbliżonej do prawdziwych (texts_pl.json / texts_en.json)"""
+    filler = ("Materiał spełnia wymagania dotyczące składu i migracji globalnej oraz specyficznej "
+              if language == 'pl' else
+              "The material meets the requirements concerning composition and overall and specific migration ")
+    return {
+        'regulations': {key: f"{key.upper()} - {filler.strip()}" for key in REGULATION_KEYS},
+        'statements': {key: f"{key}: " + filler * 3 for key in STATEMENT_KEYS},
+        'final_note': filler * 2,
+    }
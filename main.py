@@ -1,19 +1,43 @@
 """
 Entry point aplikacji Declaration Generator
-Uruchamia główne okno GUI
+Uruchamia główne okno GUI lub - z podkomendą (np. 'generate') - tryb wiersza poleceń bez PyQt5
 """
 import sys
-from PyQt5.QtWidgets import QApplication
-from src.gui.main_window import MainWindow
-from src.config.constants import APP_NAME, APP_VERSION
+
 
 def main():
-    app = QApplication(sys.argv)
+    # --profile: profilowanie całej sesji (GUI lub CLI), zrzut do output/profiles/
+    args = sys.argv[1:]
+    profile = '--profile' in args
+    if profile:
+        args.remove('--profile')
+
+    from src.cli import COMMANDS
+    if args and args[0] in COMMANDS:
+        from src.cli import main as cli_main
+        sys.exit(cli_main((['--profile'] if profile else []) + args))
+
+    from PyQt5.QtWidgets import QApplication
+    from src.gui.main_window import MainWindow
+    from src.config.constants import APP_NAME, APP_VERSION
+    from src.utils.profiler import SessionProfiler
+
+    app = QApplication([sys.argv[0]] + args)
     app.setApplicationName(f"{APP_NAME} v{APP_VERSION}")
 
-    window = MainWindow()
+    profiler = SessionProfiler()
+    if profile:
+        profiler.start()
+
+    window = MainWindow(profiler=profiler)
     window.show()
 
+    # Ciężkie biblioteki (WeasyPrint, python-docx, SQLAlchemy...) ładowane w tle po pokazaniu okna
+    from PyQt5.QtCore import QTimer
+    from src.utils.preload import preload_in_background
+    QTimer.singleShot(0, preload_in_background)
+
+    app.aboutToQuit.connect(profiler.stop)
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
@@ -0,0 +1,506 @@
+# cli.py
+
+"""
+Tryb wiersza poleceń (bez GUI) - generowanie deklaracji PDF/DOCX/HTML
+Nie importuje PyQt5 - nadaje się do skryptów uruchamianych na serwerze bez ekranu.
+
+Przykłady:
+    python -m src.cli generate --structure PET/PE --lang pl en --format pdf docx -o out/
+    python -m src.cli generate --csv deklaracje.csv --jobs 4 -o out/
+    python -m src.cli generate --type bok --orders 12345 12346 --invoice FV/1/2026 -o out/
+    python -m src.cli serve --port 8765 --workers 4
+    python -m src.cli import-sml lista.csv --material PET --supplier "Dostawca X" --dry-run
+    python -m src.cli db-migrate --db dane.sqlite                    (pliki JSON → SQLite)
+    python -m src.cli db-export --db dane.sqlite -o eksport/          (SQLite → pliki JSON)
+    python -m src.cli shard-materials                                 (materials.json → config/materials/)
+    python -m src.cli regenerate --substances 123 456 --dry-run        (co trzeba wydać ponownie)
+    python -m src.cli regenerate --materials PET --jobs 4 -o out/regen/  (+ manifest.json)
+    python -m src.cli --profile generate --csv deklaracje.csv -o out/   (zrzut do output/profiles/)
+
+Plik CSV (separator ';' lub ','), kolumny:
+    structure;language;type;product_name;invoice;orders
+    - type: tech (domyślnie) lub bok
+    - orders: numery zleceń rozdzielone spacją (wymagane dla bok)
+"""
+import argparse
+import csv
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List
+
+FORMATS = ('pdf', 'docx', 'html')
+
+# Silnik DOCX: 'native' - DocxBuilder wprost z modelu; 'html-lxml' / 'html-soup' - konwersja
+# wyrenderowanego szablonu HTML (PDFGenerator.generate_docx_from_html) wybranym parserem
+DOCX_ENGINES = ('native', 'html-lxml', 'html-soup')
+
+# Podkomendy - main.py przekazuje je tutaj zamiast uruchamiać GUI
+COMMANDS = ('generate', 'serve', 'regenerate', 'import-sml', 'db-migrate', 'db-export', 'shard-materials')
+
+# Generator w procesie roboczym (inicjalizowany raz na proces - cache szablonów i danych)
+_worker_generator = None
+
+
+def html_backend_for(docx_engine: str) -> str:
+    """Backend PDFGenerator dla silnika DOCX ('native' - domyślny, nieużywany przy DOCX)"""
+    if docx_engine not in DOCX_ENGINES:
+        raise ValueError(f"Nieznany silnik DOCX: {docx_engine}")
+    return docx_engine.split('-', 1)[1] if docx_engine.startswith('html-') else 'lxml'
+
+
+def _create_generator(docx_engine: str = 'native'):
+    from src.services.data_loader import DataLoader
+    from src.services.pdf_generator import PDFGenerator
+    return PDFGenerator(DataLoader(), html_backend=html_backend_for(docx_engine))
+
+
+def _init_worker(docx_engine: str):
+    global _worker_generator
+    _worker_generator = _create_generator(docx_engine)
+
+
+def safe_file_stem(declaration) -> str:
+    """Nazwa pliku jak w widokach: Deklaracja_<nazwa produktu / klient>_<język>"""
+    name = declaration.product.name
+    if declaration.declaration_type == 'bok' and declaration.client and declaration.client.client_name:
+        name = f"{declaration.client.client_name} {name}"
+    safe = "".join(c for c in name if c.isalnum() or c in (' ', '-')).rstrip()
+    return f"Deklaracja_{safe.replace(' ', '_')}_{declaration.language}"
+
+
+def unique_stems(declarations: List) -> List[str]:
+    """Unikalne nazwy plików (kolejne powtórzenia z sufiksem _2, _3, ... - pomijając nazwy już zajęte)"""
+    stems, emitted, counters = [], set(), {}
+    for declaration in declarations:
+        stem = candidate = safe_file_stem(declaration)
+        while candidate in emitted:
+            counters[stem] = counters.get(stem, 1) + 1
+            candidate = f"{stem}_{counters[stem]}"
+        emitted.add(candidate)
+        stems.append(candidate)
+    return stems
+
+
+def render_declaration(generator, declaration, formats: List[str], output_dir: Path, stem: str,
+                       docx_engine: str = 'native') -> List[str]:
+    """Renderuje jedną deklarację do wybranych formatów (jedna sesja renderowania)"""
+    from src.services import declaration_history
+
+    session = generator.create_session(declaration)
+    written = []
+    for fmt in formats:
+        target = output_dir / f"{stem}.{fmt}"
+        if fmt == 'pdf':
+            session.write_pdf(str(target))
+        elif fmt == 'docx' and docx_engine == 'native':
+            session.write_docx(str(target))
+        elif fmt == 'docx':
+            generator.generate_docx_from_html(declaration, str(target), html_content=session.html)
+            declaration_history.record(declaration, str(target), 'docx')
+        else:
+            target.write_text(session.html, encoding='utf-8')
+        written.append(str(target))
+    return written
+
+
+def _render_job(declaration, formats: List[str], output_dir: str, stem: str, docx_engine: str) -> List[str]:
+    """Zadanie dla procesu roboczego"""
+    return render_declaration(_worker_generator, declaration, formats, Path(output_dir), stem, docx_engine)
+
+
+def render_all(declarations: List, formats: List[str], output_dir: Path, jobs: int = 1,
+               docx_engine: str = 'native') -> Dict[str, List[str]]:
+    """
+    Renderuje listę deklaracji, opcjonalnie równolegle w procesach (WeasyPrint nie jest bezpieczny wątkowo).
+
+    Returns:
+        {stem: [zapisane pliki]} - dla błędów lista zawiera jeden wpis 'BŁĄD: ...'
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stems = unique_stems(declarations)
+
+    results = {}
+    if jobs <= 1:
+        generator = _create_generator(docx_engine)
+        for declaration, stem in zip(declarations, stems):
+            try:
+                results[stem] = render_declaration(generator, declaration, formats, output_dir, stem, docx_engine)
+            except Exception as e:
+                results[stem] = [f"BŁĄD: {e}"]
+        return results
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(docx_engine,)) as pool:
+        futures = {
+            pool.submit(_render_job, declaration, formats, str(output_dir), stem, docx_engine): stem
+            for declaration, stem in zip(declarations, stems)
+        }
+        for future in as_completed(futures):
+            stem = futures[future]
+            try:
+                results[stem] = future.result()
+            except Exception as e:
+                results[stem] = [f"BŁĄD: {e}"]
+    return results
+
+
+def _read_csv_rows(csv_path: Path) -> List[Dict]:
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=';,').delimiter
+        except csv.Error:
+            delimiter = ';'
+        return [{(k or '').strip().lower(): (v or '').strip() for k, v in row.items()}
+                for row in csv.DictReader(f, delimiter=delimiter)]
+
+
+def _split_orders(value: str) -> List[str]:
+    return [o for o in value.replace(',', ' ').split() if o]
+
+
+def build_declarations(args, data_loader) -> List:
+    """Buduje listę deklaracji z argumentów lub pliku CSV"""
+    from src.services.declaration_factory import (
+        match_structure, build_tech_declaration, build_bok_from_orders
+    )
+
+    db_service = None
+
+    def bok_from_orders(orders, language, invoice, structure):
+        nonlocal db_service
+        if db_service is None:
+            from src.services.database_service import DatabaseService
+            db_service = DatabaseService()
+        declaration, warnings = build_bok_from_orders(
+            data_loader, db_service, orders, language=language,
+            invoice_number=invoice, structure=structure or None
+        )
+        for warning in warnings:
+            print(f"⚠️ {warning}", file=sys.stderr)
+        return declaration
+
+    specs = []
+    if args.csv:
+        for row in _read_csv_rows(Path(args.csv)):
+            languages = row.get('language') or args.lang[0]
+            for language in languages.replace(',', ' ').split():
+                specs.append({
+                    'type': row.get('type') or args.type,
+                    'structure': row.get('structure', ''),
+                    'language': language,
+                    'product_name': row.get('product_name', ''),
+                    'invoice': row.get('invoice', ''),
+                    'orders': _split_orders(row.get('orders', '')),
+                })
+    else:
+        for language in args.lang:
+            specs.append({
+                'type': args.type,
+                'structure': args.structure or '',
+                'language': language,
+                'product_name': args.product_name or '',
+                'invoice': args.invoice or '',
+                'orders': args.orders or [],
+            })
+
+    declarations = []
+    for spec in specs:
+        if spec['type'] == 'bok':
+            if not spec['orders']:
+                raise ValueError("Deklaracja BOK wymaga numerów zleceń (--orders / kolumna 'orders')")
+            declarations.append(bok_from_orders(spec['orders'], spec['language'], spec['invoice'],
+                                                spec['structure']))
+        else:
+            if not spec['structure']:
+                raise ValueError("Deklaracja technologiczna wymaga struktury (--structure / kolumna 'structure')")
+            materials = match_structure(data_loader, spec['structure'])
+            declarations.append(build_tech_declaration(data_loader, materials, spec['language'],
+                                                       product_name=spec['product_name'] or None))
+    return declarations
+
+
+def cmd_generate(args) -> int:
+    from src.services.data_loader import DataLoader
+
+    if not args.csv and not args.structure and not args.orders:
+        print("Podaj --structure, --orders lub --csv", file=sys.stderr)
+        return 2
+
+    try:
+        declarations = build_declarations(args, DataLoader())
+    except (ValueError, FileNotFoundError, ConnectionError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    results = render_all(declarations, args.format, Path(args.output), jobs=args.jobs,
+                         docx_engine=args.docx_engine)
+
+    failed = 0
+    for stem, files in sorted(results.items()):
+        for entry in files:
+            if entry.startswith("BŁĄD"):
+                failed += 1
+                print(f"❌ {stem}: {entry}", file=sys.stderr)
+            else:
+                print(f"✅ {entry}")
+    return 1 if failed else 0
+
+
+def cmd_regenerate(args) -> int:
+    from datetime import datetime
+    from src.services.data_loader import DataLoader
+    from src.services import regeneration
+
+    if not (args.substances or args.dual_use or args.materials):
+        print("Podaj --substances, --dual-use lub --materials", file=sys.stderr)
+        return 2
+
+    data_loader = DataLoader()
+    history = Path(args.history) if args.history else None
+    try:
+        plan = regeneration.plan_regeneration(data_loader, args.substances or [], args.dual_use or [],
+                                              args.materials or [], since=args.since, history_path=history)
+    except (FileNotFoundError, ConnectionError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    print(f"Dotknięte folie ({len(plan['materials'])}): {', '.join(plan['materials']) or '-'}")
+    print(f"Kombinacje struktura/język ({len(plan['combinations'])}): "
+          f"{', '.join(f'{s} [{l}]' for s, l in plan['combinations']) or '-'}")
+    print(f"Deklaracje do ponownego wydania: {len(plan['declarations'])}")
+    for entry in plan['declarations']:
+        print(f"  - {entry.get('ts', '')} {entry.get('type')} {entry.get('language')} "
+              f"{entry.get('client') or entry.get('product')} ({entry.get('structure')})")
+    if args.dry_run or not plan['declarations']:
+        return 0
+
+    # Budowanie z aktualnych danych; błąd jednego wpisu (np. usunięta folia, uszkodzony wpis
+    # dziennika, brak pliku) trafia do manifestu i nie przerywa pozostałych
+    items, declarations = [], []
+    for entry in plan['declarations']:
+        try:
+            declarations.append(regeneration.rebuild_declaration(data_loader, entry))
+            items.append({'source': entry})
+        except ValueError as e:
+            items.append({'source': entry, 'error': str(e)})
+        except Exception as e:
+            items.append({'source': entry, 'error': f"{type(e).__name__}: {e}"})
+
+    output_dir = Path(args.output or f"output/regenerated_{datetime.now():%Y%m%d_%H%M%S}")
+    results = render_all(declarations, args.format, output_dir, jobs=args.jobs, docx_engine=args.docx_engine)
+
+    rendered = iter(unique_stems(declarations))
+    for item in items:
+        if item.get('error'):
+            continue
+        files = results.get(next(rendered), [])
+        errors = [f for f in files if f.startswith("BŁĄD")]
+        item['files'] = [f for f in files if not f.startswith("BŁĄD")]
+        item['error'] = errors[0] if errors else None
+
+    trigger = {'substances': args.substances or [], 'dual_use': args.dual_use or [],
+               'materials': args.materials or [], 'since': args.since}
+    manifest = regeneration.write_manifest(output_dir, trigger, plan, items)
+
+    failed = [item for item in items if item.get('error')]
+    for item in failed:
+        print(f"❌ {item['source'].get('structure')} [{item['source'].get('language')}]: {item['error']}",
+              file=sys.stderr)
+    print(f"✅ Wydano ponownie {len(items) - len(failed)}/{len(items)} deklaracji, manifest: {manifest}")
+    return 1 if failed else 0
+
+
+def cmd_import_sml(args) -> int:
+    import time
+    from src.services.data_loader import DataLoader
+    from src.services.sml_importer import import_file, master_file
+
+    data_loader = DataLoader()
+    start = time.perf_counter()
+    try:
+        plan = import_file(data_loader, args.file, args.material, args.supplier, kind=args.kind, mode=args.mode,
+                           sheet=args.sheet, create_missing=not args.no_create, dry_run=args.dry_run)
+    except (ValueError, ImportError, FileNotFoundError, ConnectionError, PermissionError, IOError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    print(plan.format_diff(data_loader.load_json(master_file(args.kind)), limit=args.diff_limit))
+    elapsed = time.perf_counter() - start
+    if args.dry_run:
+        print(f"\n(próba - nic nie zapisano, {elapsed:.2f} s)")
+    elif plan.has_changes:
+        print(f"\n✅ Zapisano materials.json i bazę master ({elapsed:.2f} s)")
+    else:
+        print(f"\nBrak zmian ({elapsed:.2f} s)")
+    return 1 if plan.errors else 0
+
+
+def _store_documents(args):
+    """(magazyn SQLite, {rodzaj: plik JSON}) dla db-migrate / db-export"""
+    from src.services.sqlite_store import SqliteStore, data_store_path, document_kinds
+
+    db_path = args.db or data_store_path()
+    if not db_path:
+        raise ValueError("Podaj --db lub ustaw DECLGEN_DATA_DB")
+    documents = {kind: Path(path) for path, kind in document_kinds().items()}
+    return SqliteStore(Path(db_path)), documents
+
+
+def cmd_db_migrate(args) -> int:
+    import time
+    from src.services.sqlite_store import migrate_from_json
+
+    try:
+        store, documents = _store_documents(args)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    start = time.perf_counter()
+    counts = migrate_from_json(store, documents)
+    for kind, count in counts.items():
+        print(f"  {kind}: {count} rekordów")
+    print(f"✅ Zapisano {store.db_path} ({time.perf_counter() - start:.2f} s)")
+    return 0
+
+
+def cmd_db_export(args) -> int:
+    from src.services.sqlite_store import export_to_json
+
+    try:
+        store, documents = _store_documents(args)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if args.output:
+        documents = {kind: Path(args.output) / path.name for kind, path in documents.items()}
+    for path in export_to_json(store, documents):
+        print(f"  {path}")
+    return 0
+
+
+def cmd_shard_materials(args) -> int:
+    from src.config.constants import MATERIALS_DB
+    from src.services.material_shards import join_material_shards, shard_dir, split_materials_file
+
+    directory = Path(args.dir) if args.dir else shard_dir()
+    try:
+        if args.join:
+            path = join_material_shards(directory, MATERIALS_DB)
+        else:
+            path = split_materials_file(MATERIALS_DB, directory)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(f"✅ Zapisano {path}")
+    if args.join:
+        print(f"   Usuń {directory / 'manifest.json'}, aby DataLoader wrócił do materials.json")
+    else:
+        print("   DataLoader używa teraz plików folii; materials.json nie jest już czytany")
+    return 0
+
+
+def cmd_serve(args) -> int:
+    from src.render_server import serve
+
+    serve(host=args.host, port=args.port, workers=args.workers, queue_size=args.queue_size,
+          docx_engine=args.docx_engine)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="Generator Deklaracji Zgodności - tryb bez GUI",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument('--profile', action='store_true',
+                        help="Profiluje przebieg (cProfile + próbkowanie stosów), zrzut do output/profiles/")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    gen = sub.add_parser('generate', help="Generuje deklaracje PDF/DOCX/HTML")
+    gen.add_argument('--type', choices=['tech', 'bok'], default='tech')
+    gen.add_argument('--structure', help="Struktura laminatu, np. PET/PE lub PET/ALU/PE")
+    gen.add_argument('--lang', nargs='+', choices=['pl', 'en'], default=['pl'])
+    gen.add_argument('--product-name', help="Pełna nazwa produktu (domyślnie prefiks + struktura)")
+    gen.add_argument('--orders', nargs='+', help="Numery zleceń (deklaracja BOK)")
+    gen.add_argument('--invoice', help="Numer faktury (deklaracja BOK)")
+    gen.add_argument('--csv', help="Plik CSV z listą deklaracji do wygenerowania")
+    gen.add_argument('--format', nargs='+', choices=FORMATS, default=['pdf'])
+    gen.add_argument('-o', '--output', default='output', help="Folder wyjściowy")
+    gen.add_argument('-j', '--jobs', type=int, default=1, help="Liczba procesów renderujących")
+    gen.add_argument('--docx-engine', choices=DOCX_ENGINES, default='native',
+                     help="DOCX z modelu (native) lub z szablonu HTML (html-lxml / html-soup)")
+    gen.set_defaults(func=cmd_generate)
+
+    regen = sub.add_parser('regenerate', help="Ponowne wydanie deklaracji dotkniętych zmianą danych master")
+    regen.add_argument('--substances', nargs='+', help="ID substancji SML (substanceId)")
+    regen.add_argument('--dual-use', nargs='+', help="ID surowców Dual Use")
+    regen.add_argument('--materials', nargs='+', help="Nazwy folii (np. po nowym certyfikacie dostawcy)")
+    regen.add_argument('--since', help="Tylko deklaracje wydane od daty (YYYY-MM-DD)")
+    regen.add_argument('--history', help="Plik dziennika deklaracji (domyślnie output/logs/declarations.jsonl)")
+    regen.add_argument('--dry-run', action='store_true', help="Tylko lista deklaracji do ponownego wydania")
+    regen.add_argument('--format', nargs='+', choices=FORMATS, default=['pdf'])
+    regen.add_argument('-o', '--output', help="Folder wyjściowy (domyślnie output/regenerated_<data>)")
+    regen.add_argument('-j', '--jobs', type=int, default=1, help="Liczba procesów renderujących")
+    regen.add_argument('--docx-engine', choices=DOCX_ENGINES, default='native',
+                       help="DOCX z modelu (native) lub z szablonu HTML (html-lxml / html-soup)")
+    regen.set_defaults(func=cmd_regenerate)
+
+    imp = sub.add_parser('import-sml', help="Import listy SML / Dual Use dostawcy (CSV / XLSX) do materials.json")
+    imp.add_argument('file', help="Plik CSV lub XLSX (nagłówki: CAS, Nr REF / Symbol E, Nazwa EN, SML...)")
+    imp.add_argument('--material', required=True, help="Nazwa folii w materials.json")
+    imp.add_argument('--supplier', required=True, help="Nazwa dostawcy (nowy wpis, jeśli nie istnieje)")
+    imp.add_argument('--kind', choices=['sml', 'dual_use'], default='sml')
+    imp.add_argument('--mode', choices=['merge', 'replace'], default='merge',
+                     help="merge - dodaj/zaktualizuj; replace - lista dostawcy = zawartość pliku")
+    imp.add_argument('--sheet', help="Arkusz XLSX (domyślnie aktywny)")
+    imp.add_argument('--no-create', action='store_true', help="Nie twórz nowych wpisów w bazie master")
+    imp.add_argument('--dry-run', action='store_true', help="Tylko różnice, bez zapisu")
+    imp.add_argument('--diff-limit', type=int, default=200, help="Maks. liczba wierszy różnic w raporcie")
+    imp.set_defaults(func=cmd_import_sml)
+
+    mig = sub.add_parser('db-migrate', help="Przenosi pliki JSON (materiały, bazy master, teksty) do bazy SQLite")
+    mig.add_argument('--db', help="Plik bazy (domyślnie DECLGEN_DATA_DB)")
+    mig.set_defaults(func=cmd_db_migrate)
+
+    exp = sub.add_parser('db-export', help="Zapisuje dane z bazy SQLite jako pliki JSON")
+    exp.add_argument('--db', help="Plik bazy (domyślnie DECLGEN_DATA_DB)")
+    exp.add_argument('-o', '--output', help="Folder wyjściowy (domyślnie nadpisuje pliki z constants.py)")
+    exp.set_defaults(func=cmd_db_export)
+
+    shard = sub.add_parser('shard-materials', help="Dzieli materials.json na pliki per folia (config/materials/)")
+    shard.add_argument('--dir', help="Folder plików folii (domyślnie config/materials obok materials.json)")
+    shard.add_argument('--join', action='store_true', help="Odwrotnie: scala pliki folii do materials.json")
+    shard.set_defaults(func=cmd_shard_materials)
+
+    srv = sub.add_parser('serve', help="Lokalna usługa HTTP renderująca deklaracje (src/render_server.py)")
+    srv.add_argument('--host', default='127.0.0.1')
+    srv.add_argument('--port', type=int, default=8765)
+    srv.add_argument('--workers', type=int, default=2, help="Liczba procesów renderujących")
+    srv.add_argument('--queue-size', type=int, default=16, help="Maks. liczba oczekujących żądań (potem 503)")
+    srv.add_argument('--docx-engine', choices=DOCX_ENGINES, default='native',
+                     help="DOCX z modelu (native) lub z szablonu HTML (html-lxml / html-soup)")
+    srv.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if not args.profile:
+        return args.func(args)
+
+    from src.utils.profiler import SessionProfiler
+    profiler = SessionProfiler()
+    profiler.start()
+    try:
+        return args.func(args)
+    finally:
+        profiler.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,16 +3,20 @@
 """
 BOKDeclarationView - Widok do generowania deklaracji BOK z danymi z bazy
 """
+import dataclasses
 import datetime
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QLineEdit, QComboBox, QPushButton, QGroupBox,
                              QMessageBox, QRadioButton, QFormLayout,
-                             QTableWidget, QTableWidgetItem, QHeaderView,
+                             QTableView, QHeaderView,
                              QFileDialog, QDateEdit, QCheckBox)
 from PyQt5.QtCore import QDate, Qt
-from src.models.declaration import Declaration, Product, ClientData, ProductBatch
+from src.models.declaration import Declaration, ClientData, ProductBatch
 from src.services.pdf_generator import PDFGenerator
+from src.services.declaration_factory import build_bok_declaration
 from src.services.database_service import DatabaseService
+from src.gui.support.coalescing_updater import CoalescingUpdater
+from src.gui.support.product_batch_model import ProductBatchTableModel, DeleteButtonDelegate, DELETE_COLUMN
 
 
 class BOKDeclarationView(QWidget):
@@ -22,11 +26,14 @@ class BOKDeclarationView(QWidget):
         self.db_service = DatabaseService()
         self.products = []
         self.pdf_generator = PDFGenerator(self.data_loader)
+        self._render_session = None  # Ostatnio wyrenderowana deklaracja (PDF/DOCX)
         self.available_materials = self.data_loader.get_materials_list()
+        # Podgląd laminatu liczony raz na serię zmian comboboxów / przeładowanie danych
+        self._laminate_updater = CoalescingUpdater(self._update_laminate_info, parent=self)
 
         self._init_ui()
         self._test_db_connection()
-        self._update_laminate_info()  # Wywołanie na start, żeby pole nie było puste
+        self._laminate_updater.schedule()  # Wywołanie na start, żeby pole nie było puste
 
     def _init_ui(self):
         layout = QVBoxLayout(self)
@@ -96,7 +103,7 @@ class BOKDeclarationView(QWidget):
         self.combo_mat3 = QComboBox()
         for c in [self.combo_mat1, self.combo_mat2, self.combo_mat3]:
             c.addItems(self.available_materials)
-            c.currentIndexChanged.connect(self._update_laminate_info)  # Odświeżanie przy zmianie
+            c.currentIndexChanged.connect(self._laminate_updater.schedule)  # Odświeżanie przy zmianie
 
         self.label_mat3 = QLabel("/");
         self.label_mat3.hide();
@@ -219,13 +226,15 @@ class BOKDeclarationView(QWidget):
         self._setup_checkbox_logic()
 
         # --- TABELA ---
-        self.table = QTableWidget(0, 8)
-        self.table.setHorizontalHeaderLabels([
-            "Indeks", "Nazwa", "Nr Partii", "Ilość",
-            "Struktura", "Grubości", "Data Prod.", "Usuń"
-        ])
+        self.products_model = ProductBatchTableModel(self.products, self)
+        self.table = QTableView()
+        self.table.setModel(self.products_model)
+        self.delete_delegate = DeleteButtonDelegate(self.table)
+        self.delete_delegate.deleteRequested.connect(self.products_model.remove_row)
+        self.table.setItemDelegateForColumn(DELETE_COLUMN, self.delete_delegate)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)  # Nazwa niech się rozciąga
+        self.table.setColumnWidth(DELETE_COLUMN, 40)
         layout.addWidget(self.table)
 
         # --- DOLNE PRZYCISKI (Poprawiony DOCX i Kosz) ---
@@ -279,7 +288,7 @@ class BOKDeclarationView(QWidget):
     def _toggle_trilayer(self, checked):
         for w in [self.label_mat3, self.combo_mat3, self.label_prod_thick3, self.input_prod_thick3]:
             w.setVisible(checked)
-        self._update_laminate_info()
+        self._laminate_updater.schedule()
 
     def _search_order(self):
         zo = self.input_zo.text().strip()
@@ -401,7 +410,7 @@ class BOKDeclarationView(QWidget):
         if self.checkbox_trilayer.isChecked():
             self.input_prod_thick3.setText(t3)
 
-        self._update_laminate_info()
+        self._laminate_updater.schedule()
 
     # --- POZOSTAŁE METODY POMOCNICZE ---
     def _add_product_to_list(self):
@@ -492,8 +501,7 @@ class BOKDeclarationView(QWidget):
         p._display_thick = thickness_str
         p._display_date = date_str
 
-        self.products.append(p)
-        self._update_products_table()
+        self.products_model.append(p)
 
         # Czyszczenie pól po dodaniu
         for f in [self.input_zo, self.input_art_index, self.input_art_desc,
@@ -504,22 +512,6 @@ class BOKDeclarationView(QWidget):
         # Komunikat sukcesu (opcjonalnie)
         self.statusBar().showMessage(f"✅ Dodano: {idx}", 2000) if hasattr(self, 'statusBar') else None
 
-    def _update_products_table(self):
-        self.table.setRowCount(len(self.products))
-        for i, p in enumerate(self.products):
-            self.table.setItem(i, 0, QTableWidgetItem(p.product_code))
-            self.table.setItem(i, 1, QTableWidgetItem(p.product_name))
-            self.table.setItem(i, 2, QTableWidgetItem(p.batch_number))
-            self.table.setItem(i, 3, QTableWidgetItem(p.quantity))
-            self.table.setItem(i, 4, QTableWidgetItem(getattr(p, '_display_struct', '')))
-            self.table.setItem(i, 5, QTableWidgetItem(getattr(p, '_display_thick', '')))
-            self.table.setItem(i, 6, QTableWidgetItem(getattr(p, '_display_date', '')))
-
-            btn = QPushButton("❌")
-            btn.setFixedWidth(40)
-            btn.clicked.connect(lambda ch, idx=i: (self.products.pop(idx), self._update_products_table()))
-            self.table.setCellWidget(i, 7, btn)
-
     def _create_action_buttons(self):
         l = QHBoxLayout()
 
@@ -542,8 +534,7 @@ class BOKDeclarationView(QWidget):
         return l
 
     def _clear_all(self):
-        self.products.clear();
-        self._update_products_table()
+        self.products_model.clear()
         for f in [self.input_client_name, self.input_client_id, self.input_client_addr, self.input_invoice]: f.clear()
 
     def _test_db_connection(self):
@@ -584,56 +575,59 @@ class BOKDeclarationView(QWidget):
         return True
 
     def _create_declaration(self) -> Declaration:
-        decl = Declaration()
-        decl.declaration_type = 'bok'
-        decl.language = 'pl' if self.radio_pl.isChecked() else 'en'
+        """Tworzy model danych dokumentu (ta sama ścieżka co tryb wiersza poleceń)"""
+        materials = [self.combo_mat1.currentText(), self.combo_mat2.currentText()]
+        if self.checkbox_trilayer.isChecked():
+            materials.append(self.combo_mat3.currentText())
 
-        # Dane klienta
-        decl.client = ClientData(
+        client = ClientData(
             client_code=self.input_client_id.text(),
             client_name=self.input_client_name.text(),
             client_address=self.input_client_addr.text(),
             invoice_number=self.input_invoice.text()
         )
+        # Tabele w języku deklaracji (wcześniej widok budował je zawsze po polsku)
+        return build_bok_declaration(
+            self.data_loader, materials, client, self.products,
+            language='pl' if self.radio_pl.isChecked() else 'en'
+        )
 
-        # Struktura produktu
-        m1, m2 = self.combo_mat1.currentText(), self.combo_mat2.currentText()
+    def _form_state(self) -> tuple:
+        """Odcisk formularza, danych i szablonu - zmiana oznacza konieczność ponownego renderowania"""
+        is_trilayer = self.checkbox_trilayer.isChecked()
+        return (
+            self.pdf_generator.source_stamp('bok', 'pl' if self.radio_pl.isChecked() else 'en'),
+            self.radio_pl.isChecked(),
+            self.input_client_id.text(),
+            self.input_client_name.text(),
+            self.input_client_addr.text(),
+            self.input_invoice.text(),
+            self.combo_mat1.currentText(),
+            self.combo_mat2.currentText(),
+            self.combo_mat3.currentText() if is_trilayer else None,
+            tuple(dataclasses.astuple(p) for p in self.products),
+            datetime.date.today(),
+        )
 
-        if self.checkbox_trilayer.isChecked():
-            m3 = self.combo_mat3.currentText()
-            decl.product = Product(name=f"{m1}/{m2}/{m3}", structure=f"{m1}/{m2}/{m3}")
-            details = self.data_loader.build_structure_data_trilayer(m1, m2, m3)
-        else:
-            decl.product = Product(name=f"{m1}/{m2}", structure=f"{m1}/{m2}")
-            details = self.data_loader.build_structure_data(m1, m2)
-
-        # ✅ NOWY KOD (POPRAWNY):
-        decl.substances_table = details.get('substances', [])
-        decl.dual_use_list = details.get('dual_use', [])
-        decl.batches = self.products.copy()  # <-- To jest lista ProductBatch!
-
-        # === DEBUG (opcjonalnie - możesz usunąć po sprawdzeniu) ===
-        print(f"\n=== DEBUG _create_declaration ===")
-        print(f"Liczba batches: {len(decl.batches)}")
-        print(f"Liczba substances: {len(decl.substances_table)}")
-        print(f"Liczba dual_use: {len(decl.dual_use_list)}")
-        if decl.batches:
-            for i, b in enumerate(decl.batches):
-                print(f"  Batch {i}: {b.product_code} | {b.product_name} | {b.batch_number}")
-        # === KONIEC DEBUG ===
-
-        return decl
+    def _get_render_session(self):
+        """Zwraca sesję renderowania - nową tylko jeśli formularz zmienił się od ostatniego użycia"""
+        self._laminate_updater.flush()
+        if self._render_session is None or not self._render_session.matches(self._form_state()):
+            declaration = self._create_declaration()  # Wyjątek - nic nie trafia do cache sesji
+            # Klucz po zbudowaniu: pierwsze wczytanie danych zwiększa DataLoader.generation
+            self._render_session = self.pdf_generator.create_session(declaration, self._form_state())
+        return self._render_session
 
     def _generate_pdf(self):
         if not self._validate_input():
             return
 
         try:
-            decl = self._create_declaration()
+            session = self._get_render_session()
+            decl = session.declaration
             path, _ = QFileDialog.getSaveFileName(self, "Zapisz", f"Deklaracja_{decl.client.client_name}.pdf", "*.pdf")
             if path:
-                with open(path, 'wb') as f:
-                    f.write(self.pdf_generator.generate_pdf_bytes(decl))
+                session.write_pdf(path)
                 QMessageBox.information(self, "OK", "Zapisano PDF.")
         except Exception as e:
             QMessageBox.critical(self, "Błąd", str(e))
@@ -643,11 +637,14 @@ class BOKDeclarationView(QWidget):
         if not self._validate_input():
             return
 
-        decl = self._create_declaration()
-        path, _ = QFileDialog.getSaveFileName(self, "Zapisz DOCX", "", "*.docx")
-        if path:
-            self.pdf_generator.generate_docx(decl, path)
-            QMessageBox.information(self, "Sukces", "Plik DOCX został wygenerowany.")
+        try:
+            session = self._get_render_session()
+            path, _ = QFileDialog.getSaveFileName(self, "Zapisz DOCX", "", "*.docx")
+            if path:
+                session.write_docx(path)
+                QMessageBox.information(self, "Sukces", "Plik DOCX został wygenerowany.")
+        except Exception as e:
+            QMessageBox.critical(self, "Błąd", str(e))
 
     def _search_client_dialog(self):
         try:
@@ -667,6 +664,7 @@ class BOKDeclarationView(QWidget):
 
     def refresh_data(self):
         """Odświeża dane z serwera"""
+        self._render_session = None
         self.available_materials = self.data_loader.get_materials_list()
 
         # Zapisz aktualne wybory
@@ -687,4 +685,4 @@ class BOKDeclarationView(QWidget):
         if current_mat3 in self.available_materials:
             self.combo_mat3.setCurrentText(current_mat3)
 
-        self._update_laminate_info()
\ No newline at end of file
+        self._laminate_updater.schedule()
\ No newline at end of file
@@ -2,23 +2,35 @@
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QComboBox, QTextEdit, QMessageBox,
-                             QTableWidget, QTableWidgetItem, QHeaderView, QInputDialog)
+                             QTableView, QHeaderView, QInputDialog, QFileDialog, QApplication)
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont
 import datetime
 import re
+from pathlib import Path
 from src.config.constants import (
     SUBSTANCES_MASTER, DUAL_USE_MASTER, MATERIALS_DB
 )
+from src.gui.support.substance_table_model import SubstanceTableModel, ID_COLUMN
+from src.utils.json_merge import MergeConflictError
+from src.utils.master_index import MasterIndex
+from src.utils.working_copy import WorkingCopy
 
 
 class DataEditorView(QWidget):
     def __init__(self, data_loader):
         super().__init__()
         self.data_loader = data_loader
+        # Edytor czyta dokumenty z cache (nie zmienia ich) - nie mogą wypaść z cache
+        self.data_loader.pin(SUBSTANCES_MASTER, DUAL_USE_MASTER, MATERIALS_DB)
         self.master_substances = {}
         self.master_dual_use = {}
         self.materials_db = {"materials": {}}
+        # Edycje trafiają do kopii roboczych - wspólne dokumenty zmienia dopiero zapis
+        self._materials = WorkingCopy(self.materials_db["materials"])
+        self._substances = WorkingCopy(self.master_substances)
+        self._dual_use = WorkingCopy(self.master_dual_use)
+        self.substances_index = MasterIndex(self._substances.view)
+        self.dual_use_index = MasterIndex(self._dual_use.view)
 
         # Kolory (zgodnie z życzeniem - jednolite i stonowane)
         self.COLOR_ADD = "#2c3e50"  # Ciemny granat
@@ -76,6 +88,11 @@ class DataEditorView(QWidget):
         btn_del_supp.setStyleSheet(btn_style_del)
         btn_del_supp.clicked.connect(self._delete_current_supplier)
 
+        btn_import = QPushButton("📥 IMPORT Z PLIKU")
+        btn_import.setStyleSheet(btn_style_add)
+        btn_import.setToolTip("Lista SML / Dual Use dostawcy z pliku CSV lub XLSX")
+        btn_import.clicked.connect(self._import_supplier_file)
+
         selection_layout.addWidget(QLabel("Folia:"))
         selection_layout.addWidget(self.combo_material)
         selection_layout.addWidget(btn_add_mat)
@@ -83,6 +100,7 @@ class DataEditorView(QWidget):
         selection_layout.addWidget(self.combo_supplier)
         selection_layout.addWidget(btn_add_supp)
         selection_layout.addWidget(btn_del_supp)
+        selection_layout.addWidget(btn_import)
         selection_layout.addStretch()
         layout.addLayout(selection_layout)
 
@@ -94,9 +112,12 @@ class DataEditorView(QWidget):
         layout.addWidget(self.warn_label)
 
         # 4. TABELA
-        self.table = QTableWidget()
-        self.table.itemChanged.connect(self._on_cell_changed)
+        # Model pracuje bezpośrednio na kopiach roboczych wpisu dostawcy i słowników master
+        self.table_model = SubstanceTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
         self.table.setAlternatingRowColors(True)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         layout.addWidget(self.table)
 
         # 5. STOPKA - DUŻE PRZYCISKI
@@ -113,6 +134,12 @@ class DataEditorView(QWidget):
         btn_del_row.setStyleSheet(btn_style_del + "font-size: 14px;")
         btn_del_row.clicked.connect(self._delete_selected_row)
 
+        btn_where_used = QPushButton("🔎 GDZIE UŻYTE")
+        btn_where_used.setMinimumHeight(55)
+        btn_where_used.setMinimumWidth(200)
+        btn_where_used.setStyleSheet(btn_style_add + "font-size: 14px;")
+        btn_where_used.clicked.connect(self._show_where_used)
+
         self.btn_save = QPushButton("💾 ZAPISZ ZMIANY W BAZIE")
         self.btn_save.setMinimumHeight(55);
         self.btn_save.setMinimumWidth(320)
@@ -122,6 +149,7 @@ class DataEditorView(QWidget):
 
         footer.addWidget(btn_add_row)
         footer.addWidget(btn_del_row)
+        footer.addWidget(btn_where_used)
         footer.addStretch()
         footer.addWidget(self.btn_save)
         layout.addLayout(footer)
@@ -131,18 +159,26 @@ class DataEditorView(QWidget):
         self.master_dual_use = self.data_loader.load_json(DUAL_USE_MASTER)
         self.materials_db = self.data_loader.load_json(MATERIALS_DB)
         if "materials" not in self.materials_db: self.materials_db["materials"] = {}
+        self._materials = WorkingCopy(self.materials_db["materials"])
+        self._substances = WorkingCopy(self.master_substances)
+        self._dual_use = WorkingCopy(self.master_dual_use)
+        self.substances_index = MasterIndex(self._substances.view)
+        self.dual_use_index = MasterIndex(self._dual_use.view)
         self._on_mode_changed()
 
+    def _has_unsaved_changes(self) -> bool:
+        return any(w.has_changes() for w in (self._materials, self._substances, self._dual_use))
+
     def _on_mode_changed(self):
         mode = self.combo_mode.currentText()
         self.combo_material.clear()
-        self.combo_material.addItems(sorted(self.materials_db["materials"].keys()))
+        self.combo_material.addItems(sorted(self._materials.view))
         self._refresh_display()
 
     def _on_material_changed(self, mat_name):
         self.combo_supplier.clear()
-        if mat_name in self.materials_db["materials"]:
-            for i, entry in enumerate(self.materials_db["materials"][mat_name]):
+        if mat_name in self._materials.view:
+            for i, entry in enumerate(self._materials.view[mat_name]):
                 display = f"{entry.get('supplier', 'Dostawca')} ({entry.get('lastUpdated', '')[:10]})"
                 self.combo_supplier.addItem(display, i)
 
@@ -150,88 +186,38 @@ class DataEditorView(QWidget):
         mode = self.combo_mode.currentText()
         mat_name = self.combo_material.currentText()
         supp_idx = self.combo_supplier.currentData()
+        is_sml = "Substancje" in mode
+        index = self.substances_index if is_sml else self.dual_use_index
 
         if mat_name == "" or supp_idx is None:
-            self.table.setRowCount(0);
+            self.table_model.set_source(None, index, is_sml)
             return
 
-        self.table.blockSignals(True)
-        self.table.setRowCount(0)
-        mat_entry = self.materials_db["materials"][mat_name][supp_idx]
-        is_sml = "Substancje" in mode
-
-        # Nagłówki: ID (techniczne) jest zawsze w kolumnie 0 (ukryte)
-        headers = ["ID", "CAS", "NAZWA EN", "NAZWA PL", "Nr REF", "WARTOŚĆ SML"] if is_sml else \
-            ["ID", "CAS", "NAZWA EN", "NAZWA PL", "SYMBOL E"]
-
-        self.table.setColumnCount(len(headers))
-        self.table.setHorizontalHeaderLabels(headers)
-        self.table.setColumnHidden(0, True)  # Zawsze ukrywamy ID techniczne przed użytkownikiem
-
-        items = mat_entry.get('sml' if is_sml else 'dualUse', [])
-        for i, item in enumerate(items):
-            self.table.insertRow(i)
-            s_id = str(item.get('substanceId') if is_sml else item)
-            master = self.master_substances.get(s_id, {}) if is_sml else self.master_dual_use.get(s_id, {})
-
-            # Przygotowanie wiersza
-            row_data = [
-                s_id,
-                master.get('cas', ''),
-                master.get('name_en', ''),
-                master.get('name_pl', ''),
-                master.get('ref_no', '') if is_sml else master.get('e_symbol', ''),
-                str(item.get('value', '')) if is_sml else ""
-            ]
-            if not is_sml: row_data = row_data[:5]  # Dual use ma 5 kolumn
-
-            for col, text in enumerate(row_data):
-                t_item = QTableWidgetItem(text)
-                t_item.setTextAlignment(Qt.AlignCenter)
-                # Pogrubienie ostatniej kolumny (SML lub Symbol E)
-                if (is_sml and col == 5) or (not is_sml and col == 4):
-                    t_item.setFont(QFont("", -1, QFont.Bold))
-                self.table.setItem(i, col, t_item)
-
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table.blockSignals(False)
+        # Tabela pracuje na kopii roboczej wpisu dostawcy
+        mat_entry = self._materials.edit(mat_name)[supp_idx]
+        key = 'sml' if is_sml else 'dualUse'
+        self.table_model.set_source(mat_entry.get(key), index, is_sml,
+                                    attach=lambda items: mat_entry.__setitem__(key, items))
+        self.table.setColumnHidden(ID_COLUMN, True)  # Zawsze ukrywamy ID techniczne przed użytkownikiem
 
     def _smart_add_row(self):
-        is_sml = "Substancje" in self.combo_mode.currentText()
+        if self.combo_supplier.currentData() is None:
+            return
+        is_sml = self.table_model.is_sml
         prompt = "Wyszukaj (Nr REF, CAS lub Nazwa EN):" if is_sml else "Wyszukaj (Symbol E, CAS lub Nazwa EN):"
         text, ok = QInputDialog.getText(self, "Dodaj wiersz", prompt)
         if not ok or not text: return
         text = text.strip()
 
-        master = self.master_substances if is_sml else self.master_dual_use
-        found_id = None
-
-        # Szukamy w bazie Master
-        for mid, data in master.items():
-            if (data.get('cas') == text or
-                    data.get('name_en', '').lower() == text.lower() or
-                    data.get('ref_no', '') == text or
-                    data.get('e_symbol', '').lower() == text.lower()):
-                found_id = mid
-                break
+        index = self.substances_index if is_sml else self.dual_use_index
 
-        self.table.blockSignals(True)
-        row = self.table.rowCount()
-        self.table.insertRow(row)
+        # Szukamy w bazie Master: dokładnie (CAS, Nazwa EN, Nr REF, Symbol E), potem podpowiedzi
+        found_id = index.find(text) or self._choose_suggestion(index, text)
 
         if found_id:
-            d = master[found_id]
-            vals = [found_id, d.get('cas', ''), d.get('name_en', ''), d.get('name_pl', ''),
-                    d.get('ref_no', '') if is_sml else d.get('e_symbol', ''), ""]
-            for c, v in enumerate(vals if is_sml else vals[:5]):
-                ti = QTableWidgetItem(str(v))
-                ti.setTextAlignment(Qt.AlignCenter)
-                self.table.setItem(row, c, ti)
+            row = self.table_model.add_row(found_id)
         else:
-            # Nowa substancja - generujemy nowe ID techniczne
-            new_id = str(max([int(k) for k in master.keys()] + [0]) + 1)
-
-            # Inteligentne wstawienie wpisanego tekstu
+            # Nowa substancja - nowe ID techniczne, wpisany tekst w najbardziej pasującej kolumnie
             col_to_fill = 2  # Nazwa EN
             if "-" in text and any(c.isdigit() for c in text):
                 col_to_fill = 1  # CAS
@@ -239,19 +225,23 @@ class DataEditorView(QWidget):
                 col_to_fill = 4  # Nr REF
             elif not is_sml and text.upper().startswith('E'):
                 col_to_fill = 4  # Symbol E
-
-            for c in range(6 if is_sml else 5):
-                val = new_id if c == 0 else (text if c == col_to_fill else "")
-                ti = QTableWidgetItem(val)
-                ti.setTextAlignment(Qt.AlignCenter)
-                self.table.setItem(row, c, ti)
-
-        self.table.blockSignals(False)
-
-    def _on_cell_changed(self, item):
-        # Jeśli użytkownik ręcznie zmieni Nr REF lub Symbol E, nie robimy auto-uzupełniania po ID
-        # bo ID jest ukryte i stałe.
-        pass
+            row = self.table_model.add_new_substance(col_to_fill, text)
+
+        self.table.scrollTo(self.table_model.index(row, 1))
+        self.table.selectRow(row)
+
+    def _choose_suggestion(self, index: MasterIndex, text: str):
+        """Lista podobnych wpisów (prefiks / fragment); None = nowa substancja"""
+        suggestions = index.search(text)
+        if not suggestions:
+            return None
+        new_option = f"➕ Nowa substancja: {text}"
+        labels = [index.describe(s_id) or s_id for s_id in suggestions]
+        choice, ok = QInputDialog.getItem(self, "Dodaj wiersz", "Podobne wpisy w bazie:",
+                                          labels + [new_option], 0, False)
+        if not ok or choice == new_option:
+            return None
+        return suggestions[labels.index(choice)]
 
     def _save_all_data(self):
         mat_name = self.combo_material.currentText()
@@ -259,57 +249,47 @@ class DataEditorView(QWidget):
         if not mat_name or supp_idx is None: return
 
         try:
-            is_sml = "Substancje" in self.combo_mode.currentText()
-            new_items_list = []
-
-            is_sml = "Substancje" in self.combo_mode.currentText()
-            new_items_dict = {}  # Używamydict do automatycznej deduplikacji po ID
-
-            for r in range(self.table.rowCount()):
-                mid = self.table.item(r, 0).text()
-                if not mid:
-                    continue
-
-                master_data = {
-                    "cas": self.table.item(r, 1).text(),
-                    "name_en": self.table.item(r, 2).text(),
-                    "name_pl": self.table.item(r, 3).text()
-                }
-
-                if is_sml:
-                    master_data["ref_no"] = self.table.item(r, 4).text()
-                    self.master_substances[mid] = master_data
-                    val = self.table.item(r, 5).text().replace(',', '.') if self.table.item(r, 5) else "0"
-                    new_items_dict[mid] = {"substanceId": int(mid), "value": float(val)}
-                else:
-                    master_data["e_symbol"] = self.table.item(r, 4).text()
-                    self.master_dual_use[mid] = master_data
-                    new_items_dict[mid] = int(mid)
-
-            # Konwersja dict na listę (pozostawiamy tylko unikalne wpisy)
-            new_items_list = list(new_items_dict.values())
-
-            target = self.materials_db["materials"][mat_name][supp_idx]
-            target["lastUpdated"] = datetime.datetime.now().isoformat()
-
-            if is_sml:
-                target["sml"] = new_items_list
-            else:
-                target["dualUse"] = new_items_list
-
-            self.data_loader.save_json(MATERIALS_DB, self.materials_db)
-            self.data_loader.save_json(SUBSTANCES_MASTER, self.master_substances)
-            self.data_loader.save_json(DUAL_USE_MASTER, self.master_dual_use)
+            if mat_name in self._materials.changed():
+                self._materials.edit(mat_name)[supp_idx]["lastUpdated"] = datetime.datetime.now().isoformat()
+            self._write_changes()
+            self._refresh_display()  # Tabela na nowej kopii roboczej zapisanego wpisu
             QMessageBox.information(self, "OK", "Baza zaktualizowana pomyślnie.")
+        except MergeConflictError as e:
+            QMessageBox.warning(self, "Konflikt zapisu", str(e))
         except Exception as e:
             QMessageBox.critical(self, "Błąd", f"Szczegóły błędu: {e}")
 
+    def _write_changes(self, materials=None):
+        """
+        Zapisuje zmienione rekordy kopii roboczych (materials=None - wszystkie folie).
+        Najpierw bazy master - materiały odwołują się do ich ID; nowe wpisy master tylko, jeśli są użyte.
+        """
+        used = {'sml': set(), 'dualUse': set()}
+        for name in self._materials.keys():
+            for entry in self._materials.view[name] or []:
+                used['sml'].update(str(item.get('substanceId')) for item in entry.get('sml', []))
+                used['dualUse'].update(str(d_id) for d_id in entry.get('dualUse', []))
+        for working, index, key in ((self._substances, self.substances_index, 'sml'),
+                                    (self._dual_use, self.dual_use_index, 'dualUse')):
+            orphans = [s_id for s_id in working.keys() if working.is_new(s_id) and s_id not in used[key]]
+            working.discard(orphans)
+            for s_id in orphans:
+                index.update(s_id)
+
+        for path, working, section, keys in ((SUBSTANCES_MASTER, self._substances, None, None),
+                                             (DUAL_USE_MASTER, self._dual_use, None, None),
+                                             (MATERIALS_DB, self._materials, 'materials', materials)):
+            changes = working.changes(Path(path).name, keys)
+            if changes:
+                self.data_loader.update_records(path, changes, section=section)
+                working.discard(changes)  # Wersja wspólna zawiera już zapisane rekordy
+
     def _add_new_material(self):
         name, ok = QInputDialog.getText(self, "Nowa Folia", "Nazwa:")
         if ok and name:
             name = name.upper()
-            if name not in self.materials_db["materials"]:
-                self.materials_db["materials"][name] = []
+            if name not in self._materials.view:
+                self._materials.set(name, [])
                 self.combo_material.addItem(name)
             self.combo_material.setCurrentText(name)
 
@@ -318,7 +298,7 @@ class DataEditorView(QWidget):
         if not mat: return
         supp, ok = QInputDialog.getText(self, "Nowy Dostawca", f"Nazwa dostawcy dla {mat}:")
         if ok and supp:
-            self.materials_db["materials"][mat].append(
+            self._materials.edit(mat).append(
                 {"supplier": supp, "lastUpdated": datetime.datetime.now().isoformat(), "sml": [], "dualUse": []})
             self._on_material_changed(mat)
             self.combo_supplier.setCurrentIndex(self.combo_supplier.count() - 1)
@@ -327,13 +307,22 @@ class DataEditorView(QWidget):
         mat = self.combo_material.currentText()
         idx = self.combo_supplier.currentData()
         if idx is not None and QMessageBox.question(self, "Usuń", f"Usunąć dostawcę z {mat}?") == QMessageBox.Yes:
-            self.materials_db["materials"][mat].pop(idx)
-            self.data_loader.save_json(MATERIALS_DB, self.materials_db)
+            entries = self._materials.edit(mat)
+            removed = entries.pop(idx)
+            try:
+                self._write_changes([mat])
+            except Exception as e:
+                entries.insert(idx, removed)  # Dostawca pozostaje (zapis się nie udał)
+                if isinstance(e, MergeConflictError):
+                    QMessageBox.warning(self, "Konflikt zapisu", str(e))
+                else:
+                    QMessageBox.critical(self, "Błąd", f"Szczegóły błędu: {e}")
+                return
             self._on_material_changed(mat)
 
     def _delete_selected_row(self):
         """Usuwa zaznaczony wiersz z tabeli"""
-        current_row = self.table.currentRow()
+        current_row = self.table.currentIndex().row()
         if current_row >= 0:
             reply = QMessageBox.question(
                 self,
@@ -342,10 +331,94 @@ class DataEditorView(QWidget):
                 QMessageBox.Yes | QMessageBox.No
             )
             if reply == QMessageBox.Yes:
-                self.table.removeRow(current_row)
+                self.table_model.remove_row(current_row)
         else:
             QMessageBox.warning(self, "Brak zaznaczenia", "Zaznacz wiersz do usunięcia")
 
+    def _import_supplier_file(self):
+        """Import listy dostawcy z pliku: podgląd różnic, zapis po potwierdzeniu"""
+        mat = self.combo_material.currentText()
+        if not mat:
+            return
+        if self._has_unsaved_changes():
+            # Import zapisuje tylko swoje rekordy - plan musi powstać z danych zgodnych z dyskiem
+            reply = QMessageBox.question(self, "Niezapisane zmiany",
+                                         "Przed importem trzeba zapisać bieżące zmiany. Zapisać teraz?",
+                                         QMessageBox.Yes | QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                return
+            self._save_all_data()
+            if self._has_unsaved_changes():
+                return  # Zapis się nie udał
+        path, _ = QFileDialog.getOpenFileName(self, "Import listy dostawcy", "",
+                                              "Arkusze (*.csv *.xlsx);;CSV (*.csv);;Excel (*.xlsx)")
+        if not path:
+            return
+
+        supp_idx = self.combo_supplier.currentData()
+        current = self._materials.view[mat][supp_idx].get('supplier', '') if supp_idx is not None else ''
+        supplier, ok = QInputDialog.getText(self, "Import listy dostawcy", f"Dostawca dla {mat}:", text=current)
+        if not ok or not supplier.strip():
+            return
+
+        from src.services.sml_importer import plan_import, apply_import, read_rows
+
+        is_sml = self.table_model.is_sml
+        index = self.substances_index if is_sml else self.dual_use_index
+        try:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            try:
+                plan = plan_import(read_rows(path), self.materials_db, index, mat, supplier.strip(),
+                                   kind='sml' if is_sml else 'dual_use')
+            finally:
+                QApplication.restoreOverrideCursor()
+        except Exception as e:
+            QMessageBox.critical(self, "Błąd importu", str(e))
+            return
+
+        if not plan.has_changes:
+            QMessageBox.information(self, "Import", "Brak zmian.\n\n" + plan.summary())
+            return
+
+        box = QMessageBox(QMessageBox.Question, "Import - podgląd zmian",
+                          plan.summary() + "\n\nZapisać zmiany w bazie?", QMessageBox.Yes | QMessageBox.No, self)
+        box.setDetailedText(plan.format_diff(index.master, limit=2000))
+        if box.exec_() != QMessageBox.Yes:
+            return
+
+        try:
+            apply_import(self.data_loader, plan)
+        except Exception as e:
+            QMessageBox.critical(self, "Błąd zapisu", f"Import nie został zapisany.\n\nSzczegóły błędu: {e}")
+            return
+
+        for working in (self._materials, self._substances, self._dual_use):
+            working.discard_clean()  # Kopie sprzed importu - wersja wspólna zawiera już zapisane rekordy
+        self.substances_index.rebuild()  # Rekordy zapisane w wersji z dysku (mogą zawierać zmiany innych)
+        self.dual_use_index.rebuild()
+        self._on_material_changed(mat)
+        self.combo_supplier.setCurrentIndex(self.combo_supplier.findData(plan.supplier_index))
+        QMessageBox.information(self, "OK", "Import zapisany.\n\n" + plan.summary())
+
+    def _show_where_used(self):
+        """Folie, dostawcy i wydane deklaracje zawierające zaznaczoną substancję"""
+        row = self.table.currentIndex().row()
+        if row < 0:
+            QMessageBox.warning(self, "Brak zaznaczenia", "Zaznacz substancję w tabeli")
+            return
+
+        from src.gui.support.where_used_dialog import WhereUsedDialog
+
+        is_sml = self.table_model.is_sml
+        s_id = self.table_model.item_id(row)
+        index = self.substances_index if is_sml else self.dual_use_index
+        where_used = self.data_loader.get_where_used()
+        unsaved = self._materials.changed()
+        if unsaved:
+            # Niezapisane zmiany tylko w widoku dla okna - wspólny indeks odpowiada zapisanym danym
+            where_used = where_used.overlay({'materials': self._materials.view}, unsaved)
+        WhereUsedDialog(where_used, s_id, index.describe(s_id), dual_use=not is_sml, parent=self).exec_()
+
     def refresh_data(self):
         """Odświeża dane z serwera"""
         self._load_all_data()
\ No newline at end of file
@@ -5,24 +5,73 @@ MainWindow - Główne okno aplikacji z menu nawigacji
 """
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout,
                              QPushButton, QStackedWidget, QMessageBox,
-                             QLabel, QHBoxLayout)
-from PyQt5.QtCore import Qt
+                             QLabel, QHBoxLayout, QApplication)
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
-from src.gui.tech_declaration_view import TechDeclarationView
-from src.gui.bok_declaration_view import BOKDeclarationView
-from src.gui.data_editor_view import DataEditorView
-from src.gui.text_editor_view import TextEditorView
 from src.services.data_loader import DataLoader
+from src.services.pdf_generator import PDFGenerator
+from src.utils import timing
+from src.utils.profiler import SessionProfiler
+from src.utils.stall_watchdog import StallWatchdog, threshold_from_env, HEARTBEAT_INTERVAL_MS
+
+
+def _create_tech_view(data_loader):
+    from src.gui.tech_declaration_view import TechDeclarationView
+    return TechDeclarationView(data_loader)
+
+
+def _create_bok_view(data_loader):
+    from src.gui.bok_declaration_view import BOKDeclarationView
+    return BOKDeclarationView(data_loader)
+
+
+def _create_data_editor_view(data_loader):
+    from src.gui.data_editor_view import DataEditorView
+    return DataEditorView(data_loader)
+
+
+def _create_text_editor_view(data_loader):
+    from src.gui.text_editor_view import TextEditorView
+    return TextEditorView(data_loader)
+
+
+# Widoki w kolejności stron QStackedWidget: (atrybut MainWindow, fabryka)
+# Budowane przy pierwszym wejściu - do tego czasu strona jest pustym placeholderem
+VIEWS = [
+    ('tech_view', _create_tech_view),
+    ('bok_view', _create_bok_view),
+    ('data_editor_view', _create_data_editor_view),
+    ('text_editor_view', _create_text_editor_view),
+]
+DEFAULT_VIEW = 0
 
 
 class MainWindow(QMainWindow):
     """Główne okno aplikacji z nawigacją między widokami"""
 
-    def __init__(self):
+    def __init__(self, profiler: SessionProfiler = None):
         super().__init__()
         self.data_loader = DataLoader()
+
+        # Profilowanie sesji (main.py --profile lub przycisk w panelu bocznym)
+        self.profiler = profiler or SessionProfiler()
+        self.profiler.data_loader = self.data_loader
         self._check_server_connection()
         self._init_ui()
+        self._start_stall_watchdog()
+
+    def _start_stall_watchdog(self):
+        """Strażnik zawieszeń GUI - QTimer w wątku GUI daje uderzenia serca, wątek strażnika je sprawdza"""
+        self.watchdog = None
+        threshold_ms = threshold_from_env()
+        if not threshold_ms:
+            return
+
+        self.watchdog = StallWatchdog(threshold_ms=threshold_ms)
+        self._heartbeat_timer = QTimer(self)
+        self._heartbeat_timer.timeout.connect(self.watchdog.beat)
+        self._heartbeat_timer.start(HEARTBEAT_INTERVAL_MS)
+        self.watchdog.start()
 
     def _check_server_connection(self):
         """Sprawdza połączenie z danymi przy starcie"""
@@ -76,19 +125,49 @@ class MainWindow(QMainWindow):
         sidebar = self._create_sidebar()
         main_layout.addWidget(sidebar)
 
-        # Stacked widget dla różnych widoków
+        # Stacked widget dla różnych widoków - placeholdery, widok tworzony przy pierwszym wejściu
         self.stacked_widget = QStackedWidget()
-        self.tech_view = TechDeclarationView(self.data_loader)
-        self.bok_view = BOKDeclarationView(self.data_loader)
-        self.data_editor_view = DataEditorView(self.data_loader)
-        self.text_editor_view = TextEditorView(self.data_loader)
-
-        self.stacked_widget.addWidget(self.tech_view)
-        self.stacked_widget.addWidget(self.bok_view)
-        self.stacked_widget.addWidget(self.data_editor_view)
-        self.stacked_widget.addWidget(self.text_editor_view)
+        for attr_name, _ in VIEWS:
+            setattr(self, attr_name, None)
+            self.stacked_widget.addWidget(self._create_placeholder())
 
         main_layout.addWidget(self.stacked_widget, stretch=1)
+        self._show_view(DEFAULT_VIEW)
+
+    @staticmethod
+    def _create_placeholder() -> QWidget:
+        placeholder = QWidget()
+        layout = QVBoxLayout(placeholder)
+        label = QLabel("Ładowanie...")
+        label.setAlignment(Qt.AlignCenter)
+        label.setStyleSheet("color: #7f8c8d; font-size: 14px;")
+        layout.addWidget(label)
+        return placeholder
+
+    def _show_view(self, index: int):
+        """Przełącza na widok, tworząc go przy pierwszym wejściu (w miejsce placeholdera)"""
+        attr_name, factory = VIEWS[index]
+        if getattr(self, attr_name) is None:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            try:
+                view = factory(self.data_loader)
+            except Exception as e:
+                QApplication.restoreOverrideCursor()
+                QMessageBox.critical(self, "Błąd", f"Nie udało się otworzyć widoku:\n{e}")
+                return
+            QApplication.restoreOverrideCursor()
+
+            placeholder = self.stacked_widget.widget(index)
+            self.stacked_widget.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.stacked_widget.insertWidget(index, view)
+            setattr(self, attr_name, view)
+
+        self.stacked_widget.setCurrentIndex(index)
+
+    def _built_views(self) -> list:
+        """Widoki, które zostały już utworzone"""
+        return [getattr(self, attr_name) for attr_name, _ in VIEWS if getattr(self, attr_name) is not None]
 
     def _create_sidebar(self) -> QWidget:
         """Tworzy panel boczny z przyciskami nawigacji"""
@@ -133,19 +212,19 @@ class MainWindow(QMainWindow):
 
         # Przyciski nawigacji
         btn_tech = QPushButton("📄 Deklaracja\nTechnologiczna")
-        btn_tech.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(0))
+        btn_tech.clicked.connect(lambda: self._show_view(0))
         layout.addWidget(btn_tech)
 
         btn_bok = QPushButton("📋 Deklaracja BOK\n(z bazą danych)")
-        btn_bok.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(1))
+        btn_bok.clicked.connect(lambda: self._show_view(1))
         layout.addWidget(btn_bok)
 
         btn_editor = QPushButton("⚙️ Edycja Danych\nWejściowych")
-        btn_editor.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(2))
+        btn_editor.clicked.connect(lambda: self._show_view(2))
         layout.addWidget(btn_editor)
 
         btn_text_editor = QPushButton("📝 Edycja Tekstów\nDeklaracji")
-        btn_text_editor.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(3))
+        btn_text_editor.clicked.connect(lambda: self._show_view(3))
         layout.addWidget(btn_text_editor)
 
         # Spacer
@@ -164,6 +243,22 @@ class MainWindow(QMainWindow):
         """)
         layout.addWidget(btn_status)
 
+        # Przełącznik profilowania sesji
+        self.btn_profile = QPushButton()
+        self.btn_profile.setCheckable(True)
+        self.btn_profile.setChecked(self.profiler.running)
+        self._update_profile_button()
+        self.btn_profile.toggled.connect(self._toggle_profiling)
+        self.btn_profile.setStyleSheet("""
+            QPushButton {
+                background-color: #34495e;
+            }
+            QPushButton:checked {
+                background-color: #c0392b;
+            }
+        """)
+        layout.addWidget(self.btn_profile)
+
         # Przycisk odświeżania danych
         btn_refresh = QPushButton("🔄 Odśwież dane\nz serwera")
         btn_refresh.clicked.connect(self._refresh_data)
@@ -204,16 +299,62 @@ class MainWindow(QMainWindow):
             msg += f"{templates_icon} Folder templates/\n"
             msg += f"{data_icon} Folder data/\n"
 
-        QMessageBox.information(self, "Status połączenia", msg)
+        # Pomiary czasu etapów generowania - pełna tabela w "Pokaż szczegóły"
+        if timing.is_enabled():
+            msg += "\n⏱ Pomiar czasu włączony - podsumowanie w szczegółach"
+        else:
+            msg += f"\n⏱ Pomiar czasu wyłączony ({timing.ENV_FLAG}=1)"
+
+        msg += f"\n🗃 Cache danych: {self.data_loader.format_cache_stats()}"
+
+        # Zawieszenia GUI wykryte przez strażnika
+        if self.watchdog:
+            stalls = self.watchdog.summary()
+            msg += f"\n🐢 Zawieszenia GUI: {stalls['count']}"
+            if stalls['longest']:
+                msg += f" (najdłuższe {stalls['longest']['duration_ms']:.0f} ms - {stalls['longest']['call_site']})"
+
+        box = QMessageBox(QMessageBox.Information, "Status połączenia", msg, QMessageBox.Ok, self)
+        if timing.is_enabled():
+            box.setDetailedText(timing.format_summary())
+        box.exec_()
+
+    def _update_profile_button(self):
+        if self.profiler.running:
+            self.btn_profile.setText("⏹ Zatrzymaj\nprofilowanie")
+        else:
+            self.btn_profile.setText("⏺ Profilowanie\nsesji")
+
+    def _toggle_profiling(self, checked: bool):
+        """Włącza / wyłącza profilowanie; po zatrzymaniu pokazuje folder ze zrzutem"""
+        if checked:
+            self.profiler.start()
+            self._update_profile_button()
+            return
+
+        try:
+            target = self.profiler.stop()
+        except Exception as e:
+            QMessageBox.warning(self, "Błąd", f"Nie udało się zapisać profilu:\n{e}")
+            target = None
+        self._update_profile_button()
+
+        if target:
+            QMessageBox.information(
+                self,
+                "Profil zapisany",
+                f"Zapisano profil sesji:\n{target}\n\n"
+                "Prześlij cały folder do administratora programu."
+            )
 
     def _refresh_data(self):
         """Odświeża dane z serwera (czyści cache)"""
         try:
             self.data_loader.clear_cache()
-            self.tech_view.refresh_data()
-            self.bok_view.refresh_data()
-            self.data_editor_view.refresh_data()
-            self.text_editor_view.refresh_data()
+            PDFGenerator.clear_asset_cache()
+            # Nieotwarte jeszcze widoki wczytają świeże dane przy pierwszym wejściu
+            for view in self._built_views():
+                view.refresh_data()
             QMessageBox.information(
                 self,
                 "Sukces",
@@ -0,0 +1,46 @@
+# gui/support/coalescing_updater.py
+
+"""
+CoalescingUpdater - Odroczone, scalane wywołanie kosztownej aktualizacji widoku
+Seria sygnałów (zmiana kilku comboboxów, przeładowanie listy materiałów) w odstępach
+krótszych niż 'delay_ms' kończy się jednym wywołaniem callbacku po ustaniu zmian.
+"""
+from PyQt5.QtCore import QObject, QTimer
+
+DEFAULT_DELAY_MS = 80
+
+
+class CoalescingUpdater(QObject):
+    """Jednorazowy QTimer restartowany przy każdym schedule() - callback wywołany raz na serię zmian"""
+
+    def __init__(self, callback, delay_ms: int = DEFAULT_DELAY_MS, parent=None):
+        super().__init__(parent)
+        self._callback = callback
+        self._pending = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._fire)
+
+    @property
+    def pending(self) -> bool:
+        return self._pending
+
+    def schedule(self, *_signal_args):
+        """Zaplanuj aktualizację (argumenty sygnału Qt są ignorowane); każde wywołanie przesuwa termin"""
+        self._pending = True
+        self._timer.start()
+
+    def flush(self):
+        """Wykonaj zaległą aktualizację od razu (np. przed generowaniem dokumentu)"""
+        if self._pending:
+            self._timer.stop()
+            self._fire()
+
+    def cancel(self):
+        self._pending = False
+        self._timer.stop()
+
+    def _fire(self):
+        self._pending = False
+        self._callback()
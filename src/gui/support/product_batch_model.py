@@ -0,0 +1,95 @@
+# gui/support/product_batch_model.py
+
+"""
+ProductBatchTableModel - Model tabeli partii wyrobów (widok BOK)
+Model pracuje bezpośrednio na liście ProductBatch widoku - dodanie / usunięcie partii
+to jeden sygnał insert/remove zamiast przebudowy całej tabeli.
+"""
+from typing import List
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, pyqtSignal
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication
+
+from src.models.declaration import ProductBatch
+
+# (nagłówek, wartość w komórce)
+COLUMNS = [
+    ("Indeks", lambda p: p.product_code),
+    ("Nazwa", lambda p: p.product_name),
+    ("Nr Partii", lambda p: p.batch_number),
+    ("Ilość", lambda p: p.quantity),
+    ("Struktura", lambda p: getattr(p, '_display_struct', '')),
+    ("Grubości", lambda p: getattr(p, '_display_thick', '')),
+    ("Data Prod.", lambda p: getattr(p, '_display_date', '')),
+    ("Usuń", lambda p: "❌"),
+]
+DELETE_COLUMN = len(COLUMNS) - 1
+
+
+class ProductBatchTableModel(QAbstractTableModel):
+    """Tylko do odczytu; lista 'batches' jest współdzielona z widokiem (nie kopiowana)"""
+
+    def __init__(self, batches: List[ProductBatch], parent=None):
+        super().__init__(parent)
+        self._batches = batches
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._batches)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return COLUMNS[index.column()][1](self._batches[index.row()])
+        if role == Qt.TextAlignmentRole and index.column() == DELETE_COLUMN:
+            return Qt.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return COLUMNS[section][0]
+        return section + 1
+
+    def append(self, batch: ProductBatch):
+        row = len(self._batches)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._batches.append(batch)
+        self.endInsertRows()
+
+    def remove_row(self, row: int):
+        if not 0 <= row < len(self._batches):
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._batches[row]
+        self.endRemoveRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._batches.clear()
+        self.endResetModel()
+
+
+class DeleteButtonDelegate(QStyledItemDelegate):
+    """Rysuje przycisk usuwania w komórce (bez tworzenia widgetu na wiersz); kliknięcie → deleteRequested(row)"""
+
+    deleteRequested = pyqtSignal(int)
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = index.data(Qt.DisplayRole)
+        button.state = QStyle.State_Enabled
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter)
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton
+                and option.rect.contains(event.pos())):
+            self.deleteRequested.emit(index.row())
+            return True
+        return super().editorEvent(event, model, option, index)
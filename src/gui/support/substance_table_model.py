@@ -0,0 +1,169 @@
+# gui/support/substance_table_model.py
+
+"""
+SubstanceTableModel - Model edytora substancji SML / surowców Dual Use
+Pracuje bezpośrednio na liście 'sml' / 'dualUse' wpisu dostawcy i na słowniku master - bez kopiowania
+do komórek tabeli; edytor podaje kopie robocze (WorkingCopy), nie dokumenty współdzielone z cache.
+Edycja CAS / nazw / Nr REF / Symbolu E trafia do słownika master (zmiana globalna) jako nowy rekord,
+edycja wartości SML - do wpisu dostawcy.
+"""
+from typing import Callable, Dict, List, Optional
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QFont
+
+from src.utils.master_index import MasterIndex
+
+SML_HEADERS = ["ID", "CAS", "NAZWA EN", "NAZWA PL", "Nr REF", "WARTOŚĆ SML"]
+DUAL_USE_HEADERS = ["ID", "CAS", "NAZWA EN", "NAZWA PL", "SYMBOL E"]
+
+# Kolumna → klucz w słowniku master (kolumna 0 to ukryte ID techniczne)
+SML_MASTER_FIELDS = {1: 'cas', 2: 'name_en', 3: 'name_pl', 4: 'ref_no'}
+DUAL_USE_MASTER_FIELDS = {1: 'cas', 2: 'name_en', 3: 'name_pl', 4: 'e_symbol'}
+ID_COLUMN = 0
+SML_VALUE_COLUMN = 5
+
+
+class SubstanceTableModel(QAbstractTableModel):
+    """Model tabeli edytora danych; set_source() podmienia listę bez przebudowy widoku"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items: List = []
+        self._master: Dict = {}
+        self._index: Optional[MasterIndex] = None
+        self._is_sml = True
+        self._attach = None
+        self._bold = QFont("", -1, QFont.Bold)
+
+    # --- ŹRÓDŁO DANYCH ---
+
+    def set_source(self, items: Optional[List], index: MasterIndex, is_sml: bool,
+                   attach: Optional[Callable[[List], None]] = None):
+        """
+        items: lista 'sml' ({substanceId, value}) lub 'dualUse' (ID) wpisu dostawcy; None = pusta tabela.
+        index: indeks słownika master - aktualizowany przy każdej edycji.
+        attach: gdy items=None - wstawia nową listę do wpisu przy pierwszym dodanym wierszu.
+        """
+        self.beginResetModel()
+        self._items = items if items is not None else []
+        self._attach = attach if items is None else None
+        self._index = index
+        self._master = index.master
+        self._is_sml = is_sml
+        self.endResetModel()
+
+    @property
+    def is_sml(self) -> bool:
+        return self._is_sml
+
+    def _headers(self) -> List[str]:
+        return SML_HEADERS if self._is_sml else DUAL_USE_HEADERS
+
+    def _master_fields(self) -> Dict[int, str]:
+        return SML_MASTER_FIELDS if self._is_sml else DUAL_USE_MASTER_FIELDS
+
+    def item_id(self, row: int) -> str:
+        item = self._items[row]
+        return str(item.get('substanceId') if self._is_sml else item)
+
+    def find_row(self, s_id: str) -> int:
+        """Wiersz z danym ID lub -1"""
+        for row in range(len(self._items)):
+            if self.item_id(row) == s_id:
+                return row
+        return -1
+
+    # --- QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._items)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers())
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._headers()[section]
+        return section + 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() != ID_COLUMN:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        col = index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            s_id = self.item_id(index.row())
+            if col == ID_COLUMN:
+                return s_id
+            if self._is_sml and col == SML_VALUE_COLUMN:
+                return str(self._items[index.row()].get('value', ''))
+            return self._master.get(s_id, {}).get(self._master_fields()[col], '')
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.FontRole and col == self.columnCount() - 1:
+            # Pogrubienie ostatniej kolumny (SML lub Symbol E)
+            return self._bold
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole or index.column() == ID_COLUMN:
+            return False
+        row, col = index.row(), index.column()
+        text = str(value).strip()
+
+        if self._is_sml and col == SML_VALUE_COLUMN:
+            try:
+                self._items[row]['value'] = float(text.replace(',', '.')) if text else 0.0
+            except ValueError:
+                return False
+        else:
+            s_id = self.item_id(row)
+            entry = dict(self._master.get(s_id) or {})  # Nowy rekord - bez zmiany wpisu w miejscu
+            entry[self._master_fields()[col]] = text
+            self._master[s_id] = entry
+            self._index.update(s_id)
+
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
+
+    # --- WIERSZE ---
+
+    def add_row(self, s_id: str) -> int:
+        """Dodaje substancję o ID z master (jeśli jeszcze jej nie ma); zwraca numer wiersza"""
+        existing = self.find_row(s_id)
+        if existing >= 0:
+            return existing
+
+        if self._attach is not None:
+            self._attach(self._items)
+            self._attach = None
+        row = len(self._items)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._items.append({"substanceId": int(s_id), "value": 0.0} if self._is_sml else int(s_id))
+        self.endInsertRows()
+        return row
+
+    def add_new_substance(self, column: int = 2, text: str = "") -> int:
+        """Tworzy nowy wpis w master (kolejne ID techniczne) z tekstem w danej kolumnie; zwraca wiersz"""
+        new_id = self._index.allocate_id()
+        fields = self._master_fields()
+        self._master[new_id] = {field: (text if col == column else "") for col, field in fields.items()}
+        self._index.update(new_id)
+        return self.add_row(new_id)
+
+    def remove_row(self, row: int):
+        if not 0 <= row < len(self._items):
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._items[row]
+        self.endRemoveRows()
@@ -0,0 +1,64 @@
+# gui/support/where_used_dialog.py
+
+"""
+WhereUsedDialog - Okno "Gdzie użyte" dla substancji SML / surowca Dual Use
+Pokazuje folie i dostawców zawierających substancję oraz wydane deklaracje, których dotyczy zmiana.
+"""
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QDialogButtonBox, QGroupBox)
+
+from src.services.declaration_history import affected_declarations
+
+
+class WhereUsedDialog(QDialog):
+    def __init__(self, where_used, item_id: str, description: str, dual_use: bool = False, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Gdzie użyte")
+        self.setMinimumSize(700, 500)
+
+        usages = where_used.describe_usage(item_id, dual_use)
+        materials = sorted({u['material'] for u in usages})
+        declarations = affected_declarations(materials)
+        structures = sorted({d.get('structure', '') for d in declarations if d.get('structure')})
+
+        layout = QVBoxLayout(self)
+        kind = "Surowiec Dual Use" if dual_use else "Substancja SML"
+        header = QLabel(f"<b>{kind}:</b> {description or item_id}")
+        header.setWordWrap(True)
+        layout.addWidget(header)
+
+        mat_group = QGroupBox(f"Folie i dostawcy ({len(usages)})")
+        mat_layout = QVBoxLayout(mat_group)
+        mat_layout.addWidget(self._table(
+            ["Folia", "Dostawca"],
+            [(u['material'], u['supplier'] or f"#{u['supplier_index'] + 1}") for u in usages]
+        ))
+        layout.addWidget(mat_group)
+
+        decl_group = QGroupBox(f"Wydane deklaracje ({len(declarations)})")
+        decl_layout = QVBoxLayout(decl_group)
+        if structures:
+            structures_label = QLabel("Struktury: " + ", ".join(structures))
+            structures_label.setWordWrap(True)
+            decl_layout.addWidget(structures_label)
+        decl_layout.addWidget(self._table(
+            ["Data", "Typ", "Klient", "Produkt", "Plik"],
+            [(d.get('ts', '')[:16].replace('T', ' '), f"{d.get('type', '')} {d.get('language', '')}",
+              d.get('client') or '', d.get('product', ''), d.get('output', '')) for d in declarations]
+        ))
+        layout.addWidget(decl_group)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    @staticmethod
+    def _table(headers, rows):
+        table = QTableWidget(len(rows), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                table.setItem(r, c, QTableWidgetItem(str(value)))
+        return table
@@ -6,8 +6,10 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QTextEdit, QMessageBox, QRadioButton, QButtonGroup,
                              QFormLayout, QCheckBox, QFileDialog)
 from datetime import date
-from src.models.declaration import Declaration, Product
+from src.models.declaration import Declaration
 from src.services.pdf_generator import PDFGenerator
+from src.services.declaration_factory import PRODUCT_PREFIXES, build_tech_declaration
+from src.gui.support.coalescing_updater import CoalescingUpdater
 
 class TechDeclarationView(QWidget):
     """Widok do wprowadzania danych i generowania deklaracji"""
@@ -16,12 +18,13 @@ class TechDeclarationView(QWidget):
         super().__init__()
         self.data_loader = data_loader
         self.pdf_generator = PDFGenerator(data_loader)
+        self._render_session = None  # Ostatnio wyrenderowana deklaracja (Podgląd/PDF/DOCX)
 
         # Prefiksy nazw produktów dla języków
-        self.product_prefixes = {
-            'pl': "Folia wielowarstwowa laminat",
-            'en': "Multilayer foil laminate"
-        }
+        self.product_prefixes = PRODUCT_PREFIXES
+
+        # Podgląd struktury liczony raz na serię zmian (język, materiały, przeładowanie listy)
+        self._preview_updater = CoalescingUpdater(self._update_structure_preview, parent=self)
 
         self._init_ui()
         self._load_initial_data()
@@ -75,8 +78,8 @@ class TechDeclarationView(QWidget):
         self.radio_pl.setChecked(True)
 
         # Połącz zmianę języka z aktualizacją nazwy produktu
-        self.radio_pl.toggled.connect(self._update_structure_preview)
-        self.radio_en.toggled.connect(self._update_structure_preview)
+        self.radio_pl.toggled.connect(self._preview_updater.schedule)
+        self.radio_en.toggled.connect(self._preview_updater.schedule)
 
         self.lang_group.addButton(self.radio_pl, 1)
         self.lang_group.addButton(self.radio_en, 2)
@@ -96,17 +99,17 @@ class TechDeclarationView(QWidget):
 
         # Wybór materiału 1
         self.combo_material1 = QComboBox()
-        self.combo_material1.currentTextChanged.connect(self._update_structure_preview)
+        self.combo_material1.currentTextChanged.connect(self._preview_updater.schedule)
         self.product_layout.addRow("Materiał 1 (zewnętrzny):", self.combo_material1)
 
         # Wybór materiału 2
         self.combo_material2 = QComboBox()
-        self.combo_material2.currentTextChanged.connect(self._update_structure_preview)
+        self.combo_material2.currentTextChanged.connect(self._preview_updater.schedule)
         self.product_layout.addRow("Materiał 2 (środkowy):", self.combo_material2)
 
         # Wybór materiału 3 (ukryty domyślnie)
         self.combo_material3 = QComboBox()
-        self.combo_material3.currentTextChanged.connect(self._update_structure_preview)
+        self.combo_material3.currentTextChanged.connect(self._preview_updater.schedule)
         self.material3_label = QLabel("Materiał 3 (wewnętrzny):")
         self.product_layout.addRow(self.material3_label, self.combo_material3)
 
@@ -207,7 +210,7 @@ class TechDeclarationView(QWidget):
                 self.combo_material2.setCurrentText("PE")
                 self.combo_material3.setCurrentText("PE")  # Dodaj
 
-            self._update_structure_preview()
+            self._preview_updater.schedule()
         except Exception as e:
             QMessageBox.warning(self, "Błąd", f"Nie udało się załadować danych: {e}")
 
@@ -254,60 +257,52 @@ class TechDeclarationView(QWidget):
 
     def _validate_input(self) -> bool:
         """Waliduje dane przed generowaniem"""
+        self._preview_updater.flush()  # Nazwa produktu pochodzi z podglądu struktury
         if not self.input_product_name.text().strip():
             QMessageBox.warning(self, "Błąd", "Nazwa produktu nie może być pusta.")
             return False
         return True
 
     def _create_declaration(self) -> Declaration:
-        """Tworzy model danych dokumentu"""
-        declaration = Declaration()
-        declaration.language = 'pl' if self.radio_pl.isChecked() else 'en'
-        declaration.declaration_type = 'tech'
-        declaration.generation_date = date.today()
-
-        declaration.product = Product(
-            name=self.input_product_name.text().strip(),
-            structure=self.label_structure.text()
+        """Tworzy model danych dokumentu (ta sama ścieżka co tryb wiersza poleceń)"""
+        materials = [self.combo_material1.currentText(), self.combo_material2.currentText()]
+        if self.checkbox_trilayer.isChecked():
+            materials.append(self.combo_material3.currentText())
+
+        # Błąd danych struktury przerywa generowanie - deklaracja z pustymi tabelami nie może powstać
+        return build_tech_declaration(
+            self.data_loader, materials,
+            language='pl' if self.radio_pl.isChecked() else 'en',
+            product_name=self.input_product_name.text().strip(),
+            generation_date=date.today()
         )
 
-        try:
-            mat1 = self.combo_material1.currentText()
-            mat2 = self.combo_material2.currentText()
-
-            # Sprawdź czy 3-laminat
-            is_trilayer = self.checkbox_trilayer.isChecked()
-
-            if is_trilayer:
-                mat3 = self.combo_material3.currentText()
-                structure_data = self.data_loader.build_structure_data_trilayer(mat1, mat2, mat3,
-                                                                                language=declaration.language)
-            else:
-                structure_data = self.data_loader.build_structure_data(mat1, mat2, language=declaration.language)
-
-            declaration.substances_table = structure_data.get('substances', [])
-            declaration.dual_use_list = structure_data.get('dual_use', [])
-
-            # DEBUG
-            print(f"DEBUG substances_table: {len(declaration.substances_table)} items")
-            print(f"DEBUG dual_use_list: {len(declaration.dual_use_list)} items")
-            if declaration.substances_table:
-                print(f"DEBUG first substance: {declaration.substances_table[0]}")
-            if declaration.dual_use_list:
-                print(f"DEBUG first dual_use: {declaration.dual_use_list[0]}")
-
-        except Exception as e:
-            print(f"Błąd ładowania danych struktury: {e}")
-            declaration.substances_table = []
-            declaration.dual_use_list = []
+    def _form_state(self) -> tuple:
+        """Odcisk formularza, danych i szablonu - zmiana oznacza konieczność ponownego renderowania"""
+        is_trilayer = self.checkbox_trilayer.isChecked()
+        return (
+            self.pdf_generator.source_stamp('tech', 'pl' if self.radio_pl.isChecked() else 'en'),
+            self.radio_pl.isChecked(),
+            self.combo_material1.currentText(),
+            self.combo_material2.currentText(),
+            self.combo_material3.currentText() if is_trilayer else None,
+            self.label_structure.text(),
+            self.input_product_name.text().strip(),
+            date.today(),
+        )
 
-        return declaration
+    def _get_render_session(self):
+        """Zwraca sesję renderowania - nową tylko jeśli formularz zmienił się od ostatniego użycia"""
+        if self._render_session is None or not self._render_session.matches(self._form_state()):
+            declaration = self._create_declaration()  # Wyjątek - nic nie trafia do cache sesji
+            # Klucz po zbudowaniu: pierwsze wczytanie danych zwiększa DataLoader.generation
+            self._render_session = self.pdf_generator.create_session(declaration, self._form_state())
+        return self._render_session
 
     def _preview_html(self):
         if not self._validate_input(): return
         try:
-            declaration = self._create_declaration()
-            html_path = self.pdf_generator.generate_html(declaration)
+            html_path = self._get_render_session().preview_path()
             import webbrowser
             webbrowser.open(html_path.as_uri())
         except Exception as e:
@@ -319,8 +314,9 @@ class TechDeclarationView(QWidget):
             return
 
         try:
-            declaration = self._create_declaration()
-            pdf_data = self.pdf_generator.generate_pdf_bytes(declaration)
+            session = self._get_render_session()
+            declaration = session.declaration
+            session.pdf_bytes()  # Renderowanie przed wyborem pliku - błąd pojawi się od razu
 
             safe_product_name = "".join(c for c in declaration.product.name if c.isalnum() or c in (' ', '-')).rstrip()
             default_filename = f"Deklaracja_{safe_product_name.replace(' ', '_')}.pdf"
@@ -333,8 +329,7 @@ class TechDeclarationView(QWidget):
             )
 
             if file_path:
-                with open(file_path, 'wb') as f:
-                    f.write(pdf_data)
+                session.write_pdf(file_path)
 
                 QMessageBox.information(
                     self,
@@ -356,7 +351,8 @@ class TechDeclarationView(QWidget):
             return
 
         try:
-            declaration = self._create_declaration()
+            session = self._get_render_session()
+            declaration = session.declaration
 
             # Przygotuj domyślną nazwę pliku
             safe_product_name = "".join(c for c in declaration.product.name if c.isalnum() or c in (' ', '-')).rstrip()
@@ -372,31 +368,7 @@ class TechDeclarationView(QWidget):
 
             # Jeśli użytkownik wybrał ścieżkę
             if file_path:
-                # Wygeneruj DOCX w pamięci
-                html_content = self.pdf_generator.generate_html_content(declaration)
-
-                from bs4 import BeautifulSoup
-                from docx import Document
-                from docx.shared import Inches, Pt
-                from docx.enum.text import WD_ALIGN_PARAGRAPH
-
-                soup = BeautifulSoup(html_content, 'html.parser')
-                doc = Document()
-
-                # Ustaw marginesy
-                for section in doc.sections:
-                    section.top_margin = Inches(0.59)
-                    section.bottom_margin = Inches(0.59)
-                    section.left_margin = Inches(0.59)
-                    section.right_margin = Inches(0.59)
-
-                # Przetwórz HTML
-                body = soup.find('body')
-                if body:
-                    self.pdf_generator._process_html_to_docx(doc, body)
-
-                # Zapisz w wybranej lokalizacji
-                doc.save(file_path)
+                session.write_docx(file_path)
 
                 QMessageBox.information(
                     self,
@@ -425,7 +397,8 @@ class TechDeclarationView(QWidget):
             # Dla 2-laminatu
             self.product_layout.labelForField(self.combo_material2).setText("Materiał 2 (wewnętrzny):")
 
-        self._update_structure_preview()
+        self._preview_updater.schedule()
 
     def refresh_data(self):
+        self._render_session = None
         self._load_initial_data()
\ No newline at end of file
@@ -0,0 +1,307 @@
+# render_server.py
+
+"""
+RenderServer - Lokalna usługa HTTP do renderowania deklaracji (opcjonalna)
+Jeden długo działający proces: pula procesów roboczych z rozgrzanym cache
+(szablony Jinja, pliki JSON, WeasyPrint), kolejka z ograniczeniem (backpressure → 503)
+
+Uruchomienie:
+    python -m src.cli serve --port 8765 --workers 4
+
+Endpointy:
+    GET  /health          - status usługi (JSON)
+    POST /render/tech     - {"structure": "PET/PE", "language": "pl", "product_name": "...", "format": "pdf"}
+    POST /render/bok      - {"structure": "PET/PE", "language": "en", "format": "docx",
+                             "client": {"code", "name", "address", "invoice"},
+                             "batches": [{"product_code", "product_name", "production_date": "YYYY-MM-DD", ...}]}
+                            lub zamiast client/batches: "orders": ["12345", ...] (dane z bazy produkcji)
+    POST /reload          - przeładowuje dane z serwera (nowa pula procesów)
+"""
+import json
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'html': 'text/html; charset=utf-8',
+}
+MAX_BODY_BYTES = 5 * 1024 * 1024
+REQUEST_TIMEOUT_S = 120
+
+# === PROCES ROBOCZY ===
+_worker_generator = None
+_worker_db_service = None
+_worker_docx_engine = 'native'
+
+
+def _init_worker(docx_engine: str):
+    """Rozgrzewa proces roboczy: dane JSON, szablony Jinja, import WeasyPrint"""
+    global _worker_generator, _worker_docx_engine
+    from src.cli import html_backend_for
+    from src.services.data_loader import DataLoader
+    from src.services.pdf_generator import PDFGenerator
+
+    _worker_generator = PDFGenerator(DataLoader(), html_backend=html_backend_for(docx_engine))
+    _worker_docx_engine = docx_engine
+    data_loader = _worker_generator.data_loader
+    try:
+        for language in ('pl', 'en'):
+            data_loader.get_texts(language)
+        data_loader.get_materials_list()
+        for template_name in _worker_generator.env.list_templates(extensions=['html']):
+            _worker_generator.env.get_template(template_name)
+        import weasyprint  # noqa: F401 - sam import trwa kilkaset ms
+    except Exception as e:
+        print(f"⚠️ Rozgrzewanie procesu roboczego nie powiodło się: {e}")
+
+
+def _build_declaration(kind: str, payload: Dict):
+    global _worker_db_service
+    from src.services import declaration_factory as factory
+
+    data_loader = _worker_generator.data_loader
+    language = payload.get('language', 'pl')
+    if language not in ('pl', 'en'):
+        raise ValueError(f"Nieobsługiwany język: {language}")
+
+    if kind == 'tech':
+        materials = factory.match_structure(data_loader, payload.get('structure', ''))
+        return factory.build_tech_declaration(data_loader, materials, language,
+                                              product_name=payload.get('product_name') or None)
+
+    if payload.get('orders'):
+        if _worker_db_service is None:
+            from src.services.database_service import DatabaseService
+            _worker_db_service = DatabaseService()
+        declaration, _ = factory.build_bok_from_orders(
+            data_loader, _worker_db_service, [str(o) for o in payload['orders']], language=language,
+            invoice_number=(payload.get('client') or {}).get('invoice', ''),
+            structure=payload.get('structure') or None
+        )
+        return declaration
+
+    if not payload.get('batches'):
+        raise ValueError("Deklaracja BOK wymaga 'batches' lub 'orders'")
+    materials = factory.match_structure(data_loader, payload.get('structure', ''))
+    return factory.build_bok_declaration(
+        data_loader, materials,
+        client=factory.client_from_dict(payload.get('client') or {}),
+        batches=[factory.batch_from_dict(b) for b in payload['batches']],
+        language=language
+    )
+
+
+def _payload_shape_error(payload: Dict) -> Optional[str]:
+    """Opis błędu typów pól żądania (None - poprawne); null traktowany jak brak pola"""
+    client = payload.get('client')
+    if client is not None and not isinstance(client, dict):
+        return "'client' musi być obiektem JSON"
+    for key in ('batches', 'orders'):
+        value = payload.get(key)
+        if value is not None and not isinstance(value, list):
+            return f"'{key}' musi być listą"
+    if any(not isinstance(batch, dict) for batch in payload.get('batches') or []):
+        return "Elementy 'batches' muszą być obiektami JSON"
+    return None
+
+
+def _render_payload(kind: str, payload: Dict) -> Tuple[int, bytes, str]:
+    """Zadanie procesu roboczego: (status HTTP, treść, content-type)"""
+    output_format = payload.get('format', 'pdf')
+    if output_format not in CONTENT_TYPES:
+        return 400, f"Nieobsługiwany format: {output_format}".encode(), 'text/plain; charset=utf-8'
+    error = _payload_shape_error(payload)
+    if error:
+        return 400, error.encode(), 'text/plain; charset=utf-8'
+
+    try:
+        declaration = _build_declaration(kind, payload)
+    except (ValueError, KeyError, TypeError) as e:
+        return 422, str(e).encode(), 'text/plain; charset=utf-8'
+
+    session = _worker_generator.create_session(declaration)
+    if output_format == 'pdf':
+        body = session.pdf_bytes()
+    elif output_format == 'docx' and _worker_docx_engine == 'native':
+        body = session.docx_bytes()
+    elif output_format == 'docx':
+        body = _worker_generator.docx_bytes_from_html(declaration, session.html)
+    else:
+        body = session.html.encode('utf-8')
+    return 200, body, CONTENT_TYPES[output_format]
+
+
+# === SERWER ===
+
+class RenderService:
+    """Pula procesów renderujących z ograniczoną kolejką i statystykami"""
+
+    def __init__(self, workers: int = 2, queue_size: int = 16, docx_engine: str = 'native'):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.docx_engine = docx_engine
+        self.started_at = time.time()
+
+        # Miejsca = zadania w trakcie + oczekujące; brak wolnego miejsca → 503
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._stats = {'in_flight': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+        self._pool = self._create_pool()
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(self.docx_engine,))
+
+    def _count(self, key: str, delta: int = 1):
+        with self._lock:
+            self._stats[key] += delta
+
+    def render(self, kind: str, payload: Dict) -> Tuple[int, bytes, str]:
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            return 503, "Kolejka renderowania jest pełna - spróbuj ponownie".encode(), 'text/plain; charset=utf-8'
+
+        self._count('in_flight')
+        try:
+            pool, future = self._submit(kind, payload)
+        except Exception as e:
+            self._release_slot()
+            self._count('failed')
+            return 500, f"Błąd renderowania: {e}".encode(), 'text/plain; charset=utf-8'
+        # Miejsce zwalniane dopiero po zakończeniu zadania - także gdy klient dostał już timeout
+        future.add_done_callback(self._release_slot)
+
+        try:
+            status, body, content_type = future.result(timeout=REQUEST_TIMEOUT_S)
+            self._count('completed' if status == 200 else 'failed')
+            return status, body, content_type
+        except FutureTimeoutError:
+            self._count('failed')
+            return 504, "Przekroczono czas renderowania".encode(), 'text/plain; charset=utf-8'
+        except BrokenProcessPool as e:
+            self._replace_pool(broken=pool)
+            self._count('failed')
+            return 500, f"Proces roboczy przerwany - pula utworzona ponownie: {e}".encode(), 'text/plain; charset=utf-8'
+        except Exception as e:
+            self._count('failed')
+            return 500, f"Błąd renderowania: {e}".encode(), 'text/plain; charset=utf-8'
+
+    def _submit(self, kind: str, payload: Dict) -> Tuple[ProcessPoolExecutor, Future]:
+        """Zadanie do puli; pula uszkodzona (np. proces roboczy zabity) jest tworzona ponownie"""
+        pool = self._pool
+        try:
+            return pool, pool.submit(_render_payload, kind, payload)
+        except BrokenProcessPool:
+            pool = self._replace_pool(broken=pool)
+            return pool, pool.submit(_render_payload, kind, payload)
+
+    def _release_slot(self, future: Future = None):
+        self._count('in_flight', -1)
+        self._slots.release()
+
+    def _replace_pool(self, broken: ProcessPoolExecutor = None) -> ProcessPoolExecutor:
+        """Nowa pula w miejsce 'broken' (None - zawsze); równoległe wywołania tworzą tylko jedną"""
+        with self._lock:
+            old_pool = self._pool
+            if broken is None or old_pool is broken:
+                self._pool = self._create_pool()
+            new_pool = self._pool
+        if new_pool is not old_pool:
+            old_pool.shutdown(wait=False)
+        return new_pool
+
+    def reload(self):
+        """Nowa pula procesów - świeże dane z serwera; stara pula kończy bieżące zadania"""
+        self._replace_pool()
+
+    def health(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            'status': 'ok',
+            'workers': self.workers,
+            'queue_capacity': self.queue_size,
+            'uptime_s': round(time.time() - self.started_at, 1),
+            **stats,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """Obsługa żądań HTTP - renderowanie przekazywane do RenderService"""
+
+    service: RenderService = None  # ustawiane w serve()
+
+    def _send(self, status: int, body: bytes, content_type: str, extra_headers: Dict = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, data: Dict):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8')
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, self.service.health())
+        else:
+            self._send_json(404, {'error': 'Nie znaleziono'})
+
+    def do_POST(self):
+        if self.path == '/reload':
+            self.service.reload()
+            self._send_json(200, {'status': 'reloaded'})
+            return
+
+        kind = {'/render/tech': 'tech', '/render/bok': 'bok'}.get(self.path)
+        if kind is None:
+            self._send_json(404, {'error': 'Nie znaleziono'})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0 or length > MAX_BODY_BYTES:
+            self._send_json(413 if length > MAX_BODY_BYTES else 400, {'error': 'Nieprawidłowa długość treści'})
+            return
+
+        try:
+            payload = json.loads(self.rfile.read(length).decode('utf-8'))
+            if not isinstance(payload, dict):
+                raise ValueError("Oczekiwano obiektu JSON")
+        except ValueError as e:
+            self._send_json(400, {'error': f"Błędny JSON: {e}"})
+            return
+
+        status, body, content_type = self.service.render(kind, payload)
+        headers = {'Retry-After': '1'} if status == 503 else None
+        self._send(status, body, content_type, headers)
+
+    def log_message(self, format, *args):
+        print(f"[{self.log_date_time_string()}] {self.address_string()} {format % args}")
+
+
+def serve(host: str = '127.0.0.1', port: int = 8765, workers: int = 2, queue_size: int = 16,
+          docx_engine: str = 'native'):
+    """Uruchamia usługę i blokuje do Ctrl+C"""
+    service = RenderService(workers=workers, queue_size=queue_size, docx_engine=docx_engine)
+    RenderRequestHandler.service = service
+    server = ThreadingHTTPServer((host, port), RenderRequestHandler)
+    server.daemon_threads = True
+
+    print(f"✅ Usługa renderowania: http://{host}:{port} (procesy: {workers}, kolejka: {queue_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
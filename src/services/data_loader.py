@@ -4,15 +4,29 @@
 DataLoader - Singleton do ładowania i cache'owania danych z serwera
 Obsługuje wszystkie pliki JSON z walidacją i obsługą błędów
 Używa NetworkService do dostępu do folderu sieciowego
+Zapis: wersja pliku z chwili odczytu → scalenie z cudzymi zmianami (json_merge) → zapis atomowy
+materials.json może być podzielony na pliki per folia (src/services/material_shards.py) - wczytywane leniwie
+Opcjonalnie dane master w bazie SQLite (src/services/sqlite_store.py, DECLGEN_DATA_DB) zamiast plików JSON
+Cache: LRU z budżetem pamięci (DECLGEN_CACHE_MB); teksty i dokumenty edytowane w miejscu są przypięte
 """
+import copy
+import hashlib
 import json
+import sqlite3
 from pathlib import Path
-from typing import Dict, Optional, Tuple, List
+from typing import Callable, Dict, Optional, Tuple, List
 from src.config.constants import (
     TEXTS_PL, TEXTS_EN, USE_NETWORK
 )
+from src.services.material_shards import MaterialShardStore, open_material_shards
 from src.services.network_service import NetworkService
+from src.services.sqlite_store import SqliteStore, document_kinds, open_store
+from src.utils.atomic_io import atomic_write_bytes, file_lock, file_stamp
+from src.utils.json_merge import MergeConflictError, three_way_merge
 from src.utils.material_macher import MaterialMatcher
+from src.utils.sized_cache import SizedCache, budget_from_env
+from src.utils.timing import span, timed
+from src.utils.where_used_index import WhereUsedIndex
 
 
 class DataLoader:
@@ -28,11 +42,37 @@ class DataLoader:
     def __init__(self):
         if self._initialized:
             return
-        self._cache = {}
+        self._setup(open_store(), use_network=USE_NETWORK, max_bytes=budget_from_env())
+
+        # Układ config/materials/ (manifest + plik na folię) zamiast jednego materials.json
+        self._shards = None if self._store else open_material_shards()
+        self._attach_shards()
+
+    @classmethod
+    def from_documents(cls, documents: Dict[Path, Dict], max_bytes: int = 0) -> 'DataLoader':
+        """
+        Osobna instancja (poza singletonem) z gotowymi dokumentami - bez plików, sieci i bazy.
+        Dla benchmarków i testów; dokumenty są przypięte (nie ma skąd wczytać ich ponownie).
+        """
+        loader = super().__new__(cls)
+        loader._setup(None, use_network=False, max_bytes=max_bytes)
+        for file_path, document in documents.items():
+            loader._cache.put(str(file_path), document)
+        loader.pin(*documents)
+        return loader
+
+    def _setup(self, store: Optional[SqliteStore], use_network: bool, max_bytes: int):
+        self._cache = SizedCache(max_bytes, on_evict=self._on_cache_evict)
+        self._cache.pin([str(TEXTS_PL), str(TEXTS_EN)])  # Potrzebne przy każdej deklaracji
+        self._base: Dict[str, Tuple] = {}  # {ścieżka: (stamp, surowe bajty)} - wersja z chwili odczytu
+        self._where_used: Optional[WhereUsedIndex] = None
+        self._store: Optional[SqliteStore] = store
+        self._shards: Optional[MaterialShardStore] = None
+        self.generation = 0  # Zwiększana przy każdej zmianie danych w cache (klucz sesji renderowania)
         self._initialized = True
 
         # Inicjalizuj NetworkService jeśli używamy serwera
-        if USE_NETWORK:
+        if use_network:
             self.network_service = NetworkService()
             self.network_service.ensure_connection()
         else:
@@ -52,21 +92,47 @@ class DataLoader:
 
         cache_key = str(file_path)
 
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        data = self._cache.get(cache_key)
+        if data is not None:
+            return data
+
+        store_kind = self._store_kind(file_path)
+        if store_kind:
+            with span('data.load_store', kind=store_kind):
+                data = self._store.load(store_kind)
+            self._cache.put(cache_key, data, self._store.snapshot_size(store_kind))
+            self.generation += 1
+            return data
+
+        if self._is_sharded(file_path):
+            with span('data.load_manifest'):
+                data = self._shards.load()
+            self._cache.put(cache_key, data, self._shards.manifest_size)  # + pliki folii (grow)
+            self.generation += 1
+            return data
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self._cache[cache_key] = data
-                return data
+            with span('data.load_json', file=Path(file_path).name):
+                stamp = file_stamp(file_path)
+                with open(file_path, 'rb') as f:
+                    raw = f.read()
+                data = json.loads(raw.decode('utf-8'))
+            self._base[cache_key] = (stamp, raw)
+            self._cache.put(cache_key, data, len(raw))
+            self.generation += 1  # Wczytanie po usunięciu z cache mogło przynieść nową wersję
+            return data
         except FileNotFoundError:
             raise FileNotFoundError(f"Brak pliku: {file_path}")
         except json.JSONDecodeError as e:
             raise ValueError(f"Błąd parsowania JSON w {file_path}: {e}")
 
-    def save_json(self, file_path: Path, data: Dict) -> None:
-        """Zapisuje JSON i aktualizuje cache"""
+    def save_json(self, file_path: Path, data: Dict) -> bool:
+        """
+        Zapisuje JSON i aktualizuje cache.
+        Jeśli plik zmienił się od odczytu, cudze zmiany są scalane z naszymi na poziomie rekordów,
+        a 'data' aktualizowane w miejscu. Zwraca True, gdy scalono zmiany innego użytkownika.
+        Raises: MergeConflictError - ten sam rekord zmieniony po obu stronach (plik bez zmian)
+        """
         # Upewnij się że mamy dostęp do zapisu
         if not self._ensure_network_access():
             raise ConnectionError("Brak dostępu do serwera sieciowego")
@@ -74,20 +140,213 @@ class DataLoader:
         if self.network_service and not self.network_service.check_write_access():
             raise PermissionError("Brak uprawnień do zapisu na serwerze")
 
+        cache_key = str(file_path)
+        store_kind = self._store_kind(file_path)
+        if store_kind:
+            # Zapis wierszy zmienionych rekordów; konflikt tego samego rekordu → MergeConflictError
+            try:
+                with span('data.save_store', kind=store_kind):
+                    merged, names = self._store.save(store_kind, data, Path(file_path).name)
+            except sqlite3.Error as e:
+                raise IOError(f"Błąd zapisu do bazy {self._store.db_path}: {e}")
+            self._cache.put(cache_key, data, self._store.snapshot_size(store_kind))
+            self.generation += 1
+            self._sync_where_used(file_path, data, names)
+            return merged
+
+        if self._is_sharded(file_path):
+            # Tylko zmienione pliki folii (+ manifest przy dodaniu / usunięciu folii)
+            try:
+                with span('data.save_shards'):
+                    merged, names = self._shards.save(data, Path(file_path).name)
+            except (MergeConflictError, TimeoutError):
+                raise
+            except Exception as e:
+                raise IOError(f"Błąd zapisu do {self._shards.directory}: {e}")
+            self._cache.put(cache_key, data, self._shards.manifest_size + self._shards.loaded_size)
+            self.generation += 1
+            self._sync_where_used(file_path, data, names)
+            return merged
+
+        base_stamp, base_raw = self._base.get(cache_key, (None, None))
+        merged = False
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            self._cache[str(file_path)] = data
+            with span('data.save_json', file=Path(file_path).name):
+                content = self._dump(data)
+                # Blokada tylko na czas porównania wersji i podmiany pliku
+                with file_lock(file_path):
+                    disk_stamp = file_stamp(file_path)
+                    if base_raw is not None and disk_stamp is not None and disk_stamp != base_stamp:
+                        with open(file_path, 'rb') as f:
+                            disk_raw = f.read()
+                        if hashlib.sha1(disk_raw).digest() != hashlib.sha1(base_raw).digest():
+                            result, conflicts = three_way_merge(json.loads(base_raw.decode('utf-8')), data,
+                                                                json.loads(disk_raw.decode('utf-8')))
+                            if conflicts:
+                                raise MergeConflictError(Path(file_path).name, conflicts)
+                            content = self._dump(result)
+                            merged = True
+                    atomic_write_bytes(file_path, content)
+                    self._base[cache_key] = (file_stamp(file_path), content)
+        except (MergeConflictError, TimeoutError):
+            raise
         except Exception as e:
             raise IOError(f"Błąd zapisu do {file_path}: {e}")
 
+        if merged:
+            # Edytory trzymają referencję do 'data' - podmień zawartość w miejscu
+            data.clear()
+            data.update(result)
+            print(f"ℹ️ {Path(file_path).name}: scalono zmiany innego użytkownika")
+        self._cache.put(cache_key, data, len(content))
+        self.generation += 1
+        self._sync_where_used(file_path, data, self._changed_materials(file_path, base_raw, data))
+        return merged
+
+    def update_records(self, file_path: Path, changes: Dict[str, Callable], section: Optional[str] = None) -> Dict:
+        """
+        Zapisuje tylko wskazane rekordy: {klucz: funkcja(aktualna wartość z dysku / bazy) → nowa wartość
+        lub None - usunięcie}; 'section' - słownik rekordów w dokumencie (np. 'materials').
+        Inne niezapisane zmiany w dokumencie z cache zostają niezapisane; wynik trafia do niego w miejscu.
+        Zwraca {klucz: zapisana wartość}.
+        """
+        if not self._ensure_network_access():
+            raise ConnectionError("Brak dostępu do serwera sieciowego")
+        if self.network_service and not self.network_service.check_write_access():
+            raise PermissionError("Brak uprawnień do zapisu na serwerze")
+
+        cache_key = str(file_path)
+        live = self._cache.get(cache_key)
+        store_kind = self._store_kind(file_path)
+        if store_kind:
+            record_key = (lambda key: (section, key)) if section else (lambda key: key)
+            try:
+                written = self._store.update_records(store_kind, {record_key(k): f for k, f in changes.items()})
+            except sqlite3.Error as e:
+                raise IOError(f"Błąd zapisu do bazy {self._store.db_path}: {e}")
+            values = {key: written[record_key(key)] for key in changes}
+        elif self._is_sharded(file_path) and section == 'materials':
+            try:
+                values = self._shards.update_records(changes, live)
+            except (MergeConflictError, TimeoutError):
+                raise
+            except Exception as e:
+                raise IOError(f"Błąd zapisu do {self._shards.directory}: {e}")
+            live = None  # Dokument w cache zaktualizowany przez magazyn folii
+        else:
+            values = self._update_json_records(file_path, changes, section)
+
+        if live is not None:
+            container = live.setdefault(section, {}) if section else live
+            for key, value in values.items():
+                if value is None:
+                    container.pop(key, None)
+                else:
+                    container[key] = copy.deepcopy(value)
+        self.generation += 1
+        document = self._cache.get(cache_key)
+        if document is not None:
+            self._sync_where_used(file_path, document, set(values))
+        elif section == 'materials':
+            self._where_used = None  # Brak dokumentu w cache - indeks zbudowany ponownie przy użyciu
+        return values
+
+    def _update_json_records(self, file_path: Path, changes: Dict[str, Callable], section: Optional[str]) -> Dict:
+        """Rekordy zmieniane na aktualnej wersji pliku z dysku (pod blokadą) - bez dokumentu z cache"""
+        cache_key = str(file_path)
+        try:
+            with file_lock(file_path):
+                disk_stamp = file_stamp(file_path)
+                with open(file_path, 'rb') as f:
+                    disk_raw = f.read()
+                document = json.loads(disk_raw.decode('utf-8'))
+                container = document.setdefault(section, {}) if section else document
+                values = {key: change(container.get(key)) for key, change in changes.items()}
+                for key, value in values.items():
+                    if value is None:
+                        container.pop(key, None)
+                    else:
+                        container[key] = value
+                content = self._dump(document)
+                atomic_write_bytes(file_path, content)
+
+                # Wersja bazowa dokumentu z cache: te same rekordy już zapisane
+                base = self._base.get(cache_key)
+                if base is not None:
+                    if base[0] == disk_stamp:
+                        self._base[cache_key] = (file_stamp(file_path), content)
+                    else:
+                        # Plik zmieniony także przez innych - ich zmiany scali następny save_json
+                        base_doc = json.loads(base[1].decode('utf-8'))
+                        base_container = base_doc.setdefault(section, {}) if section else base_doc
+                        for key, value in values.items():
+                            if value is None:
+                                base_container.pop(key, None)
+                            else:
+                                base_container[key] = value
+                        self._base[cache_key] = (base[0], self._dump(base_doc))
+        except (MergeConflictError, TimeoutError):
+            raise
+        except Exception as e:
+            raise IOError(f"Błąd zapisu do {file_path}: {e}")
+        return values
+
+    @staticmethod
+    def _dump(data: Dict) -> bytes:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
     def reload(self, file_path: Path) -> Dict:
         """Wymusza przeładowanie pliku (usuwa z cache)"""
         cache_key = str(file_path)
-        if cache_key in self._cache:
-            del self._cache[cache_key]
+        self._cache.pop(cache_key, None)
+        self._base.pop(cache_key, None)
+        from src.config.constants import MATERIALS_DB
+        if str(file_path) == str(MATERIALS_DB):
+            self._where_used = None  # Cudze zmiany nieznane - indeks zbudowany ponownie przy pierwszym użyciu
         return self.load_json(file_path)
 
+    def pin(self, *file_paths: Path):
+        """
+        Przypina pliki w cache (nie są usuwane przy przekroczeniu budżetu).
+        Widok, który trzyma dokument i edytuje go w miejscu, musi go przypiąć - inaczej po usunięciu
+        z cache load_json zwróciłby nową kopię, a zapis trzymanej kopii ominąłby kontrolę wersji.
+        """
+        self._cache.pin(str(path) for path in file_paths)
+
+    def get_cache_stats(self) -> Dict:
+        """Trafienia / chybienia / usunięcia i zajętość cache"""
+        return self._cache.stats()
+
+    def format_cache_stats(self) -> str:
+        return self._cache.format_stats()
+
+    def _on_cache_evict(self, cache_key: str):
+        """Usunięty z cache dokument - zwolnij też jego wersję bazową (bajty pliku / migawki rekordów)"""
+        self._base.pop(cache_key, None)
+        kind = document_kinds().get(cache_key) if self._store is not None else None
+        if kind:
+            self._store.forget(kind)
+        elif self._is_sharded(cache_key):
+            self._shards.forget()
+
+    def _attach_shards(self):
+        """Leniwie doczytane pliki folii doliczane do rozmiaru wpisu materials.json w cache"""
+        if self._shards is not None:
+            from src.config.constants import MATERIALS_DB
+            self._shards.on_shard_loaded = lambda size: self._cache.grow(str(MATERIALS_DB), size)
+
+    def _store_kind(self, file_path: Path) -> Optional[str]:
+        """Rodzaj dokumentu w bazie SQLite lub None (plik JSON / brak bazy)"""
+        if self._store is None:
+            return None
+        return document_kinds().get(str(file_path))
+
+    def _is_sharded(self, file_path: Path) -> bool:
+        if self._shards is None:
+            return False
+        from src.config.constants import MATERIALS_DB
+        return str(file_path) == str(MATERIALS_DB)
+
     def get_texts(self, language: str = 'pl') -> Dict:
         """Pobiera teksty dla języka"""
         file_path = TEXTS_PL if language == 'pl' else TEXTS_EN
@@ -96,6 +355,34 @@ class DataLoader:
     def clear_cache(self):
         """Czyści cały cache - wymusza przeładowanie wszystkich plików"""
         self._cache.clear()
+        self._base.clear()
+        self._where_used = None
+        self.generation += 1
+        if self._store is None:
+            self._shards = open_material_shards()  # Folder mógł zostać utworzony w międzyczasie
+            self._attach_shards()
+
+    def get_where_used(self) -> WhereUsedIndex:
+        """Indeks odwrotny substancja → (materiał, dostawca); budowany przy pierwszym użyciu"""
+        if self._where_used is None:
+            from src.config.constants import MATERIALS_DB
+            self._where_used = WhereUsedIndex(self.load_json(MATERIALS_DB))
+        return self._where_used
+
+    def _sync_where_used(self, file_path: Path, data: Dict, names: Optional[set] = None):
+        """Po zapisie materials.json aktualizuje w indeksie tylko zapisane folie (names=None - wszystkie)"""
+        from src.config.constants import MATERIALS_DB
+        if self._where_used is not None and str(file_path) == str(MATERIALS_DB):
+            self._where_used.update(data, names)
+
+    def _changed_materials(self, file_path: Path, base_raw: Optional[bytes], data: Dict) -> Optional[set]:
+        """Folie różne od wersji bazowej pliku JSON (None - brak indeksu lub wersji bazowej)"""
+        from src.config.constants import MATERIALS_DB
+        if self._where_used is None or base_raw is None or str(file_path) != str(MATERIALS_DB):
+            return None
+        base = json.loads(base_raw.decode('utf-8')).get('materials', {})
+        materials = data.get('materials', {})
+        return {name for name in set(base) | set(materials) if base.get(name) != materials.get(name)}
 
     # Dodaj na końcu klasy DataLoader, przed get_network_status():
 
@@ -119,6 +406,7 @@ class DataLoader:
 
         return material_entries[supplier_index]
 
+    @timed('data.build_structure_data')
     def build_structure_data(self, mat1: str, mat2: str, language: str = 'pl') -> Dict:
         """
         Buduje dane struktury z dwóch materiałów (WSZYSCY dostawcy).
@@ -130,6 +418,9 @@ class DataLoader:
             'dual_use': [...]     # lista stringów "Nazwa (E-symbol)"
         }
         """
+        if self._store is not None:
+            return self._store.structure_data([mat1, mat2], language)
+
         from src.config.constants import MATERIALS_DB, SUBSTANCES_MASTER, DUAL_USE_MASTER
 
         materials_db = self.load_json(MATERIALS_DB)
@@ -211,8 +502,12 @@ class DataLoader:
             return self.network_service.get_status()
         return None
 
+    @timed('data.build_structure_data_trilayer')
     def build_structure_data_trilayer(self, mat1: str, mat2: str, mat3: str,language: str = 'pl') -> Dict:
         """Jak build_structure_data ale dla 3 materiałów"""
+        if self._store is not None:
+            return self._store.structure_data([mat1, mat2, mat3], language)
+
         from src.config.constants import MATERIALS_DB, SUBSTANCES_MASTER, DUAL_USE_MASTER
 
         materials_db = self.load_json(MATERIALS_DB)
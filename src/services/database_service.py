@@ -3,23 +3,36 @@
 """
 DatabaseService - Serwis do komunikacji z bazą danych produkcji
 Pobiera dane kontrahentów i zleceń
+SQLAlchemy importowany jest dopiero przy pierwszym zapytaniu
 """
-from sqlalchemy import text
-from src.dataBase.connection import getEngine
 from src.config.databasaConst import TABLE_NAMES, ZO_COLUMNS, CLIENT_COLUMNS
+from src.utils.timing import span
 from typing import Optional, Dict
 
 
 class DatabaseService:
     """Serwis do pobierania danych z bazy produkcji"""
 
-    def __init__(self):
-        self.engine = getEngine()
+    def __init__(self, engine=None):
+        """
+        Args:
+            engine: Gotowy engine SQLAlchemy (np. SQLite w benchmarkach); domyślnie MSSQL z DB_CONFIG
+        """
+        self._engine = engine
+
+    @property
+    def engine(self):
+        """Engine tworzony przy pierwszym użyciu"""
+        if self._engine is None:
+            from src.dataBase.connection import getEngine
+            self._engine = getEngine()
+        return self._engine
 
     def testConnection(self):
         """Testuje połączenie z bazą danych, wykonując proste zapytanie."""
-        engine = self.engine
         try:
+            from sqlalchemy import text
+            engine = self.engine
             with engine.connect() as conn:
                 result = conn.execute(text("SELECT 1"))
                 print("✅ Połączono z bazą danych! Wynik testu:", result.scalar())
@@ -30,6 +43,8 @@ class DatabaseService:
             return False
 
     def get_order_data(self, order_number: str) -> Optional[Dict]:
+        from sqlalchemy import text
+
         try:
             query = text(f"""
                 SELECT 
@@ -53,7 +68,7 @@ class DatabaseService:
                 WHERE zo.{ZO_COLUMNS['order_number']} = :order_number
             """)
 
-            with self.engine.connect() as conn:
+            with span('db.get_order_data', order=order_number), self.engine.connect() as conn:
                 result = conn.execute(query, {"order_number": order_number}).fetchone()
 
                 if result:
@@ -87,6 +102,8 @@ class DatabaseService:
 
     def getAllClients(self) -> Dict[str, Dict]:
         """Pobiera listę wszystkich kontrahentów do wyszukiwarki"""
+        from sqlalchemy import text
+
         try:
             query = text(f"""
                 SELECT 
@@ -100,13 +117,14 @@ class DatabaseService:
             """)
 
             clients = {}
-            with self.engine.connect() as conn:
+            with span('db.get_all_clients') as timer, self.engine.connect() as conn:
                 result = conn.execute(query)
                 for row in result:
                     clients[str(row.id)] = {
                         'client_name': row.name,
                         'client_address': f"{row.street}, {row.zip} {row.city}"
                     }
+                timer.set(rows=len(clients))
             return clients
         except Exception as e:
             print(f"Błąd pobierania listy kontrahentów: {e}")
@@ -0,0 +1,182 @@
+# services/declaration_factory.py
+
+"""
+DeclarationFactory - Budowanie obiektów Declaration bez GUI
+Jedyna ścieżka budowania deklaracji - wywoływana przez widoki (TechDeclarationView / BOKDeclarationView),
+tryb wiersza poleceń i inne narzędzia bez PyQt5
+"""
+import datetime
+from typing import Dict, List, Optional, Tuple
+
+from src.models.declaration import Declaration, Product, ClientData, ProductBatch
+
+# Prefiksy nazw produktów dla języków (deklaracja technologiczna)
+PRODUCT_PREFIXES = {
+    'pl': "Folia wielowarstwowa laminat",
+    'en': "Multilayer foil laminate"
+}
+
+
+def match_structure(data_loader, structure: str) -> List[str]:
+    """
+    Dopasowuje strukturę (np. 'PET/PE' lub 'pe-evoh / bopp') do materiałów z materials.json.
+    Rzuca ValueError jeśli któraś warstwa nie istnieje lub liczba warstw jest inna niż 2-3.
+    """
+    materials, all_found = data_loader.parse_and_match_structure(structure)
+    if not all_found:
+        available = data_loader.get_materials_list()
+        missing = [m for m in materials if m not in available]
+        raise ValueError(f"Nie znaleziono materiałów: {', '.join(missing)} (struktura: {structure})")
+    if len(materials) not in (2, 3):
+        raise ValueError(f"Struktura musi mieć 2 lub 3 warstwy: {structure}")
+    return materials
+
+
+def build_structure_tables(data_loader, materials: List[str], language: str) -> Dict:
+    """Dane tabel SML / Dual Use dla 2- lub 3-warstwowej struktury"""
+    if len(materials) == 3:
+        return data_loader.build_structure_data_trilayer(*materials, language=language)
+    return data_loader.build_structure_data(materials[0], materials[1], language=language)
+
+
+def build_tech_declaration(data_loader, materials: List[str], language: str = 'pl',
+                           product_name: Optional[str] = None,
+                           generation_date: Optional[datetime.date] = None) -> Declaration:
+    """Deklaracja technologiczna - nazwa produktu domyślnie '<prefiks> <struktura>'"""
+    structure = "/".join(materials)
+    if not product_name:
+        prefix = PRODUCT_PREFIXES.get(language, PRODUCT_PREFIXES['pl'])
+        product_name = f"{prefix} {structure}"
+
+    declaration = Declaration()
+    declaration.language = language
+    declaration.declaration_type = 'tech'
+    declaration.generation_date = generation_date or datetime.date.today()
+    declaration.product = Product(name=product_name, structure=structure)
+
+    structure_data = build_structure_tables(data_loader, materials, language)
+    declaration.substances_table = structure_data.get('substances', [])
+    declaration.dual_use_list = structure_data.get('dual_use', [])
+    return declaration
+
+
+def build_bok_declaration(data_loader, materials: List[str], client: ClientData,
+                          batches: List[ProductBatch], language: str = 'pl',
+                          generation_date: Optional[datetime.date] = None) -> Declaration:
+    """Deklaracja BOK - nazwa produktu to struktura (jak w BOKDeclarationView)"""
+    structure = "/".join(materials)
+
+    declaration = Declaration()
+    declaration.language = language
+    declaration.declaration_type = 'bok'
+    declaration.generation_date = generation_date or datetime.date.today()
+    declaration.client = client
+    declaration.product = Product(name=structure, structure=structure)
+    declaration.batches = list(batches)
+
+    structure_data = build_structure_tables(data_loader, materials, language)
+    declaration.substances_table = structure_data.get('substances', [])
+    declaration.dual_use_list = structure_data.get('dual_use', [])
+    return declaration
+
+
+def _clean_thickness(value) -> str:
+    """Usuwa '0', 'None' i puste wartości grubości z bazy"""
+    value = str(value if value is not None else '').strip()
+    return "" if value in ["0", "None", ""] else value
+
+
+def batch_from_order(order_data: Dict, quantity: str = "") -> ProductBatch:
+    """Buduje partię wyrobu z danych zlecenia (DatabaseService.get_order_data)"""
+    order_number = order_data.get('order_number', '')
+    return ProductBatch(
+        product_code=str(order_data.get('article_index', '')),
+        product_name=order_data.get('article_description', ''),
+        production_date=order_data.get('production_date'),
+        quantity=quantity,
+        batch_number=f"{order_number}/{str(datetime.datetime.now().year)[2:]}/ZK",
+        thickness1=_clean_thickness(order_data.get('thickness1')),
+        thickness2=_clean_thickness(order_data.get('thickness2')),
+        thickness3=_clean_thickness(order_data.get('thickness3')),
+        show_quantity=bool(quantity),
+    )
+
+
+def client_from_order(order_data: Dict, invoice_number: str = "") -> ClientData:
+    """Dane kontrahenta z danych zlecenia"""
+    return ClientData(
+        client_code=str(order_data.get('client_number', '')),
+        client_name=order_data.get('client_name', ''),
+        client_address=" ".join((order_data.get('client_address') or "").split()),
+        invoice_number=invoice_number
+    )
+
+
+def build_bok_from_orders(data_loader, db_service, order_numbers: List[str], language: str = 'pl',
+                          invoice_number: str = "",
+                          structure: Optional[str] = None) -> Tuple[Declaration, List[str]]:
+    """
+    Deklaracja BOK z listy numerów zleceń.
+    Klient i struktura pochodzą z pierwszego zlecenia (struktura może być nadpisana).
+
+    Returns:
+        (declaration, warnings) - ostrzeżenia o zleceniach z inną strukturą
+    """
+    from src.utils.material_macher import MaterialMatcher
+
+    orders = []
+    for order_number in order_numbers:
+        data = db_service.get_order_data(order_number)
+        if not data:
+            raise ValueError(f"Nie znaleziono zlecenia: {order_number}")
+        orders.append(data)
+
+    if not orders:
+        raise ValueError("Brak zleceń")
+
+    first = orders[0]
+    structure = structure or first.get('product_structure', '').strip()
+    materials = match_structure(data_loader, structure)
+
+    warnings = []
+    structure_norm = MaterialMatcher.normalize("/".join(materials))
+    for data in orders[1:]:
+        db_struct = data.get('product_structure', '').strip()
+        if db_struct and MaterialMatcher.normalize(db_struct) != structure_norm:
+            warnings.append(f"Zlecenie {data.get('order_number')}: struktura {db_struct} "
+                            f"różni się od {'/'.join(materials)}")
+
+    declaration = build_bok_declaration(
+        data_loader, materials,
+        client=client_from_order(first, invoice_number),
+        batches=[batch_from_order(data) for data in orders],
+        language=language
+    )
+    return declaration, warnings
+
+
+def client_from_dict(data: Dict) -> ClientData:
+    """Dane kontrahenta z ładunku JSON: {code, name, address, invoice}"""
+    return ClientData(
+        client_code=str(data.get('code', '')),
+        client_name=data.get('name', ''),
+        client_address=data.get('address', ''),
+        invoice_number=data.get('invoice', '')
+    )
+
+
+def batch_from_dict(data: Dict) -> ProductBatch:
+    """Partia wyrobu z ładunku JSON - pola jak w ProductBatch, data produkcji jako 'YYYY-MM-DD'"""
+    production_date = data.get('production_date')
+    if isinstance(production_date, str) and production_date:
+        production_date = datetime.date.fromisoformat(production_date)
+
+    batch = ProductBatch(production_date=production_date or None)
+    for field_name in ('product_code', 'product_name', 'quantity', 'batch_number', 'expiry_date',
+                       'thickness1', 'thickness2', 'thickness3'):
+        if field_name in data:
+            setattr(batch, field_name, str(data[field_name] or ''))
+    for flag in ('show_name', 'show_batch', 'show_quantity', 'show_production_date', 'show_thickness'):
+        if flag in data:
+            setattr(batch, flag, bool(data[flag]))
+    return batch
@@ -0,0 +1,96 @@
+# services/declaration_history.py
+
+"""
+DeclarationHistory - Dziennik wygenerowanych deklaracji (JSON-lines, output/logs/declarations.jsonl)
+Każdy zapisany plik PDF / DOCX dopisuje wiersz z typem, językiem, klientem, partiami i materiałami struktury.
+Pozwala wskazać wydane deklaracje, których dotyczy zmiana substancji (WhereUsedIndex),
+i odtworzyć je z aktualnych danych (src/services/regeneration.py).
+"""
+import dataclasses
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from src.models.declaration import Declaration
+from src.utils.atomic_io import file_lock
+
+LOG_FILE_NAME = 'declarations.jsonl'
+
+
+def history_path() -> Path:
+    """Ścieżka dziennika (DECLGEN_HISTORY_LOG nadpisuje domyślną)"""
+    override = os.environ.get('DECLGEN_HISTORY_LOG')
+    if override:
+        return Path(override)
+    from src.config.constants import OUTPUT_PATH
+    return OUTPUT_PATH / 'logs' / LOG_FILE_NAME
+
+
+def structure_materials(structure: str) -> List[str]:
+    """'PET/ALU/PE' → ['PET', 'ALU', 'PE']"""
+    return [part.strip() for part in (structure or '').split('/') if part.strip()]
+
+
+def _batch_dict(batch) -> Dict:
+    """Partia w postaci zgodnej z declaration_factory.batch_from_dict"""
+    data = dataclasses.asdict(batch)
+    if data.get('production_date'):
+        data['production_date'] = data['production_date'].isoformat()[:10]  # date lub datetime z bazy
+    return data
+
+
+def record(declaration: Declaration, output_path, fmt: str, path: Optional[Path] = None):
+    """Dopisuje wpis o wygenerowanym pliku; błąd zapisu dziennika nie przerywa generowania"""
+    client = declaration.client
+    entry = {
+        'ts': datetime.now().isoformat(timespec='seconds'),
+        'type': declaration.declaration_type,
+        'language': declaration.language,
+        'format': fmt,
+        'product': declaration.product.name,
+        'structure': declaration.product.structure,
+        'materials': structure_materials(declaration.product.structure),
+        'client': client.client_name if client else None,
+        # Dane klienta w postaci declaration_factory.client_from_dict
+        'client_data': {
+            'code': client.client_code, 'name': client.client_name,
+            'address': client.client_address, 'invoice': client.invoice_number,
+        } if client else None,
+        'batches': [_batch_dict(batch) for batch in declaration.batches],
+        'output': str(output_path),
+        'user': os.environ.get('USERNAME') or os.environ.get('USER'),
+    }
+    path = path or history_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Blokada: dopiski z kilku stanowisk na udziale sieciowym nie przeplatają się
+        with file_lock(path), open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    except OSError as e:  # także TimeoutError blokady
+        print(f"⚠️ Nie udało się zapisać historii deklaracji: {e}")
+
+
+def read_history(path: Optional[Path] = None) -> List[Dict]:
+    """Wszystkie wpisy dziennika (od najstarszego); uszkodzone wiersze są pomijane"""
+    path = path or history_path()
+    if not path.exists():
+        return []
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return entries
+
+
+def affected_declarations(materials: Iterable[str], path: Optional[Path] = None) -> List[Dict]:
+    """Wydane deklaracje, których struktura zawiera którykolwiek z materiałów (od najnowszej)"""
+    materials = set(materials)
+    if not materials:
+        return []
+    return [entry for entry in reversed(read_history(path))
+            if materials.intersection(entry.get('materials', []))]
@@ -0,0 +1,160 @@
+# services/document_labels.py
+
+"""
+DocumentLabels - Stałe teksty deklaracji wspólne dla szablonów HTML i DocxBuilder
+Wartości domyślne poniżej; sekcja 'docx_labels' w pliku tekstów (texts_pl.json / texts_en.json)
+nadpisuje je klucz po kluczu - zmiana np. podpisu w JSON trafia do HTML/PDF i do DOCX.
+"""
+from typing import Dict, Optional
+
+# === STAŁE TEKSTY DOKUMENTU (wartości domyślne) ===
+LABELS = {
+    'pl': {
+        'title': "DEKLARACJA ZGODNOŚCI",
+        'product': "1. Nazwa produktu:",
+        'producer': "2. Producent:",
+        'phone': "tel.",
+        'fax': "fax",
+        'compliance_intro': ("3. Firma {producer} oświadcza, iż wyprodukowany zgodnie z dobrą praktyką "
+                             "higieniczną i produkcyjną produkt spełnia następujące wymagania wyrobów "
+                             "przeznaczonych do kontaktu z żywnością:"),
+        'eu_law': "a) USTAWODAWSTWO UNII EUROPEJSKIEJ",
+        'pl_law': "b) USTAWODAWSTWO POLSKI",
+        'sml_intro': ("6. Zgodnie z danymi naszych dostawców produkt zawiera substancje podlegające "
+                      "ograniczeniom migracji specyficznej SML:"),
+        'sml_headers': ["Nr ref.", "Nr CAS", "Nazwa substancji", "Limit migracji SML [mg/kg]"],
+        # {term} - wyróżniony (pogrubiony) termin 'dual_use_term'
+        'dual_use_intro': ("8. Zgodnie z Rozporządzeniem (UE) nr 10/2011 oraz deklaracjami naszych dostawców "
+                           "produkt może zawierać następujące substancje podwójnego zastosowania „{term}\":"),
+        'dual_use_term': "dual use",
+        'requirements_headers': ["Wymagania zasadnicze", "Wymagania szczegółowe", "Podstawa oceny", "Ocena"],
+        'food_contact_items': [
+            "kontakt z żywnością obejmuje każdy czas przechowywania temperaturze pokojowej oraz w warunkach "
+            "chłodzenia i mrożenia, włączając podgrzewanie do 70 °C nie dłużej niż przez 2 godz. lub "
+            "podgrzewanie do 100 °C nie dłużej niż przez 15 min;",
+            "do oceny przyjęto umowny stosunek powierzchni do objętości wynoszący 6 dm² na 1 kg żywności.",
+        ],
+        'client': "KLIENT:",
+        'invoice': "Nr faktury:",
+        'batches_title': "WYRÓB:",
+        'common_structure': "Struktura:",
+        'batch_headers': {
+            'index': "Indeks",
+            'description': "Opis",
+            'batch_no': "Nr partii",
+            'qty': "Ilość",
+            'thickness': "Grubości",
+            'prod_date': "Data produkcji",
+        },
+        'place_date': "Ignatki, dn. {date}",
+        'signature_role': "Dyrektor ds. Rozwoju i Jakości",
+        'signature_name': "Bogusław Sztuk",
+    },
+    'en': {
+        'title': "DECLARATION OF COMPLIANCE",
+        'product': "1. Product name:",
+        'producer': "2. Manufacturer:",
+        'phone': "tel.",
+        'fax': "fax",
+        'compliance_intro': ("3. {producer} declares that the product, manufactured in accordance with good "
+                             "hygienic and manufacturing practice, meets the following requirements for "
+                             "materials intended to come into contact with food:"),
+        'eu_law': "a) EUROPEAN UNION LEGISLATION",
+        'pl_law': "b) POLISH LEGISLATION",
+        'sml_intro': ("6. According to the data of our suppliers the product contains substances subject "
+                      "to specific migration limits (SML):"),
+        'sml_headers': ["Ref. No.", "CAS No.", "Substance name", "SML limit [mg/kg]"],
+        'dual_use_intro': ("8. In accordance with Regulation (EU) No 10/2011 and the declarations of our "
+                           "suppliers the product may contain the following “{term}” substances:"),
+        'dual_use_term': "dual use",
+        'requirements_headers': ["Essential requirements", "Detailed requirements", "Basis of assessment",
+                                 "Assessment"],
+        'food_contact_items': [
+            "food contact covers any storage time at room temperature and under chilled and frozen "
+            "conditions, including heating up to 70 °C for no longer than 2 hours or heating up to "
+            "100 °C for no longer than 15 min;",
+            "the assessment assumes a conventional surface-to-volume ratio of 6 dm² per 1 kg of food.",
+        ],
+        'client': "CLIENT:",
+        'invoice': "Invoice No:",
+        'batches_title': "PRODUCT:",
+        'common_structure': "Structure:",
+        'batch_headers': {
+            'index': "Product code",
+            'description': "Description",
+            'batch_no': "Batch number",
+            'qty': "Quantity",
+            'thickness': "Thickness",
+            'prod_date': "Production date",
+        },
+        'place_date': "Ignatki, {date}",
+        'signature_role': "Director of Development and Quality",
+        'signature_name': "Bogusław Sztuk",
+    },
+}
+
+# Tabela wymagań zasadniczych (pkt 13) - (tekst, rowspan) dla każdej komórki wiersza
+ESSENTIAL_REQUIREMENTS = {
+    'pl': [
+        [("1. Wymogi związane z produkcją i składem opakowań -- zapobieganie przez redukcję u źródła.", 3),
+         ("Zapewnienie w systemie pakowań minimalnej odpowiedniej ilości materiału. (EN13428)", 1),
+         ("-", 1), ("Nie dotyczy", 1)],
+        [("Zminimalizowanie obecności substancji i materiałów szkodliwych i niebezpiecznych w opakowaniach. "
+          "(CR 13695-1)", 1),
+         ("Ograniczenie zawartości metali ciężkich (ołów, kadm, rtęć, chrom).\n\nWyniki przeprowadzonych badań."
+          "\n\nDeklaracje dostawców materiałów bazowych.", 1),
+         ("Wymaganie spełnione", 1)],
+        [("Ograniczenie zawartości substancji niebezpiecznych dla środowiska.", 1),
+         ("Deklaracje dostawców materiałów bazowych.", 1), ("Wymaganie spełnione", 1)],
+        [("2. Wymogi związane z przydatnością opakowań do wielokrotnego użytku.", 1),
+         ("Zapewnienie przydatności do wielokrotnego użycia. (EN13429)", 1), ("-", 1), ("Nie dotyczy", 1)],
+        [("3. Wymogi związane z przydatnością opakowań nadających się do odzysku.", 4),
+         ("Zapewnienie jednostce funkcjonalnej -- opakowaniu przydatności do recyklingu. (EN13430)", 1),
+         ("-", 1), ("Nie dotyczy", 1)],
+        [("Zapewnienie uzysku cieplnego dla jednostki funkcjonalnej -- opakowania. (EN13431)", 1),
+         ("PN-EN 13431:2007\n\nDeklaracje dostawców materiałów bazowych.", 1), ("Zgodne", 1)],
+        [("Zapewnienie jednostce funkcjonalnej -- opakowaniu możliwości kompostowania. (EN13432)", 1),
+         ("-", 1), ("Nie dotyczy", 1)],
+        [("Zapewnienie jednostce funkcjonalnej --opakowaniu -- możliwości biodegradacji. (EN13432)", 1),
+         ("-", 1), ("Nie dotyczy", 1)],
+    ],
+    'en': [
+        [("1. Requirements specific to the manufacturing and composition of packaging -- prevention by "
+          "source reduction.", 3),
+         ("Ensuring the minimum adequate amount of material in the packaging system. (EN13428)", 1),
+         ("-", 1), ("Not applicable", 1)],
+        [("Minimising the presence of noxious and other hazardous substances and materials in packaging. "
+          "(CR 13695-1)", 1),
+         ("Limitation of heavy metal content (lead, cadmium, mercury, chromium).\n\nResults of the tests "
+          "performed.\n\nDeclarations of base material suppliers.", 1),
+         ("Requirement met", 1)],
+        [("Limitation of substances hazardous to the environment.", 1),
+         ("Declarations of base material suppliers.", 1), ("Requirement met", 1)],
+        [("2. Requirements specific to the reusable nature of packaging.", 1),
+         ("Ensuring suitability for reuse. (EN13429)", 1), ("-", 1), ("Not applicable", 1)],
+        [("3. Requirements specific to the recoverable nature of packaging.", 4),
+         ("Ensuring the recyclability of the functional unit -- packaging. (EN13430)", 1),
+         ("-", 1), ("Not applicable", 1)],
+        [("Ensuring energy recovery for the functional unit -- packaging. (EN13431)", 1),
+         ("PN-EN 13431:2007\n\nDeclarations of base material suppliers.", 1), ("Compliant", 1)],
+        [("Ensuring the compostability of the functional unit -- packaging. (EN13432)", 1),
+         ("-", 1), ("Not applicable", 1)],
+        [("Ensuring the biodegradability of the functional unit -- packaging -- . (EN13432)", 1),
+         ("-", 1), ("Not applicable", 1)],
+    ],
+}
+
+
+def document_labels(texts: Optional[Dict], language: str) -> Dict:
+    """
+    Etykiety dla języka: domyślne + texts['docx_labels'].
+    'essential_requirements' - wiersze tabeli pkt 13 jako listy [tekst, rowspan].
+    """
+    labels = dict(LABELS.get(language, LABELS['pl']))
+    labels['essential_requirements'] = ESSENTIAL_REQUIREMENTS.get(language, ESSENTIAL_REQUIREMENTS['pl'])
+    for key, value in ((texts or {}).get('docx_labels') or {}).items():
+        if isinstance(value, dict) and isinstance(labels.get(key), dict):
+            labels[key] = {**labels[key], **value}  # np. batch_headers - można podać tylko część kolumn
+        else:
+            labels[key] = value
+    return labels
@@ -0,0 +1,368 @@
+# services/docx_builder.py
+
+"""
+DocxBuilder - Buduje dokument DOCX bezpośrednio z modelu Declaration
+Nie renderuje HTML i nie parsuje go ponownie - sekcje, tabela SML
+i tabela partii są zapisywane wprost z Declaration.to_template_dict() i tekstów JSON
+
+Nagłówek, stopka i style pochodzą ze szkieletu .docx (cache per język i typ),
+każdy dokument jest klonowany w pamięci ze szkieletu i wypełniana jest tylko treść
+"""
+import io
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from docx import Document
+from docx.shared import Pt, Inches, RGBColor
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+from src.models.declaration import Declaration
+from src.services.document_labels import document_labels
+from src.utils.docx_table_writer import write_table_xml
+
+
+# Numerowane punkty oświadczeń: (numer, [klucze w texts['statements']])
+STATEMENT_SECTIONS_BEFORE_SML = [
+    (4, ['materials_compliance']),
+    (5, ['allowed_substances', 'migration_limits']),
+]
+STATEMENT_SECTIONS_AFTER_SML = [
+    (7, ['migration_test']),
+]
+STATEMENT_SECTIONS_AFTER_DUAL_USE = [
+    (9, ['nias_available']),
+    (10, ['printing_inks']),
+    (11, ['no_bisphenol']),
+    (12, ['reach_compliance']),
+]
+
+# Gotowe szkielety na serwerze (opcjonalne): templates/docx_skeleton_{typ}_{język}.docx
+SKELETON_FILE_PATTERN = "docx_skeleton_{declaration_type}_{language}.docx"
+
+FOOTER_LINES = [
+    # (tekst, rozmiar, pogrubienie, kolor)
+    ("MARPOL Sp. z o.o., Ignatki 40/1, 16-001 Kleosin", 9, True, None),
+    ("tel. +48 85 74 74 397, fax +48 85 66 31 150, http://www.marpol.pl", 7.5, False, RGBColor(102, 102, 102)),
+    ("NIP 542-10-04-860, REGON 050297484, KRS 0000857780 | Kapitał zakładowy: 1.167.500,00 PLN",
+     7.5, False, RGBColor(102, 102, 102)),
+]
+
+
+class DocxBuilder:
+    """Buduje deklarację DOCX bezpośrednio z modelu (bez pośredniego HTML)"""
+
+    # Cache szkieletów współdzielony przez wszystkie instancje: {(typ, język): bajty .docx}
+    _skeleton_cache: Dict[Tuple[str, str], bytes] = {}
+
+    def __init__(self, templates_base_path: Path):
+        self.templates_base_path = Path(templates_base_path)
+
+    @classmethod
+    def clear_skeleton_cache(cls):
+        """Czyści cache szkieletów - wymusza ponowne wczytanie logo / plików szkieletów"""
+        cls._skeleton_cache.clear()
+
+    def build(self, declaration: Declaration, texts: Dict, context: Optional[Dict] = None):
+        """
+        Zwraca gotowy obiekt docx.Document dla deklaracji.
+        'context' - gotowy kontekst szablonu (np. z sesji renderowania), domyślnie to_template_dict()
+        """
+        if context is None:
+            context = declaration.to_template_dict()
+        labels = context.get('labels') or document_labels(texts, declaration.language)
+        statements = texts.get('statements', {})
+
+        doc = self.new_document(declaration.declaration_type, declaration.language)
+
+        # ===== TYTUŁ =====
+        p = doc.add_paragraph()
+        p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        run = p.add_run(labels['title'])
+        run.font.size = Pt(14)
+        run.bold = True
+        run.underline = True
+
+        # ===== 1. PRODUKT =====
+        self._add_labeled(doc, labels['product'], context['product']['name'])
+
+        # ===== 2. PRODUCENT =====
+        producer = context['producer']
+        self._add_labeled(doc, labels['producer'], producer['name'])
+        producer_lines = [
+            producer['address_line1'],
+            producer['address_line2'],
+            f"{labels['phone']} {producer['phone']}, {labels['fax']} {producer['fax']}",
+            producer['plant_name'],
+            producer['plant_address'],
+        ]
+        p = doc.add_paragraph()
+        p.paragraph_format.left_indent = Inches(0.3)
+        run = p.add_run("\n".join(producer_lines))
+        run.bold = True
+
+        # ===== DANE KLIENTA I PARTIE (tylko BOK, po producencie - jak w szablonie) =====
+        if declaration.declaration_type == 'bok':
+            self._add_client_section(doc, context, labels)
+            self._add_batches_section(doc, context, labels)
+
+        # ===== 3. REGULACJE =====
+        doc.add_paragraph(labels['compliance_intro'].format(producer=producer['name']))
+        eu_items, pl_items = self._split_regulations(texts.get('regulations', {}))
+        for title, items in [(labels['eu_law'], eu_items), (labels['pl_law'], pl_items)]:
+            if not items:
+                continue
+            p = doc.add_paragraph()
+            p.paragraph_format.left_indent = Inches(0.6)
+            p.add_run(title).bold = True
+            for item in items:
+                doc.add_paragraph(item, style='List Bullet')
+
+        # ===== 4-5. OŚWIADCZENIA =====
+        self._add_statements(doc, statements, STATEMENT_SECTIONS_BEFORE_SML)
+
+        # ===== 6. TABELA SML =====
+        doc.add_paragraph(labels['sml_intro'])
+        sml_rows = [self._header_row(labels['sml_headers'])]
+        for substance in context['substances_table']:
+            sml_rows.append([
+                self._cell(substance.get('nr_ref', ''), align='center'),
+                self._cell(substance.get('nr_cas', ''), align='center'),
+                self._cell(substance.get('name', '')),
+                self._cell(substance.get('sml_limit', ''), align='center'),
+            ])
+        self._add_table(doc, sml_rows)
+
+        # ===== 7. =====
+        self._add_statements(doc, statements, STATEMENT_SECTIONS_AFTER_SML)
+
+        # ===== 8. DUAL USE =====
+        before, term, after = labels['dual_use_intro'].partition('{term}')
+        p = doc.add_paragraph(before)
+        if term:
+            p.add_run(labels['dual_use_term']).bold = True
+            p.add_run(after)
+        dual_use = ", ".join(self._format_dual_use(item) for item in context['dual_use_list'])
+        if dual_use:
+            doc.add_paragraph(f"{dual_use}.")
+
+        # ===== 9-12. =====
+        self._add_statements(doc, statements, STATEMENT_SECTIONS_AFTER_DUAL_USE)
+
+        # ===== 13. METALE CIĘŻKIE + WYMAGANIA ZASADNICZE =====
+        doc.add_paragraph(f"13. {statements.get('heavy_metals', '')}")
+        requirement_rows = [self._header_row(labels['requirements_headers'])]
+        for row in labels['essential_requirements']:
+            requirement_rows.append([self._cell(text, rowspan=rowspan) for text, rowspan in row])
+        self._add_table(doc, requirement_rows)
+
+        # ===== 14. WARUNKI KONTAKTU Z ŻYWNOŚCIĄ =====
+        doc.add_paragraph(f"14. {statements.get('food_contact_conditions', '')}")
+        for item in labels['food_contact_items']:
+            doc.add_paragraph(item, style='List Bullet')
+
+        # ===== NOTATKA KOŃCOWA =====
+        final_note = texts.get('final_note', '')
+        if final_note:
+            p = doc.add_paragraph()
+            p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+            p.add_run(str(final_note)).bold = True
+
+        # ===== PODPIS =====
+        self._add_signature(doc, context, labels)
+
+        return doc
+
+    def save(self, declaration: Declaration, texts: Dict, output_path: str):
+        """Buduje dokument i zapisuje go do 'output_path'"""
+        doc = self.build(declaration, texts)
+        try:
+            doc.save(output_path)
+        except Exception as e:
+            raise Exception(f"Nie udało się zapisać pliku DOCX: {e}")
+
+    def export_skeleton(self, declaration_type: str, language: str, output_path: str):
+        """
+        Zapisuje szkielet (nagłówek, stopka, style, pusta treść) do pliku.
+        Plik można dopracować w Wordzie i wgrać jako templates/docx_skeleton_{typ}_{język}.docx
+        """
+        with open(output_path, 'wb') as f:
+            f.write(self._get_skeleton(declaration_type, language))
+
+    # === SZKIELET DOKUMENTU ===
+
+    def new_document(self, declaration_type: str, language: str):
+        """Klonuje szkielet w pamięci - nagłówek, stopka, style i logo są już na miejscu"""
+        doc = Document(io.BytesIO(self._get_skeleton(declaration_type, language)))
+
+        # Szkielet z serwera może zawierać przykładową treść - zostaw tylko ustawienia sekcji
+        body = doc.element.body
+        for child in list(body):
+            if not child.tag.endswith('}sectPr'):
+                body.remove(child)
+        return doc
+
+    def _get_skeleton(self, declaration_type: str, language: str) -> bytes:
+        """Zwraca bajty szkieletu z cache, wczytując lub budując go przy pierwszym użyciu"""
+        key = (declaration_type, language)
+        skeleton = self._skeleton_cache.get(key)
+        if skeleton is None:
+            skeleton = self._load_skeleton(declaration_type, language)
+            self._skeleton_cache[key] = skeleton
+        return skeleton
+
+    def _load_skeleton(self, declaration_type: str, language: str) -> bytes:
+        """Gotowy plik szkieletu z serwera lub szkielet zbudowany od zera"""
+        skeleton_path = self.templates_base_path / SKELETON_FILE_PATTERN.format(
+            declaration_type=declaration_type, language=language
+        )
+        if skeleton_path.exists():
+            try:
+                return skeleton_path.read_bytes()
+            except Exception as e:
+                print(f"Błąd wczytywania szkieletu DOCX {skeleton_path.name}: {e}")
+
+        doc = Document()
+        self._setup_page(doc)
+        stream = io.BytesIO()
+        doc.save(stream)
+        return stream.getvalue()
+
+    def _setup_page(self, doc):
+        """Marginesy, logo w nagłówku i stopka z danymi firmy"""
+        # Ustaw marginesy (15mm ~ 0.59 cala)
+        section = doc.sections[0]
+        section.top_margin = Inches(0.59)
+        section.bottom_margin = Inches(0.59)
+        section.left_margin = Inches(0.59)
+        section.right_margin = Inches(0.59)
+
+        # ===== NAGŁÓWEK (LOGO) =====
+        logo_path = self.templates_base_path / "logo.jpg"
+        if logo_path.exists():
+            try:
+                header = section.header
+                header_para = header.paragraphs[0] if header.paragraphs else header.add_paragraph()
+                header_para.add_run().add_picture(str(logo_path), width=Inches(1.5))
+                header_para.alignment = WD_ALIGN_PARAGRAPH.LEFT
+            except Exception as e:
+                print(f"Błąd dodawania logo do nagłówka: {e}")
+
+        # ===== STOPKA =====
+        footer = section.footer
+        for text, size, bold, color in FOOTER_LINES:
+            p = footer.add_paragraph()
+            run = p.add_run(text)
+            run.bold = bold
+            run.font.size = Pt(size)
+            if color is not None:
+                run.font.color.rgb = color
+            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    # === SEKCJE ===
+
+    def _add_labeled(self, doc, label: str, value: str):
+        """Akapit 'etykieta: wartość' pogrubiony (jak .section-title w HTML)"""
+        p = doc.add_paragraph()
+        p.add_run(f"{label} {value}").bold = True
+
+    def _add_statements(self, doc, statements: Dict, sections: List):
+        """Dodaje numerowane punkty oświadczeń z texts['statements']"""
+        for number, keys in sections:
+            values = [str(statements.get(key, '')) for key in keys]
+            doc.add_paragraph(f"{number}. {values[0]}")
+            for value in values[1:]:
+                if value:
+                    doc.add_paragraph(value)
+
+    def _add_client_section(self, doc, context: Dict, labels: Dict):
+        """Ramka z danymi kontrahenta"""
+        client = context.get('client', {})
+        p = doc.add_paragraph()
+        p.add_run(f"{labels['client']} {client.get('code', '')}").bold = True
+        for line in [client.get('name', ''), client.get('address', '')]:
+            if line:
+                doc.add_paragraph(line)
+        if client.get('invoice'):
+            p = doc.add_paragraph()
+            p.add_run(f"{labels['invoice']} {client['invoice']}").italic = True
+
+    def _add_batches_section(self, doc, context: Dict, labels: Dict):
+        """Tabela partii wyrobu - kolumny zależne od context['config']"""
+        config = context.get('config', {})
+        headers = labels['batch_headers']
+
+        columns = ['index']
+        if config.get('show_description'):
+            columns.append('description')
+        columns += ['batch_no', 'qty']
+        if config.get('show_thickness'):
+            columns.append('thickness')
+        columns.append('prod_date')
+
+        p = doc.add_paragraph()
+        p.add_run(labels['batches_title']).bold = True
+        if context.get('common_structure'):
+            doc.add_paragraph(f"{labels['common_structure']} {context['common_structure']}")
+
+        rows = [self._header_row([headers[c] for c in columns])]
+        for batch in context.get('batches', []):
+            rows.append([self._cell(batch.get(c, ''), align='center') for c in columns])
+        self._add_table(doc, rows)
+
+    def _add_signature(self, doc, context: Dict, labels: Dict):
+        """Miejsce, data, podpis"""
+        doc.add_paragraph(labels['place_date'].format(date=context['generation_date']))
+        doc.add_paragraph(context['producer']['name'])
+
+        podpis_path = self.templates_base_path / "podpis.png"
+        if podpis_path.exists():
+            try:
+                doc.add_picture(str(podpis_path), width=Inches(2.0))
+            except Exception as e:
+                print(f"Błąd wczytywania podpisu do DOCX: {e}")
+        else:
+            doc.add_paragraph()
+            doc.add_paragraph("_______________________")
+
+        for line in [labels['signature_role'], labels['signature_name']]:
+            doc.add_paragraph().add_run(line).italic = True
+
+    # === POMOCNICZE ===
+
+    @staticmethod
+    def _split_regulations(regulations: Dict):
+        """Dzieli regulacje na unijne i polskie wg prefiksu klucza (pl_*)"""
+        eu_items, pl_items = [], []
+        for key, value in regulations.items():
+            if not value:
+                continue
+            (pl_items if key.startswith('pl_') else eu_items).append(str(value))
+        return eu_items, pl_items
+
+    @staticmethod
+    def _format_dual_use(item) -> str:
+        """'Nazwa (E-symbol)' - obsługuje zarówno słowniki jak i stringi"""
+        if isinstance(item, dict):
+            name = item.get('name', '')
+            e_symbol = item.get('e_symbol', '')
+            return f"{name} ({e_symbol})" if e_symbol else name
+        return str(item)
+
+    @staticmethod
+    def _cell(text, align: Optional[str] = None, rowspan: int = 1, colspan: int = 1,
+              header: bool = False) -> Dict:
+        """Opis komórki tabeli"""
+        return {
+            'text': '' if text is None else str(text),
+            'align': align,
+            'rowspan': rowspan,
+            'colspan': colspan,
+            'header': header,
+        }
+
+    def _header_row(self, titles: List[str]) -> List[Dict]:
+        return [self._cell(t, align='center', header=True) for t in titles]
+
+    def _add_table(self, doc, rows: List[List[Dict]]):
+        """Zapisuje tabelę (komórki: text/align/rowspan/colspan/header) jednym przebiegiem XML"""
+        write_table_xml(doc, rows)
@@ -0,0 +1,143 @@
+# services/html_docx_converter.py
+
+"""
+LxmlHtmlConverter - Konwersja HTML → DOCX oparta na lxml
+Jeden przebieg po drzewie: tekst akapitów/nagłówków/list pobierany jest
+przez text_content() (XPath string() w C), bez ponownego chodzenia po poddrzewach
+Wynik odpowiada PDFGenerator._process_html_to_docx (backend 'soup')
+"""
+import base64
+import io
+from pathlib import Path
+
+import lxml.html
+from docx.shared import Pt, Inches
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+from src.utils.docx_table_writer import write_table_xml
+
+
+class LxmlHtmlConverter:
+    """Przetwarza HTML do DOCX w jednym przebiegu (nagłówki, akapity, tabele, listy, obrazki)"""
+
+    def convert(self, doc, html_content: str):
+        """Parsuje HTML (parser lxml w C) i dopisuje treść <body> do dokumentu"""
+        root = lxml.html.document_fromstring(html_content)
+        body = root.find('body')
+        if body is not None:
+            self._process(doc, body)
+
+    def _process(self, doc, element):
+        """Przetwarza dzieci elementu - tekst (text/tail) i elementy w kolejności dokumentu"""
+        self._add_loose_text(doc, element.text)
+
+        for child in element:
+            tag_name = child.tag
+            if not isinstance(tag_name, str):
+                # Komentarze / instrukcje przetwarzania - pomijamy, ale zachowujemy tekst po nich
+                self._add_loose_text(doc, child.tail)
+                continue
+
+            # Elementy z id="header" i id="footer" są obsłużone w sekcji header/footer dokumentu
+            if child.get('id') in ('header', 'footer'):
+                self._add_loose_text(doc, child.tail)
+                continue
+
+            if tag_name == 'img':
+                self._add_image(doc, child.get('src', ''))
+
+            elif tag_name == 'h1':
+                p = doc.add_paragraph(child.text_content().strip())
+                p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                if p.runs:
+                    p.runs[0].font.size = Pt(14)
+
+            elif tag_name == 'h2':
+                p = doc.add_paragraph(child.text_content().strip())
+                if p.runs:
+                    p.runs[0].font.size = Pt(12)
+
+            elif tag_name == 'div':
+                self._process(doc, child)
+
+            elif tag_name == 'p':
+                text = child.text_content().strip()
+                if text:
+                    p = doc.add_paragraph(text)
+                    align = self._alignment(child.get('style', ''))
+                    if align is not None:
+                        p.alignment = align
+
+            elif tag_name == 'table':
+                self._add_table(doc, child)
+
+            elif tag_name in ('ul', 'ol'):
+                style = 'List Bullet' if tag_name == 'ul' else 'List Number'
+                for li in child:
+                    if li.tag == 'li':
+                        text = li.text_content().strip()
+                        if text:
+                            doc.add_paragraph(text, style=style)
+
+            elif tag_name in ('hr', 'br'):
+                doc.add_paragraph()
+
+            else:
+                self._process(doc, child)
+
+            self._add_loose_text(doc, child.tail)
+
+    @staticmethod
+    def _add_loose_text(doc, text):
+        """Tekst leżący bezpośrednio w kontenerze - osobny akapit (jak NavigableString w soup)"""
+        if text:
+            text = text.strip()
+            if text:
+                doc.add_paragraph(text)
+
+    @staticmethod
+    def _alignment(style: str):
+        if 'text-align: center' in style or 'text-align:center' in style:
+            return WD_ALIGN_PARAGRAPH.CENTER
+        if 'text-align: right' in style or 'text-align:right' in style:
+            return WD_ALIGN_PARAGRAPH.RIGHT
+        return None
+
+    @staticmethod
+    def _add_image(doc, src: str):
+        try:
+            if src.startswith('data:image'):
+                # Base64 embedded image
+                _, data = src.split(",", 1)
+                doc.add_picture(io.BytesIO(base64.b64decode(data)), width=Inches(2.0))
+            elif src and Path(src).exists():
+                doc.add_picture(src, width=Inches(2.0))
+        except Exception as e:
+            print(f"Błąd wczytywania obrazka do DOCX: {e}")
+
+    def _add_table(self, doc, table_element):
+        """Zbiera komórki wszystkich <tr> (także w thead/tbody) i zapisuje tabelę jednym przebiegiem XML"""
+        rows = []
+        for tr in table_element.iter('tr'):
+            cells = []
+            for html_cell in tr:
+                if html_cell.tag not in ('th', 'td'):
+                    continue
+                style = html_cell.get('style', '')
+                align = None
+                if 'text-align: center' in style or 'text-align:center' in style:
+                    align = 'center'
+                elif 'text-align: right' in style or 'text-align:right' in style:
+                    align = 'right'
+
+                cells.append({
+                    'text': html_cell.text_content().strip(),
+                    'align': align,
+                    'rowspan': int(html_cell.get('rowspan', 1)),
+                    'colspan': int(html_cell.get('colspan', 1)),
+                    'header': False,
+                })
+            rows.append(cells)
+
+        if rows:
+            write_table_xml(doc, rows, style='Table Grid')
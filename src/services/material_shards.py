@@ -0,0 +1,342 @@
+# services/material_shards.py
+
+"""
+MaterialShards - materials.json podzielony na pliki per folia (config/materials/)
+- manifest.json: {nazwa folii: plik} + pozostałe klucze materials.json ('meta'),
+- <folia>.json: {"material": nazwa, "suppliers": [...]} - lista dostawców jak w materials.json.
+DataLoader zwraca ten sam układ {'materials': {...}}, ale folie wczytywane są dopiero przy pierwszym
+odwołaniu (ShardedMaterials), a zapis dotyczy tylko zmienionych plików folii (i manifestu).
+Układ włączany automatycznie, gdy istnieje manifest; konwersja: split_materials_file() / 'shard-materials'.
+"""
+import hashlib
+import json
+import re
+from collections.abc import MutableMapping
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src.utils.atomic_io import atomic_write_bytes, file_lock, file_stamp
+from src.utils.json_merge import MergeConflictError
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+
+def shard_dir() -> Path:
+    """Folder plików folii (MATERIALS_DIR w constants.py lub config/materials obok materials.json)"""
+    from src.config import constants
+    directory = getattr(constants, 'MATERIALS_DIR', None)
+    return Path(directory) if directory else Path(constants.MATERIALS_DB).parent / 'materials'
+
+
+def _dump(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _read_bytes(path: Path) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def shard_file_name(name: str, taken: Iterable = ()) -> str:
+    """Bezpieczna nazwa pliku dla folii; przy kolizji (np. wielkość liter w Windows) dopisek z hashem"""
+    safe = re.sub(r'[^A-Za-z0-9._-]+', '_', name).strip('._') or 'material'
+    file_name = f"{safe}.json"
+    if file_name.lower() in {t.lower() for t in taken} or file_name.lower() == MANIFEST_NAME:
+        file_name = f"{safe}_{hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]}.json"
+    return file_name
+
+
+class ShardedMaterials(MutableMapping):
+    """Słownik {folia: lista dostawców} wczytujący pliki folii przy pierwszym odwołaniu"""
+
+    def __init__(self, store: 'MaterialShardStore', files: Dict[str, str]):
+        self._store = store
+        self._files = dict(files)  # nazwa → plik (kolejność jak w manifeście)
+        self._loaded: Dict[str, List[Dict]] = {}
+        self._removed = set()
+
+    def __getitem__(self, name: str) -> List[Dict]:
+        if name in self._loaded:
+            return self._loaded[name]
+        if name not in self._files:
+            raise KeyError(name)
+        suppliers = self._store.read_shard(name, self._files[name])
+        self._loaded[name] = suppliers
+        return suppliers
+
+    def __setitem__(self, name: str, suppliers: List[Dict]):
+        if name not in self._files:
+            self._files[name] = None  # Plik nadawany przy zapisie
+        self._loaded[name] = suppliers
+        self._removed.discard(name)
+
+    def __delitem__(self, name: str):
+        del self._files[name]
+        self._loaded.pop(name, None)
+        self._removed.add(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._files))
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __contains__(self, name) -> bool:
+        return name in self._files
+
+    def __repr__(self) -> str:
+        return f"ShardedMaterials({len(self._files)} folii, wczytane: {len(self._loaded)})"
+
+    @property
+    def loaded(self) -> Dict[str, List[Dict]]:
+        """Folie już wczytane (tylko te mogły zostać zmienione)"""
+        return self._loaded
+
+
+class MaterialShardStore:
+    """Odczyt i zapis plików folii + manifestu z kontrolą wersji jak DataLoader.save_json"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / MANIFEST_NAME
+        self._base: Dict[str, tuple] = {}  # {folia: (stamp, bajty, serializacja)} - wersja z chwili odczytu
+        self._manifest_base: Dict = {}
+        self._manifest_stamp = None
+        self.manifest_size = 0
+        self.on_shard_loaded: Optional[Callable[[int], None]] = None  # rozmiar doczytanego pliku (cache)
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    def read_manifest(self) -> Dict:
+        raw = _read_bytes(self.manifest_path)
+        self.manifest_size = len(raw)
+        return json.loads(raw.decode('utf-8'))
+
+    @property
+    def loaded_size(self) -> int:
+        """Bajty wczytanych plików folii"""
+        return sum(len(base[1]) for base in self._base.values())
+
+    def forget(self):
+        """Zwalnia wersje bazowe folii (dokument usunięty z cache DataLoadera)"""
+        self._base.clear()
+
+    def load(self) -> Dict:
+        """Dokument jak materials.json; folie wczytywane leniwie"""
+        self._manifest_stamp = file_stamp(self.manifest_path)
+        manifest = self.read_manifest()
+        self._manifest_base = manifest
+        self._base.clear()
+        document = {'materials': ShardedMaterials(self, manifest.get('materials', {}))}
+        document.update(manifest.get('meta', {}))
+        return document
+
+    def read_shard(self, name: str, file_name: str) -> List[Dict]:
+        path = self.directory / file_name
+        stamp = file_stamp(path)
+        raw = _read_bytes(path)
+        suppliers = json.loads(raw.decode('utf-8')).get('suppliers', [])
+        # (stamp, bajty z dysku, postać po serializacji) - ręczne formatowanie pliku nie jest zmianą
+        self._base[name] = (stamp, raw, _dump({'material': name, 'suppliers': suppliers}))
+        if self.on_shard_loaded:
+            self.on_shard_loaded(len(raw))
+        return suppliers
+
+    def save(self, document: Dict, label: str = 'materials.json') -> Tuple[bool, Set[str]]:
+        """
+        Zapisuje tylko zmienione pliki folii i (jeśli trzeba) manifest.
+        Zwraca (scalono, nazwy zapisanych folii); scalono=True, gdy manifest na dysku zawierał
+        folie dodane / usunięte przez innych użytkowników (naniesione na 'document').
+        Raises: MergeConflictError - folia zmieniona także przez innego użytkownika (nic nie zapisano)
+        """
+        materials = document.get('materials', {})
+        if not isinstance(materials, ShardedMaterials):
+            # Podmieniony słownik - wszystkie folie traktowane jak wczytane
+            sharded = ShardedMaterials(self, self._manifest_base.get('materials', {}))
+            for name in list(sharded):
+                if name not in materials:
+                    del sharded[name]
+            for name, suppliers in materials.items():
+                sharded[name] = suppliers
+            document['materials'] = materials = sharded
+
+        taken = [f for f in materials._files.values() if f]
+        changed = {}
+        for name, suppliers in materials.loaded.items():
+            content = _dump({'material': name, 'suppliers': suppliers})
+            if content == self._base.get(name, (None, None, None))[2]:
+                continue
+            if not materials._files.get(name):
+                materials._files[name] = shard_file_name(name, taken)
+                taken.append(materials._files[name])
+            changed[name] = content
+
+        # Blokady tylko zmienionych folii: najpierw sprawdzenie wszystkich, potem zapis
+        with ExitStack() as locks:
+            for name in sorted(changed):
+                locks.enter_context(file_lock(self.directory / materials._files[name]))
+            conflicts = []
+            for name, content in changed.items():
+                path = self.directory / materials._files[name]
+                base_stamp, base_raw, _ = self._base.get(name, (None, None, None))
+                disk_stamp = file_stamp(path)
+                if disk_stamp is None or disk_stamp == base_stamp:
+                    continue
+                disk_raw = _read_bytes(path)
+                if disk_raw != base_raw and disk_raw != content:
+                    conflicts.append(f"/materials/{name}")
+            if conflicts:
+                raise MergeConflictError(label, sorted(conflicts))
+
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for name, content in changed.items():
+                path = self.directory / materials._files[name]
+                atomic_write_bytes(path, content)
+                self._base[name] = (file_stamp(path), content, content)
+
+        meta = {key: value for key, value in document.items() if key != 'materials'}
+        manifest_files = self._manifest_base.get('materials', {})
+        if (materials._removed or meta != self._manifest_base.get('meta', {})
+                or any(name not in manifest_files for name in materials)
+                or file_stamp(self.manifest_path) != self._manifest_stamp):
+            return self._update_manifest(materials, meta, document, set(changed)), set(changed)
+        return False, set(changed)
+
+    def update_records(self, changes: Dict[str, Callable], document: Optional[Dict] = None) -> Dict[str, List[Dict]]:
+        """
+        Zmienia pojedyncze folie: {nazwa: funkcja(aktualna lista dostawców z dysku lub None) → nowa lista}.
+        Pozostałe (także niezapisane) zmiany w 'document' nie są zapisywane; nowe folie trafiają do manifestu.
+        """
+        materials = document.get('materials') if document is not None else None
+        files = dict(self._manifest_base.get('materials', {}))
+        if any(name not in files for name in changes) and self.exists():
+            files.update(self.read_manifest().get('materials', {}))  # Folia mogła zostać dodana przez innych
+        values, added, resolved = {}, {}, {}
+        for name, change in changes.items():
+            file_name = files.get(name) or shard_file_name(name, list(files.values()) + list(added.values()))
+            resolved[name] = file_name
+            path = self.directory / file_name
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with file_lock(path):
+                current = None
+                if path.exists():
+                    current = json.loads(_read_bytes(path).decode('utf-8')).get('suppliers', [])
+                value = change(current)
+                content = _dump({'material': name, 'suppliers': value})
+                atomic_write_bytes(path, content)
+                self._base[name] = (file_stamp(path), content, content)
+            values[name] = value
+            if name not in files:
+                added[name] = file_name
+        known = self._manifest_base.setdefault('materials', {})
+
+        if added:
+            with file_lock(self.manifest_path):
+                unchanged = file_stamp(self.manifest_path) == self._manifest_stamp
+                manifest = self.read_manifest()
+                for name, file_name in added.items():
+                    manifest.setdefault('materials', {}).setdefault(name, file_name)
+                atomic_write_bytes(self.manifest_path, _dump(manifest))
+                if unchanged:  # Inaczej następny zapis i tak przeczyta manifest z cudzymi zmianami
+                    self._manifest_stamp = file_stamp(self.manifest_path)
+        known.update(resolved)
+
+        if isinstance(materials, ShardedMaterials):
+            for name, value in values.items():
+                materials._files[name] = resolved[name]
+                materials._loaded[name] = value
+                materials._removed.discard(name)
+        return values
+
+    def _update_manifest(self, materials: ShardedMaterials, meta: Dict, document: Dict, changed: set) -> bool:
+        """Nasze dodania / usunięcia folii nakładane na aktualny manifest z dysku (i odwrotnie)"""
+        base_files = self._manifest_base.get('materials', {})
+        base_meta = self._manifest_base.get('meta', {})
+        with file_lock(self.manifest_path):
+            current = self.read_manifest() if self.exists() else {'version': MANIFEST_VERSION, 'materials': {}}
+            files = current.get('materials', {})
+            obsolete = []
+            for name in materials._removed:
+                file_name = files.pop(name, None)
+                if file_name and file_name == base_files.get(name):
+                    obsolete.append(self.directory / file_name)
+            for name, file_name in materials._files.items():
+                if name not in base_files or name in changed:
+                    files.setdefault(name, file_name)
+            current_meta = current.get('meta', {})
+            for key in set(base_meta) | set(meta):
+                if meta.get(key) != base_meta.get(key):
+                    if key in meta:
+                        current_meta[key] = meta[key]
+                    else:
+                        current_meta.pop(key, None)
+            current.update({'version': MANIFEST_VERSION, 'materials': files, 'meta': current_meta})
+            atomic_write_bytes(self.manifest_path, _dump(current))
+            for path in obsolete:  # Dopiero gdy manifest już ich nie wskazuje
+                path.unlink(missing_ok=True)
+            self._manifest_stamp = file_stamp(self.manifest_path)
+
+        # Folie dodane / usunięte przez innych użytkowników
+        materials._removed.clear()
+        merged = False
+        for name in list(materials._files):
+            if name not in files:
+                del materials._files[name]
+                materials._loaded.pop(name, None)
+                merged = True
+        for name, file_name in files.items():
+            if name not in materials._files:
+                materials._files[name] = file_name
+                merged = True
+        for key in list(document):
+            if key != 'materials' and key not in current_meta:
+                del document[key]
+        document.update(current_meta)
+        self._manifest_base = current
+        return merged
+
+
+def open_material_shards() -> Optional[MaterialShardStore]:
+    """Magazyn plików folii, jeśli istnieje manifest (inaczej DataLoader czyta materials.json)"""
+    try:
+        store = MaterialShardStore(shard_dir())
+        return store if store.exists() else None
+    except OSError:
+        return None  # Serwer niedostępny - zgłosi się przy odczycie materials.json
+
+
+def split_materials_file(materials_json: Path, directory: Path) -> Path:
+    """Konwersja materials.json → folder plików folii + manifest; zwraca ścieżkę manifestu"""
+    with open(materials_json, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    files = {}
+    for name, suppliers in document.get('materials', {}).items():
+        files[name] = shard_file_name(name, files.values())
+        atomic_write_bytes(directory / files[name], _dump({'material': name, 'suppliers': suppliers}))
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'materials': files,
+        'meta': {key: value for key, value in document.items() if key != 'materials'},
+    }
+    manifest_path = directory / MANIFEST_NAME
+    atomic_write_bytes(manifest_path, _dump(manifest))
+    return manifest_path
+
+
+def join_material_shards(directory: Path, materials_json: Path) -> Path:
+    """Konwersja odwrotna: folder plików folii → jeden materials.json"""
+    store = MaterialShardStore(directory)
+    manifest = store.read_manifest()
+    document = {'materials': {}}
+    for name, file_name in manifest.get('materials', {}).items():
+        document['materials'][name] = store.read_shard(name, file_name)
+    document.update(manifest.get('meta', {}))
+    atomic_write_bytes(Path(materials_json), _dump(document))
+    return Path(materials_json)
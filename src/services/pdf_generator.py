@@ -2,11 +2,14 @@
 
 """
 PDFGenerator - Generuje HTML i PDF z szablonów Jinja2
+Ciężkie biblioteki (Jinja2, python-docx, BeautifulSoup, WeasyPrint) importowane są przy pierwszym
+użyciu - moduł ładuje się szybko przy starcie okna (zob. src/utils/preload.py)
 """
-from jinja2 import Environment, FileSystemLoader
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
 import io
+import sys
 import base64
 
 from src.config.constants import (
@@ -14,32 +17,62 @@ from src.config.constants import (
     TEMPLATE_PL_TECH, TEMPLATE_EN_TECH,
     TEMPLATE_PL_BOK, TEMPLATE_EN_BOK
 )
-from docx import Document
-from docx.shared import Pt, Inches, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from bs4 import BeautifulSoup
 from src.models.declaration import Declaration
+from src.services.document_labels import document_labels
+from src.services.render_session import RenderSession
+from src.utils.atomic_io import atomic_write_bytes, file_stamp
+from src.utils.timing import span, timed
+
+# Backend konwersji HTML → DOCX: 'lxml' (jeden przebieg, parser w C) lub 'soup' (BeautifulSoup html.parser)
+HTML_DOCX_BACKENDS = ('lxml', 'soup')
+DEFAULT_HTML_DOCX_BACKEND = 'lxml'
 
 
 class PDFGenerator:
     """Generator dokumentów HTML i PDF"""
 
-    def __init__(self, data_loader):
+    # Obrazy (logo, podpis) jako data URI - współdzielone przez wszystkie instancje
+    _image_cache = {}
+
+    def __init__(self, data_loader, html_backend: str = DEFAULT_HTML_DOCX_BACKEND):
+        if html_backend not in HTML_DOCX_BACKENDS:
+            raise ValueError(f"Nieznany backend HTML→DOCX: {html_backend}")
         self.data_loader = data_loader
-        self.env = Environment(
-            loader=FileSystemLoader(str(TEMPLATES_PATH)),
-            autoescape=True
-        )
+        self.html_backend = html_backend
+        self._env = None
         OUTPUT_PATH.mkdir(exist_ok=True, parents=True)
         self.templates_base_path = TEMPLATES_PATH
 
+        # Sesja, której HTML jest aktualnie zapisany w pliku podglądu
+        self._preview_session = None
+
+    @property
+    def env(self):
+        """Środowisko Jinja2 - tworzone przy pierwszym renderowaniu"""
+        if self._env is None:
+            from jinja2 import Environment, FileSystemLoader
+            self._env = Environment(
+                loader=FileSystemLoader(str(self.templates_base_path)),
+                autoescape=True
+            )
+        return self._env
+
     def _get_template_path(self, declaration: Declaration) -> Path:
         """Zwraca odpowiednią ścieżkę szablonu"""
-        if declaration.declaration_type == 'tech':
-            return TEMPLATE_PL_TECH if declaration.language == 'pl' else TEMPLATE_EN_TECH
+        return self.template_path(declaration.declaration_type, declaration.language)
+
+    @staticmethod
+    def template_path(declaration_type: str, language: str) -> Path:
+        if declaration_type == 'tech':
+            return TEMPLATE_PL_TECH if language == 'pl' else TEMPLATE_EN_TECH
         else:
-            return TEMPLATE_PL_BOK if declaration.language == 'pl' else TEMPLATE_EN_BOK
+            return TEMPLATE_PL_BOK if language == 'pl' else TEMPLATE_EN_BOK
 
+    def source_stamp(self, declaration_type: str, language: str) -> tuple:
+        """Wersja danych (DataLoader.generation) i szablonu - część klucza sesji renderowania"""
+        return self.data_loader.generation, file_stamp(self.template_path(declaration_type, language))
+
+    @timed('render.context')
     def _prepare_context(self, declaration: Declaration) -> dict:
         """Przygotowuje kontekst dla szablonu"""
         texts = self.data_loader.get_texts(declaration.language)
@@ -47,58 +80,81 @@ class PDFGenerator:
         # Declaration.to_template_dict() JUŻ PRZYGOTOWUJE wszystko (batches, client, config)!
         context = declaration.to_template_dict()
 
-        # Dodaj tylko teksty i obrazy
+        # Dodaj tylko teksty, stałe etykiety (wspólne z DOCX) i obrazy
         context['texts'] = texts
+        context['labels'] = document_labels(texts, declaration.language)
 
         if declaration.generation_date:
             context['generation_date'] = declaration.generation_date.strftime("%d.%m.%Y")
         else:
             context['generation_date'] = datetime.now().strftime("%d.%m.%Y")
 
-        # Embed obrazy jako base64
-        logo_path = self.templates_base_path / "logo.jpg"
-        podpis_path = self.templates_base_path / "podpis.png"
-
-        if logo_path.exists():
-            with open(logo_path, 'rb') as f:
-                logo_b64 = base64.b64encode(f.read()).decode()
-                context['logo_base64'] = f"data:image/jpeg;base64,{logo_b64}"
-
-        if podpis_path.exists():
-            with open(podpis_path, 'rb') as f:
-                podpis_b64 = base64.b64encode(f.read()).decode()
-                context['podpis_base64'] = f"data:image/png;base64,{podpis_b64}"
+        # Embed obrazy jako base64 (wczytane raz, trzymane w cache)
+        logo_b64 = self._image_data_uri("logo.jpg", "image/jpeg")
+        if logo_b64:
+            context['logo_base64'] = logo_b64
 
-        # === DEBUG ===
-        print(f"\n=== DEBUG _prepare_context ===")
-        print(f"Batches w context: {len(context.get('batches', []))}")
-        print(f"Config: {context.get('config', {})}")
-        if context.get('batches'):
-            print(f"Pierwszy batch: {context['batches'][0]}")
-        # === KONIEC DEBUG ===
+        podpis_b64 = self._image_data_uri("podpis.png", "image/png")
+        if podpis_b64:
+            context['podpis_base64'] = podpis_b64
 
         return context
 
+    def _image_data_uri(self, file_name: str, mime_type: str) -> Optional[str]:
+        """Zwraca obraz z folderu szablonów jako data URI (None jeśli brak pliku)"""
+        image_path = self.templates_base_path / file_name
+        cache_key = str(image_path)
+
+        if cache_key not in self._image_cache:
+            data_uri = None
+            if image_path.exists():
+                with open(image_path, 'rb') as f:
+                    data_uri = f"data:{mime_type};base64,{base64.b64encode(f.read()).decode()}"
+            self._image_cache[cache_key] = data_uri
+
+        return self._image_cache[cache_key]
+
+    @classmethod
+    def clear_asset_cache(cls):
+        """Czyści cache obrazów i szkieletów DOCX - wymusza ponowne wczytanie z serwera"""
+        cls._image_cache.clear()
+        if 'src.services.docx_builder' in sys.modules:
+            sys.modules['src.services.docx_builder'].DocxBuilder.clear_skeleton_cache()
+
+    def create_session(self, declaration: Declaration, key=None) -> RenderSession:
+        """Tworzy sesję renderowania - HTML/PDF/DOCX liczone raz dla migawki deklaracji"""
+        return RenderSession(self, declaration, key)
+
+    def render_html(self, declaration: Declaration, context: dict) -> str:
+        """Renderuje szablon dla gotowego kontekstu"""
+        template_path = self._get_template_path(declaration)
+        with span('render.jinja', template=template_path.name, batches=len(context.get('batches', []))):
+            template = self.env.get_template(template_path.name)
+            return template.render(**context)
+
     def generate_html_content(self, declaration: Declaration) -> str:
         """Renderuje szablon do stringa HTML"""
-        template_path = self._get_template_path(declaration)
-        template = self.env.get_template(template_path.name)
-        context = self._prepare_context(declaration)
-        return template.render(**context)
+        return self.render_html(declaration, self._prepare_context(declaration))
 
-    def generate_html(self, declaration: Declaration) -> Path:
-        """Zapisuje podgląd HTML i zwraca ścieżkę absolutną"""
-        html_content = self.generate_html_content(declaration)
+    def write_preview(self, html_content: str) -> Path:
+        """Zapisuje gotowy HTML jako podgląd i zwraca ścieżkę absolutną"""
         output_file = (OUTPUT_PATH / "preview_temp.html").resolve()
+        self._preview_session = None
 
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write(html_content)
         return output_file
 
+    def generate_html(self, declaration: Declaration) -> Path:
+        """Zapisuje podgląd HTML i zwraca ścieżkę absolutną"""
+        return self.write_preview(self.generate_html_content(declaration))
+
     def generate_pdf_bytes(self, declaration: Declaration) -> bytes:
         """Generuje PDF i zwraca jako bajty do zapisu przez użytkownika"""
-        html_content = self.generate_html_content(declaration)
+        return self.html_to_pdf_bytes(self.generate_html_content(declaration))
 
+    def html_to_pdf_bytes(self, html_content: str) -> bytes:
+        """Konwertuje gotowy HTML do PDF (WeasyPrint)"""
         try:
             from weasyprint import HTML
             from pathlib import WindowsPath
@@ -109,8 +165,9 @@ class PDFGenerator:
             else:
                 base_url = str(self.templates_base_path)
 
-            print(f"DEBUG base_url as URI: {base_url}")
-            pdf_bytes = HTML(string=html_content, base_url=base_url).write_pdf()
+            with span('render.write_pdf', html_chars=len(html_content)) as timer:
+                pdf_bytes = HTML(string=html_content, base_url=base_url).write_pdf()
+                timer.set(pdf_bytes=len(pdf_bytes))
             return pdf_bytes
 
         except Exception as e:
@@ -120,73 +177,77 @@ class PDFGenerator:
         """
         Generuje plik DOCX z deklaracji.
         Zapisuje do ścieżki 'output_path' przekazanej z widoku.
+        Dokument budowany jest wprost z modelu (DocxBuilder) - bez renderowania i parsowania HTML.
         """
-        html_content = self.generate_html_content(declaration)
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        # Utwórz dokument Word
-        doc = Document()
-
-        # Ustaw marginesy (15mm ~ 0.59 cala)
-        section = doc.sections[0]
-        section.top_margin = Inches(0.59)
-        section.bottom_margin = Inches(0.59)
-        section.left_margin = Inches(0.59)
-        section.right_margin = Inches(0.59)
-
-        # ===== NAGŁÓWEK (LOGO) =====
-        # UWAGA: Aby dodać nagłówek w python-docx, trzeba użyć section.header
-        header = section.header
-        logo_path = self.templates_base_path / "logo.jpg"
-        if logo_path.exists():
-            try:
-                # Dodaj logo do nagłówka
-                header_para = header.paragraphs[0] if header.paragraphs else header.add_paragraph()
-                run = header_para.add_run()
-                run.add_picture(str(logo_path), width=Inches(1.5))  # ZMIEŃ ROZMIAR TUTAJ
-                header_para.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            except Exception as e:
-                print(f"Błąd dodawania logo do nagłówka: {e}")
-
-        # ===== STOPKA =====
-        # UWAGA: Dodanie stopki z danymi firmy
-        footer = section.footer
-        # Linia 1: pogrubiona
-        p1 = footer.add_paragraph()
-        run1 = p1.add_run("MARPOL Sp. z o.o., Ignatki 40/1, 16-001 Kleosin")
-        run1.bold = True  # ZAKOMENTUJ JEŚLI NIE CHCESZ POGRUBIENIA
-        run1.font.size = Pt(9)
-        p1.alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-        # Linia 2: kontakt
-        p2 = footer.add_paragraph("tel. +48 85 74 74 397, fax +48 85 66 31 150, http://www.marpol.pl")
-        p2.runs[0].font.size = Pt(7.5)
-        p2.runs[0].font.color.rgb = RGBColor(102, 102, 102)  # KOLOR SZARY
-        p2.alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-        # Linia 3: dane rejestrowe
-        p3 = footer.add_paragraph(
-            "NIP 542-10-04-860, REGON 050297484, KRS 0000857780 | Kapitał zakładowy: 1.167.500,00 PLN")
-        p3.runs[0].font.size = Pt(7.5)
-        p3.runs[0].font.color.rgb = RGBColor(102, 102, 102)
-        p3.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        content = self.docx_bytes(declaration)  # Błąd budowania nie zostawia pustego / uciętego pliku
+        try:
+            atomic_write_bytes(output_path, content)
+        except Exception as e:
+            raise Exception(f"Nie udało się zapisać pliku DOCX: {e}")
 
-        # ===== TREŚĆ DOKUMENTU =====
-        body = soup.find('body')
-        if body:
-            self._process_html_to_docx(doc, body)
+    def docx_bytes(self, declaration: Declaration, context: Optional[dict] = None) -> bytes:
+        """Buduje DOCX z modelu i zwraca go jako bajty (kontekst można podać z sesji renderowania)"""
+        if context is None:
+            texts = self.data_loader.get_texts(declaration.language)
+        else:
+            texts = context['texts']
+
+        from src.services.docx_builder import DocxBuilder
+
+        with span('render.docx', substances=len(declaration.substances_table)):
+            doc = DocxBuilder(self.templates_base_path).build(declaration, texts, context)
+            stream = io.BytesIO()
+            doc.save(stream)
+            return stream.getvalue()
 
-        # Zapisz do wybranej przez użytkownika ścieżki
+    def generate_docx_from_html(self, declaration: Declaration, output_path: str,
+                                html_content: Optional[str] = None):
+        """
+        Generuje plik DOCX konwertując wyrenderowany szablon HTML.
+        Wolniejsza ścieżka - przydatna gdy szablon HTML zawiera treść spoza modelu.
+        """
+        content = self.docx_bytes_from_html(declaration, html_content)
         try:
-            doc.save(output_path)
+            atomic_write_bytes(output_path, content)
         except Exception as e:
             raise Exception(f"Nie udało się zapisać pliku DOCX: {e}")
 
+    def docx_bytes_from_html(self, declaration: Declaration, html_content: Optional[str] = None) -> bytes:
+        """DOCX z wyrenderowanego HTML jako bajty (HTML można podać z sesji renderowania)"""
+        from src.services.docx_builder import DocxBuilder
+
+        if html_content is None:
+            html_content = self.generate_html_content(declaration)
+
+        # Szkielet z nagłówkiem (logo), stopką i marginesami - wspólny z DocxBuilder
+        doc = DocxBuilder(self.templates_base_path).new_document(
+            declaration.declaration_type, declaration.language
+        )
+
+        # ===== TREŚĆ DOKUMENTU =====
+        with span('render.docx_from_html', backend=self.html_backend):
+            if self.html_backend == 'lxml':
+                from src.services.html_docx_converter import LxmlHtmlConverter
+                LxmlHtmlConverter().convert(doc, html_content)
+            else:
+                from bs4 import BeautifulSoup
+                soup = BeautifulSoup(html_content, 'html.parser')
+                body = soup.find('body')
+                if body:
+                    self._process_html_to_docx(doc, body)
+
+        stream = io.BytesIO()
+        doc.save(stream)
+        return stream.getvalue()
+
     def _process_html_to_docx(self, doc, element):
         """
         Przetwarza elementy HTML do DOCX.
         Obsługuje: nagłówki, akapity, tabele, listy, obrazki.
         """
+        from docx.shared import Pt, Inches
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+
         for child in element.children:
             if isinstance(child, str):
                 text = child.strip()
@@ -297,96 +358,36 @@ class PDFGenerator:
         Dodaje tabelę HTML do DOCX.
 
         UWAGI:
-        - word_table.style = 'Table Grid' → tabela Z obramowaniem
-        - word_table.style = 'Plain Table 1' → tabela BEZ obramowania (lub zostaw None)
-        - Możesz też ręcznie usunąć obramowanie pętlą po komórkach
+        - Tabela zapisywana jest jednym przebiegiem XML (write_table_xml), razem ze scaleniami
+        - style='Table Grid' → tabela Z obramowaniem
+        - style=None → tabela BEZ obramowania
         """
+        from src.utils.docx_table_writer import write_table_xml
+
         rows = table_element.find_all('tr')
         if not rows:
             return
 
-        # Policz maksymalną liczbę kolumn
-        cols_count = max(len(r.find_all(['th', 'td'])) for r in rows) if rows else 0
-        if cols_count == 0:
-            return
-
-        # Utwórz tabelę
-        word_table = doc.add_table(rows=len(rows), cols=cols_count)
-
-        # ===== STYL TABELI =====
-        # OPCJA 1: Tabela BEZ obramowania (odkomentuj poniższą linię)
-        # word_table.style = None
-
-        # OPCJA 2: Tabela Z obramowaniem (odkomentuj poniższą linię)
-        word_table.style = 'Table Grid'
-
-        # OPCJA 3: Ręczne usunięcie obramowania (odkomentuj poniższą pętlę)
-        # from docx.oxml import OxmlElement
-        # from docx.oxml.ns import qn
-        # for row in word_table.rows:
-        #     for cell in row.cells:
-        #         tc = cell._tc
-        #         tcPr = tc.get_or_add_tcPr()
-        #         tcBorders = OxmlElement('w:tcBorders')
-        #         for border_name in ['top', 'left', 'bottom', 'right']:
-        #             border = OxmlElement(f'w:{border_name}')
-        #             border.set(qn('w:val'), 'none')
-        #             tcBorders.append(border)
-        #         tcPr.append(tcBorders)
-
-        # Wypełnij komórki
-        for row_idx, row in enumerate(rows):
-            cells = row.find_all(['th', 'td'])
-
-            word_col_idx = 0
-            for html_cell in cells:
-                if word_col_idx >= cols_count:
-                    break
-
-                word_cell = word_table.rows[row_idx].cells[word_col_idx]
-                text = html_cell.get_text().strip()
-
-                # Ustaw tekst
-                for p in word_cell.paragraphs:
-                    p.clear()
-                word_cell.paragraphs[0].text = text
-
-                # Rowspan/Colspan
-                rowspan = int(html_cell.get('rowspan', 1))
-                colspan = int(html_cell.get('colspan', 1))
-
-                # Formatowanie nagłówków
-                is_header = (html_cell.name == 'th')
-
+        table_rows = []
+        for row in rows:
+            cells = []
+            for html_cell in row.find_all(['th', 'td']):
                 # Wyrównanie komórki
                 style = html_cell.get('style', '')
                 align = None
                 if 'text-align: center' in style or 'text-align:center' in style:
-                    align = WD_ALIGN_PARAGRAPH.CENTER
+                    align = 'center'
                 elif 'text-align: right' in style or 'text-align:right' in style:
-                    align = WD_ALIGN_PARAGRAPH.RIGHT
-
-                # ZAKOMENTUJ PONIŻSZE JEŚLI NIE CHCESZ AUTO-POGRUBIENIA NAGŁÓWKÓW
-                # if is_header:
-                #     for run in word_cell.paragraphs[0].runs:
-                #         run.font.bold = True
-
-                # Scalanie komórek
-                if colspan > 1 or rowspan > 1:
-                    try:
-                        end_row_idx = row_idx + rowspan - 1
-                        end_col_idx = word_col_idx + colspan - 1
-
-                        if end_row_idx < len(rows) and end_col_idx < cols_count:
-                            end_cell = word_table.rows[end_row_idx].cells[end_col_idx]
-                            word_cell.merge(end_cell)
-                    except Exception as e:
-                        print(f"Błąd scalania komórek: {e}")
-
-                # Zastosuj wyrównanie
-                if align:
-                    for p in word_cell.paragraphs:
-                        p.alignment = align
-
-                word_col_idx += colspan
-
+                    align = 'right'
+
+                cells.append({
+                    'text': html_cell.get_text().strip(),
+                    'align': align,
+                    'rowspan': int(html_cell.get('rowspan', 1)),
+                    'colspan': int(html_cell.get('colspan', 1)),
+                    # ZMIEŃ NA (html_cell.name == 'th') JEŚLI CHCESZ AUTO-POGRUBIENIA NAGŁÓWKÓW
+                    'header': False,
+                })
+            table_rows.append(cells)
+
+        write_table_xml(doc, table_rows, style='Table Grid')
@@ -0,0 +1,113 @@
+# services/regeneration.py
+
+"""
+Regeneration - Ponowne wydanie deklaracji po zmianie danych master
+1. Zmienione substancje SML / surowce Dual Use / folie → dotknięte folie (WhereUsedIndex).
+2. Folie → wydane deklaracje z dziennika (declaration_history) i kombinacje (struktura, język).
+3. Każda unikalna deklaracja budowana jest od nowa z aktualnych danych; renderowanie i manifest - src/cli.py.
+"""
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from src.models.declaration import Declaration
+from src.services import declaration_factory as factory
+from src.services.declaration_history import affected_declarations
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def affected_materials(data_loader, substance_ids: Iterable = (), dual_use_ids: Iterable = (),
+                       materials: Iterable[str] = ()) -> List[str]:
+    """Folie zawierające którąkolwiek ze zmienionych substancji / surowców (plus podane wprost)"""
+    where_used = data_loader.get_where_used()
+    result = set(materials)
+    for s_id in substance_ids:
+        result.update(where_used.materials_using(s_id))
+    for d_id in dual_use_ids:
+        result.update(where_used.materials_using(d_id, dual_use=True))
+    return sorted(result)
+
+
+def _declaration_key(entry: Dict) -> str:
+    """Tożsamość deklaracji niezależna od formatu pliku i chwili wydania"""
+    return json.dumps([
+        entry.get('type'), entry.get('structure'), entry.get('language'), entry.get('product'),
+        entry.get('client_data') or entry.get('client'), entry.get('batches'),
+    ], sort_keys=True, ensure_ascii=False)
+
+
+def plan_regeneration(data_loader, substance_ids: Iterable = (), dual_use_ids: Iterable = (),
+                      materials: Iterable[str] = (), since: Optional[str] = None,
+                      history_path: Optional[Path] = None) -> Dict:
+    """
+    Zakres ponownego wydania.
+
+    Returns: {
+        'materials': [...],            # dotknięte folie
+        'declarations': [...],         # unikalne wpisy dziennika (najnowszy z każdej grupy)
+        'combinations': [(struktura, język), ...]
+    }
+    """
+    materials = affected_materials(data_loader, substance_ids, dual_use_ids, materials)
+
+    declarations, seen = [], set()
+    for entry in affected_declarations(materials, history_path):  # od najnowszej
+        if since and entry.get('ts', '') < since:
+            continue
+        key = _declaration_key(entry)
+        if key not in seen:
+            seen.add(key)
+            declarations.append(entry)
+
+    combinations = sorted({(entry.get('structure', ''), entry.get('language', 'pl')) for entry in declarations})
+    return {'materials': materials, 'declarations': declarations, 'combinations': combinations}
+
+
+def rebuild_declaration(data_loader, entry: Dict) -> Declaration:
+    """Buduje deklarację z wpisu dziennika na podstawie aktualnych danych materiałów"""
+    materials = factory.match_structure(data_loader, entry.get('structure', ''))
+    language = entry.get('language', 'pl')
+
+    if entry.get('type') == 'bok':
+        client_data = entry.get('client_data') or {'name': entry.get('client') or ''}
+        # Starsze wpisy zawierały tylko numery partii
+        batches = [factory.batch_from_dict(b) if isinstance(b, dict) else factory.batch_from_dict({'batch_number': b})
+                   for b in entry.get('batches', [])]
+        return factory.build_bok_declaration(data_loader, materials, factory.client_from_dict(client_data),
+                                             batches, language=language)
+
+    return factory.build_tech_declaration(data_loader, materials, language,
+                                          product_name=entry.get('product') or None)
+
+
+def write_manifest(output_dir: Path, trigger: Dict, plan: Dict, items: List[Dict]) -> Path:
+    """
+    Zapisuje manifest ponownego wydania.
+    items: [{'source': wpis dziennika, 'files': [...], 'error': str | None}]
+    """
+    manifest = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'trigger': trigger,
+        'materials': plan['materials'],
+        'combinations': [list(c) for c in plan['combinations']],
+        'declarations': [
+            {
+                'type': item['source'].get('type'),
+                'structure': item['source'].get('structure'),
+                'language': item['source'].get('language'),
+                'product': item['source'].get('product'),
+                'client': item['source'].get('client'),
+                'previous': {'ts': item['source'].get('ts'), 'output': item['source'].get('output')},
+                'files': item.get('files', []),
+                'error': item.get('error'),
+            }
+            for item in items
+        ],
+    }
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / MANIFEST_NAME
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return path
@@ -0,0 +1,81 @@
+# services/render_session.py
+
+"""
+RenderSession - Wynik renderowania jednej migawki deklaracji
+Kontekst, HTML, PDF i DOCX są liczone leniwie i tylko raz - Podgląd, PDF i DOCX
+klikane po sobie korzystają z tych samych danych zamiast renderować od nowa
+"""
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.models.declaration import Declaration
+from src.services import declaration_history
+from src.utils.atomic_io import atomic_write_bytes
+
+
+class RenderSession:
+    """Wyrenderowana migawka deklaracji (unieważniana przez widok przy zmianie formularza, danych lub szablonu)"""
+
+    def __init__(self, generator, declaration: Declaration, key=None):
+        """
+        Args:
+            generator: PDFGenerator wykonujący renderowanie
+            declaration: Migawka deklaracji - nie może być modyfikowana po utworzeniu sesji
+            key: Odcisk formularza + wersji danych i szablonu, z których zbudowano deklarację (matches())
+        """
+        self.generator = generator
+        self.declaration = declaration
+        self.key = key
+
+        self._context: Optional[Dict] = None
+        self._html: Optional[str] = None
+        self._pdf: Optional[bytes] = None
+        self._docx: Optional[bytes] = None
+        self._preview_path: Optional[Path] = None
+
+    def matches(self, key) -> bool:
+        """Czy sesja jest aktualna dla podanego stanu formularza"""
+        return key is not None and self.key == key
+
+    @property
+    def context(self) -> Dict:
+        """Kontekst szablonu (teksty, obrazy, dane modelu) - wspólna postać pośrednia dla HTML i DOCX"""
+        if self._context is None:
+            self._context = self.generator._prepare_context(self.declaration)
+        return self._context
+
+    @property
+    def html(self) -> str:
+        if self._html is None:
+            self._html = self.generator.render_html(self.declaration, self.context)
+        return self._html
+
+    def pdf_bytes(self) -> bytes:
+        if self._pdf is None:
+            self._pdf = self.generator.html_to_pdf_bytes(self.html)
+        return self._pdf
+
+    def docx_bytes(self) -> bytes:
+        if self._docx is None:
+            self._docx = self.generator.docx_bytes(self.declaration, self.context)
+        return self._docx
+
+    def preview_path(self) -> Path:
+        """Plik podglądu HTML - zapisywany ponownie tylko jeśli nadpisała go inna sesja"""
+        if self._preview_path is None or self.generator._preview_session is not self:
+            self._preview_path = self.generator.write_preview(self.html)
+            self.generator._preview_session = self
+        return self._preview_path
+
+    def write_pdf(self, output_path: str):
+        content = self.pdf_bytes()  # Najpierw renderowanie - błąd nie zostawia pustego pliku
+        atomic_write_bytes(output_path, content)
+        declaration_history.record(self.declaration, output_path, 'pdf')
+
+    def write_docx(self, output_path: str):
+        content = self.docx_bytes()
+        try:
+            atomic_write_bytes(output_path, content)
+        except Exception as e:
+            raise Exception(f"Nie udało się zapisać pliku DOCX: {e}")
+        declaration_history.record(self.declaration, output_path, 'docx')
@@ -0,0 +1,391 @@
+# services/sml_importer.py
+
+"""
+SmlImporter - Import list SML / Dual Use od dostawców (CSV lub XLSX) do materials.json
+- wiersze czytane strumieniowo (csv.reader / openpyxl read_only),
+- dopasowanie do bazy master przez MasterIndex: Nr REF / Symbol E → CAS → nazwa EN,
+- brakujące substancje dostają nowe ID techniczne w słowniku master,
+- plan_import() nic nie zmienia (podgląd różnic), apply_import() zapisuje tylko rekordy z planu.
+"""
+import csv
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.utils.master_index import MasterIndex
+
+KINDS = ('sml', 'dual_use')
+MODES = ('merge', 'replace')
+
+# Nagłówek kolumny (po normalizacji) → pole
+HEADER_ALIASES = {
+    'cas': 'cas', 'nrcas': 'cas', 'casno': 'cas', 'casnumber': 'cas', 'numercas': 'cas',
+    'ref': 'ref_no', 'refno': 'ref_no', 'nrref': 'ref_no', 'pmref': 'ref_no', 'fcmref': 'ref_no',
+    'refnumber': 'ref_no', 'pmrefno': 'ref_no',
+    'e': 'e_symbol', 'esymbol': 'e_symbol', 'symbole': 'e_symbol', 'enumber': 'e_symbol', 'enr': 'e_symbol',
+    'name': 'name_en', 'nameen': 'name_en', 'nazwaen': 'name_en', 'substance': 'name_en',
+    'substancename': 'name_en', 'englishname': 'name_en',
+    'nazwa': 'name_pl', 'namepl': 'name_pl', 'nazwapl': 'name_pl', 'substancja': 'name_pl',
+    'sml': 'value', 'value': 'value', 'limit': 'value', 'smlmgkg': 'value', 'wartosc': 'value',
+    'wartoscsml': 'value', 'wartośćsml': 'value', 'wartość': 'value', 'smlvalue': 'value',
+}
+EMPTY_VALUES = {'', '-', '--', 'n/a', 'na', 'nd', 'n.d.', 'brak', 'none'}
+
+# Kolejność dopasowania do master
+MATCH_FIELDS = {
+    'sml': ('ref_no', 'cas', 'name_en'),
+    'dual_use': ('e_symbol', 'cas', 'name_en'),
+}
+MASTER_FIELDS = {
+    'sml': ('cas', 'name_en', 'name_pl', 'ref_no'),
+    'dual_use': ('cas', 'name_en', 'name_pl', 'e_symbol'),
+}
+
+
+# === CZYTANIE PLIKÓW ===
+
+def _normalize_header(name) -> str:
+    text = re.sub(r'\[.*?\]|\(.*?\)', '', str(name or '')).lower()  # jednostki w nawiasach
+    return re.sub(r'[^0-9a-ząćęłńóśźż]', '', text)
+
+
+def _clean(value) -> str:
+    text = str(value).strip() if value is not None else ''
+    return '' if text.lower() in EMPTY_VALUES else text
+
+
+def _map_header(header: Iterable) -> Dict[int, str]:
+    """{numer kolumny: pole}; nierozpoznane kolumny są pomijane"""
+    mapping = {}
+    for col, name in enumerate(header):
+        field = HEADER_ALIASES.get(_normalize_header(name))
+        if field and field not in mapping.values():
+            mapping[col] = field
+    if not set(mapping.values()) & {'cas', 'ref_no', 'e_symbol', 'name_en'}:
+        raise ValueError(f"Nie rozpoznano kolumn (CAS / Nr REF / Symbol E / nazwa): {list(header)}")
+    return mapping
+
+
+def _iter_csv(path: Path) -> Iterator[List]:
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=';,\t').delimiter
+        except csv.Error:
+            delimiter = ';'
+        yield from csv.reader(f, delimiter=delimiter)
+
+
+def _iter_xlsx(path: Path, sheet: Optional[str]) -> Iterator[List]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Import plików XLSX wymaga biblioteki openpyxl (pip install openpyxl) - "
+                          "lub zapisz arkusz jako CSV")
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        for row in worksheet.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def read_rows(path, sheet: Optional[str] = None) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Strumień (nr wiersza w pliku, {pole: wartość}) - pierwszy niepusty wiersz to nagłówek"""
+    path = Path(path)
+    rows = _iter_xlsx(path, sheet) if path.suffix.lower() in ('.xlsx', '.xlsm') else _iter_csv(path)
+
+    mapping = None
+    for line, row in enumerate(rows, start=1):
+        if not any(_clean(cell) for cell in row):
+            continue
+        if mapping is None:
+            mapping = _map_header(row)
+            continue
+        yield line, {field: _clean(row[col]) for col, field in mapping.items() if col < len(row)}
+
+
+# === PLAN IMPORTU ===
+
+class ImportPlan:
+    """Wynik plan_import(): różnice do zastosowania (nic jeszcze nie zostało zmienione)"""
+
+    def __init__(self, material: str, supplier: str, kind: str, mode: str):
+        self.material = material
+        self.supplier = supplier
+        self.kind = kind
+        self.mode = mode
+        self.supplier_index: Optional[int] = None  # None = nowy wpis dostawcy
+        self.rows = 0
+        self.items: List = []  # docelowa lista 'sml' / 'dualUse' wpisu dostawcy
+        self.new_master: Dict[str, Dict] = {}  # nowe wpisy słownika master
+        self.master_updates: List[Tuple[str, str, str]] = []  # (id, pole, wartość) - uzupełnienie pustych pól
+        self.added: List[str] = []
+        self.updated: List[Tuple[str, object, object]] = []  # (id, stara, nowa wartość SML)
+        self.removed: List[str] = []
+        self.unchanged = 0
+        self.matched_by: Dict[str, int] = {}
+        self.errors: List[Tuple[int, str]] = []
+        self.warnings: List[Tuple[int, str]] = []
+
+    @property
+    def items_key(self) -> str:
+        return 'sml' if self.kind == 'sml' else 'dualUse'
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.updated or self.removed or self.new_master or self.master_updates
+                    or self.supplier_index is None)
+
+    def summary(self) -> str:
+        target = f"{self.material} / {self.supplier}" + (" (nowy dostawca)" if self.supplier_index is None else "")
+        matched = ", ".join(f"{field}: {count}" for field, count in sorted(self.matched_by.items())) or "-"
+        return (f"{target} [{self.kind}, {self.mode}]: wierszy {self.rows}, "
+                f"dodane {len(self.added)}, zmienione {len(self.updated)}, usunięte {len(self.removed)}, "
+                f"bez zmian {self.unchanged}, nowe w master {len(self.new_master)}, "
+                f"uzupełnione pola master {len(self.master_updates)}, błędy {len(self.errors)} "
+                f"(dopasowanie - {matched})")
+
+    def format_diff(self, master: Dict[str, Dict], limit: int = 200) -> str:
+        """Różnice w postaci tekstowej (+ dodane, ~ zmienione, - usunięte, * nowe w master)"""
+        def describe(s_id):
+            entry = self.new_master.get(s_id) or master.get(s_id, {})
+            code = entry.get('ref_no') or entry.get('e_symbol') or ''
+            return " | ".join(p for p in (s_id, entry.get('cas', ''), entry.get('name_en', ''), code) if p)
+
+        lines = [self.summary()]
+        lines += [f"* {describe(s_id)}" for s_id in self.new_master]
+        lines += [f"* {s_id}.{field} = {value}" for s_id, field, value in self.master_updates]
+        lines += [f"+ {describe(s_id)}" for s_id in self.added]
+        lines += [f"~ {describe(s_id)}: {old} → {new}" for s_id, old, new in self.updated]
+        lines += [f"- {describe(s_id)}" for s_id in self.removed]
+        lines += [f"! wiersz {line}: {message}" for line, message in self.errors]
+        lines += [f"? wiersz {line}: {message}" for line, message in self.warnings]
+        if len(lines) > limit + 1:
+            lines = lines[:limit + 1] + [f"... (+{len(lines) - limit - 1} wierszy)"]
+        return "\n".join(lines)
+
+
+def _parse_value(text: str) -> float:
+    return float(text.replace(' ', '').replace(',', '.')) if text else 0.0
+
+
+def _item_id(item, kind: str) -> str:
+    return str(item.get('substanceId')) if kind == 'sml' else str(item)
+
+
+def plan_import(rows: Iterable[Tuple[int, Dict[str, str]]], materials_db: Dict, index: MasterIndex,
+                material: str, supplier: str, kind: str = 'sml', mode: str = 'merge',
+                create_missing: bool = True) -> ImportPlan:
+    """
+    Porównuje wiersze pliku z wpisem dostawcy i bazą master (bez modyfikacji danych).
+    mode='merge' - dodaje / aktualizuje; 'replace' - lista dostawcy = zawartość pliku.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Nieznany rodzaj listy: {kind} (dozwolone: {', '.join(KINDS)})")
+    if mode not in MODES:
+        raise ValueError(f"Nieznany tryb: {mode} (dozwolone: {', '.join(MODES)})")
+
+    plan = ImportPlan(material, supplier, kind, mode)
+    entries = materials_db.get('materials', {}).get(material, [])
+    plan.supplier_index = next((i for i, e in enumerate(entries) if e.get('supplier') == supplier), None)
+    current = entries[plan.supplier_index].get(plan.items_key, []) if plan.supplier_index is not None else []
+    current_values = {_item_id(item, kind): (item.get('value') if kind == 'sml' else None) for item in current}
+
+    master = index.master
+    match_fields = MATCH_FIELDS[kind]
+    master_fields = MASTER_FIELDS[kind]
+    pending: Dict[Tuple[str, str], str] = {}  # (pole, wartość) → ID nowego wpisu z tego pliku
+    next_id = int(index.next_id)
+    incoming: Dict[str, Optional[float]] = {}  # ID → wartość SML (kolejność z pliku)
+    filled = set()  # (ID, pole) już uzupełnione z wcześniejszego wiersza
+
+    for line, row in rows:
+        plan.rows += 1
+        value = None
+        if kind == 'sml':
+            try:
+                value = _parse_value(row.get('value', ''))
+            except ValueError:
+                plan.errors.append((line, f"niepoprawna wartość SML: {row.get('value')}"))
+                continue
+
+        # Dopasowanie do master (pierwsze pole z wartością i trafieniem)
+        s_id, matched_field = None, None
+        for field in match_fields:
+            if not row.get(field):
+                continue
+            s_id = index.find(row[field], fields=(field,)) or pending.get((field, row[field].lower()))
+            if s_id:
+                matched_field = field
+                break
+
+        if s_id is None:
+            if not create_missing:
+                plan.errors.append((line, "brak w bazie master: " + ", ".join(
+                    f"{f}={row[f]}" for f in match_fields if row.get(f))))
+                continue
+            s_id = str(next_id)
+            next_id += 1
+            plan.new_master[s_id] = {field: row.get(field, '') for field in master_fields}
+            matched_field = 'nowa'
+        else:
+            # Inne pola wskazują na inny wpis - niespójność w pliku lub w master
+            for field in match_fields:
+                other = index.find(row[field], fields=(field,)) if row.get(field) else None
+                if other and other != s_id:
+                    plan.warnings.append((line, f"{matched_field}={row[matched_field]} → ID {s_id}, "
+                                                f"ale {field}={row[field]} → ID {other}"))
+                    break
+            if s_id in master:
+                for field in master_fields:
+                    if row.get(field) and not master[s_id].get(field) and (s_id, field) not in filled:
+                        filled.add((s_id, field))
+                        plan.master_updates.append((s_id, field, row[field]))
+
+        plan.matched_by[matched_field] = plan.matched_by.get(matched_field, 0) + 1
+        for field in match_fields:
+            if row.get(field):
+                pending.setdefault((field, row[field].lower()), s_id)
+
+        if s_id in incoming:
+            # Powtórzona substancja - jak przy agregacji struktury: najwyższa wartość SML
+            if kind == 'sml' and value > incoming[s_id]:
+                incoming[s_id] = value
+        else:
+            incoming[s_id] = value
+
+    # Różnice względem wpisu dostawcy
+    for s_id, value in incoming.items():
+        if s_id not in current_values:
+            plan.added.append(s_id)
+        elif kind == 'sml' and current_values[s_id] != value:
+            plan.updated.append((s_id, current_values[s_id], value))
+        else:
+            plan.unchanged += 1
+
+    if mode == 'replace':
+        plan.removed = [s_id for s_id in current_values if s_id not in incoming]
+        final = dict(incoming)
+    else:
+        final = dict(current_values)
+        final.update(incoming)
+
+    plan.items = [{"substanceId": int(s_id), "value": value} if kind == 'sml' else int(s_id)
+                  for s_id, value in final.items()]
+    return plan
+
+
+# === ZASTOSOWANIE ===
+
+def master_file(kind: str) -> Path:
+    from src.config.constants import SUBSTANCES_MASTER, DUAL_USE_MASTER
+    return SUBSTANCES_MASTER if kind == 'sml' else DUAL_USE_MASTER
+
+
+def apply_import(data_loader, plan: ImportPlan):
+    """
+    Zapisuje tylko rekordy z planu - nowe / uzupełnione wpisy master i wpis folii - budowane na kopiach
+    aktualnych wersji z dysku (inne niezapisane zmiany w dokumentach z cache nie są zapisywane).
+    Lista dostawcy: różnice z planu (dodane / zmienione / usunięte) nakładane na wersję z dysku -
+    pozycje dodane w międzyczasie przez innych zostają; ta sama wartość zmieniona inaczej → MergeConflictError.
+    Najpierw master (folia odwołuje się do nowych ID); gdy zapis folii się nie powiedzie,
+    zmiany master są wycofywane.
+    Raises: MergeConflictError - nowe ID master zajęte w międzyczasie przez innego użytkownika
+    """
+    from src.config.constants import MATERIALS_DB
+    from src.utils.json_merge import MergeConflictError
+
+    master_path = master_file(plan.kind)
+    fills: Dict[str, Dict[str, str]] = {}
+    for s_id, field, value in plan.master_updates:
+        fills.setdefault(s_id, {})[field] = value
+    originals: Dict[str, Optional[Dict]] = {}  # Wersje master sprzed importu (do wycofania)
+
+    def add_entry(s_id: str, entry: Dict):
+        def change(current):
+            if current is not None and current != entry:
+                raise MergeConflictError(master_path.name, [f"/{s_id}"])
+            originals[s_id] = current
+            return dict(entry)
+        return change
+
+    def fill_fields(s_id: str, fields: Dict[str, str]):
+        def change(current):
+            originals[s_id] = current
+            updated = dict(current or {})
+            for field, value in fields.items():
+                if not updated.get(field):  # Uzupełnienie tylko pustych pól, także w wersji z dysku
+                    updated[field] = value
+            return updated
+        return change
+
+    planned = {_item_id(item, plan.kind): item for item in plan.items}
+
+    def set_supplier(current):
+        # Różnice z planu nakładane na wersję z dysku - wpisy dodane w międzyczasie przez innych zostają
+        entries = [dict(entry) for entry in (current or [])]
+        index = next((i for i, e in enumerate(entries) if e.get('supplier') == plan.supplier), None)
+        if index is None:
+            entries.append({"supplier": plan.supplier, "sml": [], "dualUse": []})
+            index = len(entries) - 1
+        items = [dict(item) if isinstance(item, dict) else item for item in entries[index].get(plan.items_key, [])]
+        removed = set(plan.removed)
+        items = [item for item in items if _item_id(item, plan.kind) not in removed]
+        positions = {_item_id(item, plan.kind): i for i, item in enumerate(items)}
+
+        for s_id, old, new in plan.updated:
+            if s_id not in positions:
+                items.append(dict(planned[s_id]))  # Usunięta w międzyczasie - dodana ponownie z pliku
+                continue
+            value = items[positions[s_id]].get('value')
+            if value != old and value != new:
+                raise MergeConflictError(Path(MATERIALS_DB).name, [f"/materials/{plan.material}/{s_id}"])
+            items[positions[s_id]]['value'] = new
+        for s_id in plan.added:
+            if s_id not in positions:
+                items.append(dict(planned[s_id]) if plan.kind == 'sml' else planned[s_id])
+                positions[s_id] = len(items) - 1
+            elif plan.kind == 'sml':
+                value = items[positions[s_id]].get('value')
+                if value != planned[s_id]['value']:
+                    raise MergeConflictError(Path(MATERIALS_DB).name, [f"/materials/{plan.material}/{s_id}"])
+
+        entries[index][plan.items_key] = items
+        entries[index]["lastUpdated"] = datetime.now().isoformat()
+        plan.supplier_index = index
+        return entries
+
+    master_changes = {s_id: add_entry(s_id, entry) for s_id, entry in plan.new_master.items()}
+    master_changes.update({s_id: fill_fields(s_id, fields) for s_id, fields in fills.items()
+                           if s_id not in master_changes})
+    written = data_loader.update_records(master_path, master_changes) if master_changes else {}
+
+    try:
+        data_loader.update_records(MATERIALS_DB, {plan.material: set_supplier}, section='materials')
+    except Exception:
+        if written:
+            # Tylko rekordy, których nikt w międzyczasie nie zmienił
+            def restore(s_id: str):
+                return lambda current: originals[s_id] if current == written[s_id] else current
+            try:
+                data_loader.update_records(master_path, {s_id: restore(s_id) for s_id in written})
+            except Exception as e:
+                print(f"⚠️ Nie udało się wycofać zmian w {master_path.name}: {e}")
+        raise
+
+
+def import_file(data_loader, path, material: str, supplier: str, kind: str = 'sml', mode: str = 'merge',
+                sheet: Optional[str] = None, create_missing: bool = True, dry_run: bool = False) -> ImportPlan:
+    """Czyta plik, buduje plan i (jeśli nie dry_run) zapisuje zmiany"""
+    from src.config.constants import MATERIALS_DB
+
+    index = MasterIndex(data_loader.load_json(master_file(kind)))
+    plan = plan_import(read_rows(path, sheet), data_loader.load_json(MATERIALS_DB), index,
+                       material, supplier, kind=kind, mode=mode, create_missing=create_missing)
+    if not dry_run and plan.has_changes:
+        apply_import(data_loader, plan)
+    return plan
@@ -0,0 +1,520 @@
+# services/sqlite_store.py
+
+"""
+SqliteStore - Alternatywny magazyn danych master (jedna baza SQLite zamiast pięciu plików JSON)
+Włączany zmienną DECLGEN_DATA_DB (ścieżka do bazy) albo stałą DATA_DB w constants.py.
+- Tabele z indeksami: folie, dostawcy, wpisy SML, powiązania Dual Use, bazy master, teksty.
+- DataLoader dostaje te same słowniki co z JSON (load) - widoki i edytory bez zmian.
+- Zapis (save) porównuje rekordy z wersją z chwili odczytu i zmienia tylko różniące się wiersze.
+- Agregacja struktury (structure_data) to jedno zapytanie GROUP BY z MAX po indeksach.
+- Migracja / eksport z i do układu JSON: migrate_from_json(), export_to_json(), CLI 'db-migrate' / 'db-export'.
+Tryb WAL; dla bazy na udziale sieciowym (\\\\serwer\\...) dziennik DELETE - WAL wymaga pamięci współdzielonej.
+"""
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.utils.json_merge import MergeConflictError
+
+ENV_DATA_DB = 'DECLGEN_DATA_DB'
+
+KINDS = ('materials', 'substances', 'dual_use', 'texts_pl', 'texts_en')
+MASTER_KINDS = {'substances': 'substances', 'dual_use': 'dual_use'}  # rodzaj → tabela
+TEXT_LANGUAGES = {'texts_pl': 'pl', 'texts_en': 'en'}
+
+# Kolumny bez typu (value, dual_use_id, pola master) - SQLite zwraca wartości bez konwersji (5 ≠ 5.0 ≠ '5')
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS materials (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS suppliers (
+    id INTEGER PRIMARY KEY,
+    material TEXT NOT NULL REFERENCES materials(name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    supplier,
+    last_updated,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_suppliers_material ON suppliers(material, position);
+CREATE TABLE IF NOT EXISTS sml_entries (
+    supplier_id INTEGER NOT NULL REFERENCES suppliers(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    substance_key TEXT NOT NULL,
+    value,
+    data TEXT NOT NULL,
+    PRIMARY KEY (supplier_id, position)
+);
+CREATE INDEX IF NOT EXISTS ix_sml_substance ON sml_entries(substance_key);
+CREATE TABLE IF NOT EXISTS dual_use_links (
+    supplier_id INTEGER NOT NULL REFERENCES suppliers(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    dual_use_key TEXT NOT NULL,
+    dual_use_id NOT NULL,
+    PRIMARY KEY (supplier_id, position)
+);
+CREATE INDEX IF NOT EXISTS ix_dual_use_links ON dual_use_links(dual_use_key);
+CREATE TABLE IF NOT EXISTS substances (
+    id TEXT PRIMARY KEY,
+    ref_no,
+    cas,
+    name_pl,
+    name_en,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_substances_cas ON substances(cas);
+CREATE INDEX IF NOT EXISTS ix_substances_ref ON substances(ref_no);
+CREATE TABLE IF NOT EXISTS dual_use (
+    id TEXT PRIMARY KEY,
+    e_symbol,
+    cas,
+    name_pl,
+    name_en,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_dual_use_cas ON dual_use(cas);
+CREATE INDEX IF NOT EXISTS ix_dual_use_e_symbol ON dual_use(e_symbol);
+CREATE TABLE IF NOT EXISTS texts (
+    language TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (language, key)
+);
+CREATE TABLE IF NOT EXISTS document_meta (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+"""
+
+# Kolejność wpisów w strukturze: materiał, dostawca, pozycja na liście (jak pętla w build_structure_data)
+_ORDER_KEY = "p.ord * 1000000000000 + sp.position * 1000000 + {alias}.position"
+
+
+def data_store_path() -> Optional[Path]:
+    """Ścieżka bazy SQLite lub None (magazyn JSON)"""
+    override = os.environ.get(ENV_DATA_DB)
+    if override:
+        return Path(override)
+    from src.config import constants
+    path = getattr(constants, 'DATA_DB', None)
+    return Path(path) if path else None
+
+
+def document_kinds() -> Dict[str, str]:
+    """{ścieżka pliku JSON: rodzaj dokumentu w bazie}"""
+    from src.config.constants import MATERIALS_DB, SUBSTANCES_MASTER, DUAL_USE_MASTER, TEXTS_PL, TEXTS_EN
+    return {
+        str(MATERIALS_DB): 'materials',
+        str(SUBSTANCES_MASTER): 'substances',
+        str(DUAL_USE_MASTER): 'dual_use',
+        str(TEXTS_PL): 'texts_pl',
+        str(TEXTS_EN): 'texts_en',
+    }
+
+
+class SnapshotMissingError(MergeConflictError):
+    """Brak migawki rekordów dla zapisywanego dokumentu (usunięty z cache / wczytany ponownie)"""
+
+    def __init__(self, label: str):
+        self.paths = []
+        Exception.__init__(self, f"Dane {label} zostały w międzyczasie wczytane ponownie lub usunięte z pamięci - "
+                                 f"nie można ustalić, co zmieniono. Odśwież dane i wprowadź zmiany ponownie.")
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+def _field(entry, key):
+    return entry.get(key) if isinstance(entry, dict) else None
+
+
+class SqliteStore:
+    """Dokumenty JSON (materials, bazy master, teksty) w tabelach SQLite"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self._snapshots: Dict[str, Dict] = {}  # {rodzaj: {klucz rekordu: JSON z chwili odczytu}}
+        self._versions: Dict[str, int] = {}  # {rodzaj: PRAGMA data_version z chwili odczytu}
+        self._owners: Dict[str, int] = {}  # {rodzaj: id dokumentu, do którego należy migawka}
+
+    # === POŁĄCZENIE ===
+
+    def _connection(self) -> sqlite3.Connection:
+        """Połączenie na proces (procesy robocze render_server / CLI otwierają własne)"""
+        if self._conn is None or self._pid != os.getpid():
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=10, isolation_level=None, check_same_thread=False)
+            journal = 'delete' if str(self.db_path).startswith('\\\\') else 'wal'
+            conn.execute(f"PRAGMA journal_mode={journal}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+            self._snapshots.clear()
+            self._versions.clear()
+            self._owners.clear()
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def _data_version(self, conn) -> int:
+        return conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # === ODCZYT ===
+
+    def load(self, kind: str) -> Dict:
+        """Dokument w układzie pliku JSON"""
+        with self._lock:
+            conn = self._connection()
+            records = self._read_records(conn, kind)
+            self._snapshots[kind] = {key: _dumps(value) for key, value in records.items()}
+            self._versions[kind] = self._data_version(conn)
+            document = self._document(kind, records)
+            self._owners[kind] = id(document)
+            return document
+
+    def snapshot_size(self, kind: str) -> int:
+        """Rozmiar dokumentu w bajtach JSON (rozliczanie cache w DataLoader)"""
+        return sum(len(value) for value in self._snapshots.get(kind, {}).values())
+
+    def forget(self, kind: str):
+        """Zwalnia migawkę rekordów (dokument usunięty z cache) - zapis tego dokumentu wymaga ponownego odczytu"""
+        with self._lock:
+            self._snapshots.pop(kind, None)
+            self._versions.pop(kind, None)
+            self._owners.pop(kind, None)
+
+    def _read_records(self, conn, kind: str, keys: Optional[Iterable] = None) -> Dict:
+        """{klucz rekordu: wartość}; keys=None - wszystkie rekordy"""
+        if kind == 'materials':
+            names = None if keys is None else [k[1] for k in keys if k[0] == 'materials']
+            meta = None if keys is None else [k[1] for k in keys if k[0] == 'meta']
+            records = {('materials', name): suppliers for name, suppliers in self._read_materials(conn, names).items()}
+            records.update({('meta', key): value for key, value in self._read_meta(conn, kind, meta).items()})
+            return records
+        if kind in MASTER_KINDS:
+            sql = f"SELECT id, data FROM {MASTER_KINDS[kind]}"
+            return {row[0]: json.loads(row[1]) for row in self._select(conn, sql, 'id', keys, "ORDER BY rowid")}
+        language = TEXT_LANGUAGES[kind]
+        sql = "SELECT key, data FROM texts WHERE language = ?"
+        return {row[0]: json.loads(row[1])
+                for row in self._select(conn, sql, 'key', keys, "ORDER BY rowid", (language,))}
+
+    @staticmethod
+    def _select(conn, sql: str, key_column: str, keys: Optional[Iterable], order: str, params: tuple = ()):
+        if keys is None:
+            return conn.execute(f"{sql} {order}", params).fetchall()
+        keys = list(keys)
+        rows = []
+        joiner = 'AND' if 'WHERE' in sql else 'WHERE'
+        for start in range(0, len(keys), 500):  # Limit parametrów SQLite
+            chunk = keys[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows.extend(conn.execute(f"{sql} {joiner} {key_column} IN ({placeholders}) {order}",
+                                     params + tuple(chunk)).fetchall())
+        return rows
+
+    def _read_materials(self, conn, names: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+        materials = {row[0]: [] for row in self._select(conn, "SELECT name FROM materials", 'name', names,
+                                                        "ORDER BY rowid")}
+        if not materials:
+            return materials
+        material_filter = "" if names is None else \
+            f"WHERE sp.material IN ({', '.join('?' for _ in materials)})"
+        params = () if names is None else tuple(materials)
+
+        suppliers = {}
+        for s_id, material, data in conn.execute(
+                f"SELECT sp.id, sp.material, sp.data FROM suppliers sp {material_filter} "
+                f"ORDER BY sp.material, sp.position", params):
+            entry = json.loads(data)
+            entry['sml'], entry['dualUse'] = [], []
+            suppliers[s_id] = entry
+            materials[material].append(entry)
+        for s_id, data in conn.execute(
+                f"SELECT e.supplier_id, e.data FROM sml_entries e JOIN suppliers sp ON sp.id = e.supplier_id "
+                f"{material_filter} ORDER BY e.supplier_id, e.position", params):
+            suppliers[s_id]['sml'].append(json.loads(data))
+        for s_id, d_id in conn.execute(
+                f"SELECT l.supplier_id, l.dual_use_id FROM dual_use_links l JOIN suppliers sp ON sp.id = l.supplier_id "
+                f"{material_filter} ORDER BY l.supplier_id, l.position", params):
+            suppliers[s_id]['dualUse'].append(d_id)
+        for entry in suppliers.values():
+            # Klucze sml / dualUse zapisane tylko, jeśli były we wpisie
+            for key in ('sml', 'dualUse'):
+                if not entry[key] and key in entry.get('_absent', ()):
+                    del entry[key]
+            entry.pop('_absent', None)
+        return materials
+
+    def _read_meta(self, conn, kind: str, keys: Optional[List[str]] = None) -> Dict:
+        sql = "SELECT key, data FROM document_meta WHERE kind = ?"
+        return {row[0]: json.loads(row[1]) for row in self._select(conn, sql, 'key', keys, "ORDER BY rowid", (kind,))}
+
+    @staticmethod
+    def _document(kind: str, records: Dict) -> Dict:
+        if kind != 'materials':
+            return dict(records)
+        document = {'materials': {}}
+        for (group, key), value in records.items():
+            if group == 'materials':
+                document['materials'][key] = value
+            else:
+                document[key] = value
+        return document
+
+    @staticmethod
+    def _records(kind: str, document: Dict) -> Dict:
+        if kind != 'materials':
+            return dict(document)
+        records = {('materials', name): suppliers for name, suppliers in document.get('materials', {}).items()}
+        records.update({('meta', key): value for key, value in document.items() if key != 'materials'})
+        return records
+
+    # === ZAPIS ===
+
+    def save(self, kind: str, document: Dict, label: str = '') -> Tuple[bool, Optional[Set[str]]]:
+        """
+        Zapisuje tylko rekordy zmienione od odczytu (folia, wpis master, klucz tekstów).
+        Cudze zmiany w innych rekordach zostają; ten sam rekord zmieniony różnie → MergeConflictError.
+        Zwraca (scalono, nazwy zapisanych folii). scalono=True - baza zawierała zmiany innych
+        użytkowników, 'document' odświeżany w miejscu, a nazwy to None (zmienić się mogło wszystko).
+        Raises: SnapshotMissingError - brak migawki z odczytu tego dokumentu (bez niej każda różnica
+        względem bazy wyglądałaby na naszą zmianę i nadpisała cudze zapisy)
+        """
+        with self._lock:
+            conn = self._connection()
+            old = self._snapshots.get(kind)
+            if old is None or self._owners.get(kind) != id(document):
+                raise SnapshotMissingError(label or kind)
+            new = {key: _dumps(value) for key, value in self._records(kind, document).items()}
+            values = self._records(kind, document)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                others_changed = self._data_version(conn) != self._versions.get(kind)
+                changed = [key for key in set(old) | set(new) if old.get(key) != new.get(key)]
+
+                if changed and others_changed:
+                    current = {key: _dumps(value) for key, value in self._read_records(conn, kind, changed).items()}
+                    conflicts = [key for key in changed
+                                 if current.get(key) != old.get(key) and current.get(key) != new.get(key)]
+                    if conflicts:
+                        raise MergeConflictError(label or kind, sorted(self._path(kind, key) for key in conflicts))
+
+                for key in changed:
+                    self._write_record(conn, kind, key, values.get(key))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+            if others_changed:
+                records = self._read_records(conn, kind)
+                fresh = self._document(kind, records)
+                merged = fresh != document
+                if merged:
+                    document.clear()
+                    document.update(fresh)
+                self._snapshots[kind] = {key: _dumps(value) for key, value in records.items()}
+            else:
+                merged = False
+                self._snapshots[kind] = new
+            self._versions[kind] = self._data_version(conn)
+            if merged:
+                return True, None
+            return False, {key[1] for key in changed if kind == 'materials' and key[0] == 'materials'}
+
+    def update_records(self, kind: str, changes: Dict[object, Callable]) -> Dict:
+        """
+        Zmienia pojedyncze rekordy w jednej transakcji: {klucz: funkcja(aktualna wartość) → nowa / None}.
+        Funkcje dostają stan z bazy (nie dokument z pamięci); migawka bazowa tylko dla tych rekordów.
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = self._read_records(conn, kind, list(changes))
+                values = {key: change(current.get(key)) for key, change in changes.items()}
+                for key, value in values.items():
+                    self._write_record(conn, kind, key, value)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            snapshot = self._snapshots.get(kind)
+            if snapshot is not None:
+                for key, value in values.items():
+                    if value is None:
+                        snapshot.pop(key, None)
+                    else:
+                        snapshot[key] = _dumps(value)
+            return values
+
+    @staticmethod
+    def _path(kind: str, key) -> str:
+        return f"/{'/'.join(key)}" if kind == 'materials' else f"/{key}"
+
+    def _write_record(self, conn, kind: str, key, value):
+        """Jeden rekord: value=None - usunięcie"""
+        if kind == 'materials':
+            group, name = key
+            if group == 'meta':
+                self._write_meta(conn, kind, name, value)
+            elif value is None:
+                conn.execute("DELETE FROM materials WHERE name = ?", (name,))
+            else:
+                conn.execute("INSERT OR IGNORE INTO materials (name) VALUES (?)", (name,))
+                conn.execute("DELETE FROM suppliers WHERE material = ?", (name,))
+                self._insert_suppliers(conn, name, value)
+        elif kind in MASTER_KINDS:
+            table = MASTER_KINDS[kind]
+            if value is None:
+                conn.execute(f"DELETE FROM {table} WHERE id = ?", (key,))
+                return
+            columns = ('ref_no', 'cas', 'name_pl', 'name_en') if table == 'substances' else \
+                ('e_symbol', 'cas', 'name_pl', 'name_en')
+            updates = ", ".join(f"{c} = excluded.{c}" for c in columns + ('data',))
+            conn.execute(
+                f"INSERT INTO {table} (id, {', '.join(columns)}, data) VALUES (?, ?, ?, ?, ?, ?) "
+                f"ON CONFLICT(id) DO UPDATE SET {updates}",
+                (key, *(_field(value, c) for c in columns), _dumps(value)))
+        else:
+            language = TEXT_LANGUAGES[kind]
+            if value is None:
+                conn.execute("DELETE FROM texts WHERE language = ? AND key = ?", (language, key))
+            else:
+                conn.execute("INSERT INTO texts (language, key, data) VALUES (?, ?, ?) "
+                             "ON CONFLICT(language, key) DO UPDATE SET data = excluded.data",
+                             (language, key, _dumps(value)))
+
+    @staticmethod
+    def _write_meta(conn, kind: str, key: str, value):
+        if value is None:
+            conn.execute("DELETE FROM document_meta WHERE kind = ? AND key = ?", (kind, key))
+        else:
+            conn.execute("INSERT INTO document_meta (kind, key, data) VALUES (?, ?, ?) "
+                         "ON CONFLICT(kind, key) DO UPDATE SET data = excluded.data", (kind, key, _dumps(value)))
+
+    @staticmethod
+    def _insert_suppliers(conn, material: str, suppliers: List[Dict]):
+        for position, entry in enumerate(suppliers):
+            rest = {k: v for k, v in entry.items() if k not in ('sml', 'dualUse')}
+            absent = [k for k in ('sml', 'dualUse') if k not in entry]
+            if absent:
+                rest['_absent'] = absent
+            s_id = conn.execute(
+                "INSERT INTO suppliers (material, position, supplier, last_updated, data) VALUES (?, ?, ?, ?, ?)",
+                (material, position, entry.get('supplier'), entry.get('lastUpdated'), _dumps(rest))).lastrowid
+            conn.executemany(
+                "INSERT INTO sml_entries (supplier_id, position, substance_key, value, data) VALUES (?, ?, ?, ?, ?)",
+                [(s_id, i, str(item.get('substanceId')), item.get('value', 0), _dumps(item))
+                 for i, item in enumerate(entry.get('sml', []))])
+            conn.executemany(
+                "INSERT INTO dual_use_links (supplier_id, position, dual_use_key, dual_use_id) VALUES (?, ?, ?, ?)",
+                [(s_id, i, str(d_id), d_id) for i, d_id in enumerate(entry.get('dualUse', []))])
+
+    def replace(self, kind: str, document: Dict):
+        """Podmienia cały dokument (migracja z JSON)"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if kind == 'materials':
+                    conn.execute("DELETE FROM materials")
+                    conn.execute("DELETE FROM document_meta WHERE kind = ?", (kind,))
+                elif kind in MASTER_KINDS:
+                    conn.execute(f"DELETE FROM {MASTER_KINDS[kind]}")
+                else:
+                    conn.execute("DELETE FROM texts WHERE language = ?", (TEXT_LANGUAGES[kind],))
+                for key, value in self._records(kind, document).items():
+                    self._write_record(conn, kind, key, value)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._snapshots.pop(kind, None)
+            self._versions.pop(kind, None)
+            self._owners.pop(kind, None)
+
+    # === ZAPYTANIA ===
+
+    def structure_data(self, materials: List[str], language: str = 'pl') -> Dict:
+        """Jak DataLoader.build_structure_data, ale jako zapytania GROUP BY / DISTINCT po indeksach"""
+        picked = ", ".join("(?, ?)" for _ in materials)
+        params = tuple(v for i, name in enumerate(materials) for v in (name, i))
+        name_columns = ('name_en', 'name_pl') if language == 'en' else ('name_pl', 'name_en')
+
+        with self._lock:
+            conn = self._connection()
+            sml_rows = conn.execute(
+                f"WITH picked(name, ord) AS (VALUES {picked}) "
+                f"SELECT MAX(e.value), s.ref_no, s.cas, s.{name_columns[0]}, s.{name_columns[1]} "
+                f"FROM picked p "
+                f"JOIN suppliers sp ON sp.material = p.name "
+                f"JOIN sml_entries e ON e.supplier_id = sp.id "
+                f"LEFT JOIN substances s ON s.id = e.substance_key "
+                f"GROUP BY e.substance_key "
+                f"ORDER BY MIN({_ORDER_KEY.format(alias='e')})", params).fetchall()
+            dual_rows = conn.execute(
+                f"WITH picked(name, ord) AS (VALUES {picked}) "
+                f"SELECT DISTINCT l.dual_use_id, d.{name_columns[0]}, d.{name_columns[1]}, d.cas, d.e_symbol "
+                f"FROM picked p "
+                f"JOIN suppliers sp ON sp.material = p.name "
+                f"JOIN dual_use_links l ON l.supplier_id = sp.id "
+                f"LEFT JOIN dual_use d ON d.id = l.dual_use_key "
+                f"ORDER BY l.dual_use_id", params).fetchall()
+
+        substances_list = [
+            {'nr_ref': ref_no or '', 'nr_cas': cas or '', 'name': name or fallback or '', 'sml_limit': value}
+            for value, ref_no, cas, name, fallback in sml_rows
+        ]
+        dual_use_formatted = [
+            {'name': name or fallback, 'cas': cas or '', 'e_symbol': e_symbol or ''}
+            for _, name, fallback, cas, e_symbol in dual_rows
+            if name or fallback  # Tylko dane kompletne
+        ]
+        return {'substances': substances_list, 'dual_use': dual_use_formatted}
+
+
+def open_store() -> Optional[SqliteStore]:
+    """Magazyn SQLite, jeśli skonfigurowany (DataLoader używa go zamiast plików JSON)"""
+    path = data_store_path()
+    return SqliteStore(path) if path else None
+
+
+def migrate_from_json(store: SqliteStore, sources: Dict[str, Path]) -> Dict[str, int]:
+    """Wczytuje pliki JSON ({rodzaj: ścieżka}) do bazy; zwraca liczbę rekordów na rodzaj"""
+    counts = {}
+    for kind, path in sources.items():
+        if not Path(path).exists():
+            print(f"⚠️ Pomijam brakujący plik: {path}")
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            document = json.load(f)
+        store.replace(kind, document)
+        counts[kind] = len(document.get('materials', {})) if kind == 'materials' else len(document)
+    return counts
+
+
+def export_to_json(store: SqliteStore, targets: Dict[str, Path]) -> List[Path]:
+    """Zapisuje dokumenty z bazy do plików JSON ({rodzaj: ścieżka}) w układzie jak dotąd"""
+    written = []
+    for kind, path in targets.items():
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(store.load(kind), f, ensure_ascii=False, indent=2)
+        written.append(path)
+    return written
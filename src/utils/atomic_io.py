@@ -0,0 +1,144 @@
+# utils/atomic_io.py
+
+"""
+AtomicIO - Bezpieczny zapis współdzielonych plików na udziale sieciowym
+- file_stamp(): wersja pliku (mtime_ns, rozmiar) do wykrywania zmian innych użytkowników,
+- file_lock(): krótka blokada plikiem '<nazwa>.lock' z tokenem właściciela (O_EXCL działa także na SMB),
+- atomic_write_bytes(): zapis do pliku tymczasowego w tym samym folderze i os.replace().
+"""
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Tuple
+
+DEFAULT_LOCK_TIMEOUT = 10.0
+STALE_LOCK_SECONDS = 60.0
+
+Stamp = Tuple[int, int]
+
+
+def file_stamp(path: Path) -> Optional[Stamp]:
+    """(mtime_ns, rozmiar) lub None, jeśli pliku nie ma"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _share_time(directory: Path) -> float:
+    """Bieżący czas według serwera plików - mtime świeżo utworzonego pliku w tym samym folderze"""
+    probe = directory / f".clock.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(probe, 'wb'):
+            pass
+        return os.stat(probe).st_mtime
+    except OSError:
+        return time.time()  # Brak prawa zapisu - zegar lokalny
+    finally:
+        try:
+            os.remove(probe)
+        except OSError:
+            pass
+
+
+def _read_token(path: Path) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            return f.read().decode('utf-8', 'replace')
+    except FileNotFoundError:
+        return None
+
+
+def _take_over_stale(lock_path: Path, stale_token: Optional[str]):
+    """
+    Przejęcie nieaktualnej blokady: zmiana nazwy na unikalną (tylko jeden proces może to zrobić skutecznie).
+    Jeśli w międzyczasie ktoś założył nową blokadę i to ją przenieśliśmy - przywracamy ją.
+    """
+    moved = lock_path.with_name(f"{lock_path.name}.stale.{uuid.uuid4().hex}")
+    try:
+        os.rename(lock_path, moved)
+    except FileNotFoundError:
+        return  # Przejęta lub zwolniona przez kogoś innego
+    if _read_token(moved) != stale_token:
+        try:
+            os.link(moved, lock_path)  # Nie nadpisuje, jeśli blokada już istnieje
+        except OSError:
+            pass
+    else:
+        print(f"⚠️ Przejęto nieaktualną blokadę: {lock_path} ({stale_token})")
+    try:
+        os.remove(moved)
+    except OSError:
+        pass
+
+
+@contextmanager
+def file_lock(path: Path, timeout: float = DEFAULT_LOCK_TIMEOUT, stale_after: float = STALE_LOCK_SECONDS):
+    """
+    Blokada wyłączna dla 'path' na czas bloku with.
+    Plik blokady zawiera unikalny token właściciela - zwalniana jest tylko własna blokada.
+    Blokada starsza niż 'stale_after' s według zegara serwera (np. po awarii programu) jest przejmowana.
+    """
+    lock_path = Path(f"{path}.lock")
+    user = os.environ.get('USERNAME') or os.environ.get('USER') or ''
+    token = f"{os.getpid()} {user} {uuid.uuid4().hex}"
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    clock_offset = None  # Różnica zegara serwera względem lokalnego - mierzona raz, przy pierwszym oczekiwaniu
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                lock_mtime = os.stat(lock_path).st_mtime
+            except FileNotFoundError:
+                continue  # Zwolniona w międzyczasie
+            if clock_offset is None:
+                clock_offset = _share_time(lock_path.parent) - time.time()
+            if time.time() + clock_offset - lock_mtime > stale_after:
+                stale_token = _read_token(lock_path)
+                if stale_token is not None:
+                    _take_over_stale(lock_path, stale_token)
+                continue
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Plik {Path(path).name} jest zapisywany przez innego użytkownika - spróbuj ponownie")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+
+    try:
+        try:
+            os.write(fd, token.encode('utf-8'))
+        finally:
+            os.close(fd)
+        yield
+    finally:
+        if _read_token(lock_path) == token:
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+        else:
+            print(f"⚠️ Blokada {lock_path} została przejęta przez inny proces")
+
+
+def atomic_write_bytes(path: Path, content: bytes):
+    """Zapis przez plik tymczasowy + os.replace - czytelnicy widzą starą albo nową wersję, nigdy połowę"""
+    path = Path(path)
+    # Unikalna nazwa - wątki jednego procesu (render_server, GUI + preload) mogą zapisywać ten sam plik
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
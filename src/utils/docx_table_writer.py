@@ -0,0 +1,181 @@
+# utils/docx_table_writer.py
+
+"""
+DocxTableWriter - Zapis tabel do DOCX
+Tabela opisana jest listą wierszy komórek (słowniki: text, align, rowspan, colspan, header).
+Komórki przykryte przez rowspan nie występują w kolejnych wierszach - tak jak w HTML.
+
+- write_table_xml: buduje cały element <w:tbl> w jednym przebiegu (razem ze scaleniami)
+- write_table_cellwise: klasyczne API python-docx (komórka po komórce, merge parami) -
+  wolne dla dużych tabel, zostawione jako punkt odniesienia dla benchmarku
+"""
+from typing import Dict, List
+from xml.sax.saxutils import escape
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.table import Table
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+ALIGN_VALUES = {'center': 'center', 'right': 'right'}
+TWIPS_PER_EMU = 1 / 635
+
+
+def _cell_layout(rows: List[List[Dict]]):
+    """
+    Rozkłada komórki na siatkę.
+
+    Returns:
+        (cols_count, placed) - placed[row_idx] = lista (col_idx, cell, end_row, end_col)
+    """
+    cols_count = max((sum(c.get('colspan', 1) for c in row) for row in rows), default=0)
+    occupied = {}  # {row_idx: set(col_idx)} - kolumny zajęte przez rowspan z wierszy powyżej
+    placed = []
+
+    for row_idx, row in enumerate(rows):
+        taken = occupied.get(row_idx, set())
+        row_cells = []
+        col_idx = 0
+        for cell in row:
+            while col_idx in taken:
+                col_idx += 1
+            if col_idx >= cols_count:
+                break
+
+            end_row = min(row_idx + cell.get('rowspan', 1), len(rows)) - 1
+            end_col = min(col_idx + cell.get('colspan', 1), cols_count) - 1
+            for r in range(row_idx + 1, end_row + 1):
+                occupied.setdefault(r, set()).update(range(col_idx, end_col + 1))
+
+            row_cells.append((col_idx, cell, end_row, end_col))
+            col_idx = end_col + 1
+        placed.append(row_cells)
+
+    return cols_count, placed
+
+
+def _block_width_twips(doc) -> int:
+    """Szerokość obszaru tekstu ostatniej sekcji w twipsach"""
+    section = doc.sections[-1]
+    width = section.page_width - section.left_margin - section.right_margin
+    return int(width * TWIPS_PER_EMU)
+
+
+def _run_xml(text: str, bold: bool) -> str:
+    """<w:r> z tekstem - znaki nowej linii zamieniane na <w:br/>"""
+    rpr = '<w:rPr><w:b/></w:rPr>' if bold else ''
+    parts = []
+    for i, line in enumerate(text.split('\n')):
+        if i:
+            parts.append('<w:br/>')
+        if line:
+            parts.append(f'<w:t xml:space="preserve">{escape(line)}</w:t>')
+    return f'<w:r>{rpr}{"".join(parts)}</w:r>' if parts else ''
+
+
+def write_table_xml(doc, rows: List[List[Dict]], style: str = 'Table Grid'):
+    """
+    Dodaje tabelę na końcu dokumentu budując XML w jednym przebiegu.
+    Scalenia zapisywane są od razu jako gridSpan / vMerge.
+    """
+    if not rows:
+        return None
+
+    cols_count, placed = _cell_layout(rows)
+    if cols_count == 0:
+        return None
+
+    col_width = _block_width_twips(doc) // cols_count
+    style_id = doc.styles[style].style_id if style else None
+
+    # Siatka komórek: grid[row][col] = (cell, end_row, end_col) dla początku scalenia,
+    # 'v' dla kontynuacji pionowej, None dla wolnego miejsca
+    grid = [[None] * cols_count for _ in rows]
+    for row_idx, row_cells in enumerate(placed):
+        for col_idx, cell, end_row, end_col in row_cells:
+            grid[row_idx][col_idx] = (cell, end_row, end_col)
+            for r in range(row_idx + 1, end_row + 1):
+                grid[r][col_idx] = ('v', end_col)
+
+    out = [f'<w:tbl {nsdecls("w")}><w:tblPr>']
+    if style_id:
+        out.append(f'<w:tblStyle w:val="{style_id}"/>')
+    out.append('<w:tblW w:type="auto" w:w="0"/><w:tblLook w:val="04A0" w:firstRow="1" w:lastRow="0" '
+               'w:firstColumn="1" w:lastColumn="0" w:noHBand="0" w:noVBand="1"/></w:tblPr><w:tblGrid>')
+    out.append(f'<w:gridCol w:w="{col_width}"/>' * cols_count)
+    out.append('</w:tblGrid>')
+
+    for row_idx, grid_row in enumerate(grid):
+        out.append('<w:tr>')
+        col_idx = 0
+        while col_idx < cols_count:
+            slot = grid_row[col_idx]
+
+            if slot is None:
+                # Brakująca komórka w krótszym wierszu - pusta komórka
+                out.append(f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{col_width}"/></w:tcPr><w:p/></w:tc>')
+                col_idx += 1
+                continue
+
+            if slot[0] == 'v':
+                end_col = slot[1]
+                span = end_col - col_idx + 1
+                grid_span = f'<w:gridSpan w:val="{span}"/>' if span > 1 else ''
+                out.append(f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{col_width * span}"/>{grid_span}'
+                           f'<w:vMerge/></w:tcPr><w:p/></w:tc>')
+                col_idx = end_col + 1
+                continue
+
+            cell, end_row, end_col = slot
+            span = end_col - col_idx + 1
+            tc_pr = [f'<w:tcW w:type="dxa" w:w="{col_width * span}"/>']
+            if span > 1:
+                tc_pr.append(f'<w:gridSpan w:val="{span}"/>')
+            if end_row > row_idx:
+                tc_pr.append('<w:vMerge w:val="restart"/>')
+
+            align = ALIGN_VALUES.get(cell.get('align'))
+            p_pr = f'<w:pPr><w:jc w:val="{align}"/></w:pPr>' if align else ''
+            run = _run_xml(str(cell.get('text', '')), cell.get('header', False))
+            out.append(f'<w:tc><w:tcPr>{"".join(tc_pr)}</w:tcPr><w:p>{p_pr}{run}</w:p></w:tc>')
+            col_idx = end_col + 1
+        out.append('</w:tr>')
+    out.append('</w:tbl>')
+
+    tbl = parse_xml(''.join(out))
+    doc.element.body._insert_tbl(tbl)
+    return Table(tbl, doc._body)
+
+
+def write_table_cellwise(doc, rows: List[List[Dict]], style: str = 'Table Grid'):
+    """Dodaje tabelę przez API python-docx - komórka po komórce, scalenia parami"""
+    if not rows:
+        return None
+
+    cols_count, placed = _cell_layout(rows)
+    if cols_count == 0:
+        return None
+
+    word_table = doc.add_table(rows=len(rows), cols=cols_count)
+    if style:
+        word_table.style = style
+
+    for row_idx, row_cells in enumerate(placed):
+        for col_idx, cell, end_row, end_col in row_cells:
+            word_cell = word_table.rows[row_idx].cells[col_idx]
+            paragraph = word_cell.paragraphs[0]
+            run = paragraph.add_run(str(cell.get('text', '')))
+            if cell.get('header'):
+                run.bold = True
+            if cell.get('align') == 'center':
+                paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            elif cell.get('align') == 'right':
+                paragraph.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+
+            if end_row > row_idx or end_col > col_idx:
+                try:
+                    word_cell.merge(word_table.rows[end_row].cells[end_col])
+                except Exception as e:
+                    print(f"Błąd scalania komórek: {e}")
+
+    return word_table
@@ -0,0 +1,62 @@
+# utils/json_merge.py
+
+"""
+JsonMerge - Scalanie trójstronne (base / nasze / ich) danych JSON na poziomie rekordów
+Słowniki scalane są rekurencyjnie klucz po kluczu; listy i wartości proste to rekordy niepodzielne
+(np. w materials.json rekordem jest lista dostawców jednej folii, w bazie master - pole jednego wpisu ID).
+Zmiany w różnych rekordach łączą się; różne zmiany tego samego rekordu to konflikt.
+"""
+from typing import Any, List, Tuple
+
+_MISSING = object()
+
+
+class MergeConflictError(Exception):
+    """Ten sam rekord zmieniony różnie przez nas i przez innego użytkownika"""
+
+    def __init__(self, file_name: str, paths: List[str]):
+        self.paths = paths
+        shown = ", ".join(paths[:10]) + (f" (+{len(paths) - 10})" if len(paths) > 10 else "")
+        super().__init__(f"Plik {file_name} został w międzyczasie zmieniony przez innego użytkownika "
+                         f"w tych samych rekordach: {shown}. Odśwież dane i wprowadź zmiany ponownie.")
+
+
+def three_way_merge(base: Any, ours: Any, theirs: Any, path: str = '') -> Tuple[Any, List[str]]:
+    """
+    Zwraca (wynik, lista konfliktów 'ścieżka/do/rekordu').
+    W konflikcie wynik zawiera wartość 'theirs' - wywołujący decyduje, czy zapisać.
+    """
+    if ours == theirs:
+        return ours, []
+    if ours == base:
+        return theirs, []
+    if theirs == base:
+        return ours, []
+    if not (isinstance(ours, dict) and isinstance(theirs, dict)):
+        return theirs, [path or '/']
+
+    base = base if isinstance(base, dict) else {}
+    merged, conflicts = {}, []
+    for key in list(theirs) + [k for k in ours if k not in theirs]:
+        b = base.get(key, _MISSING)
+        o = ours.get(key, _MISSING)
+        t = theirs.get(key, _MISSING)
+        child_path = f"{path}/{key}"
+
+        if o is _MISSING or t is _MISSING:
+            # Usunięcie po jednej stronie - poprawne tylko, jeśli druga strona nie zmieniła rekordu
+            present = t if o is _MISSING else o
+            if b is _MISSING:
+                merged[key] = present  # Nowy rekord po jednej stronie
+            elif present == b:
+                continue  # Usunięty, druga strona bez zmian
+            else:
+                conflicts.append(child_path)
+                if t is not _MISSING:
+                    merged[key] = t
+            continue
+
+        value, child_conflicts = three_way_merge(b if b is not _MISSING else None, o, t, child_path)
+        merged[key] = value
+        conflicts.extend(child_conflicts)
+    return merged, conflicts
@@ -0,0 +1,178 @@
+# utils/master_index.py
+
+"""
+MasterIndex - Indeks wyszukiwania po słowniku master (SUBSTANCES_MASTER / DUAL_USE_MASTER)
+- dokładne dopasowanie po CAS, nazwie EN, Nr REF, Symbolu E (słowniki hash, O(1)),
+- wyszukiwanie po prefiksie (posortowane listy + bisect) i podciągu (indeks trigramów),
+- licznik następnego ID technicznego.
+Indeks nie kopiuje danych - po edycji wpisu wystarczy update(id).
+"""
+import bisect
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Pola dopasowania dokładnego - kolejność = priorytet (jak w dotychczasowym wyszukiwaniu edytora)
+KEY_FIELDS = ('cas', 'name_en', 'ref_no', 'e_symbol')
+# Pola przeszukiwane przy podpowiedziach (prefiks / podciąg)
+SEARCH_FIELDS = ('cas', 'name_en', 'name_pl', 'ref_no', 'e_symbol')
+NGRAM = 3
+
+
+def _normalize(value) -> str:
+    return str(value or '').strip().lower()
+
+
+def _ngrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def _id_order(s_id: str):
+    """Klucz sortowania ID - numeryczne rosnąco, pozostałe na końcu"""
+    return (0, int(s_id), '') if s_id.isdigit() else (1, 0, s_id)
+
+
+class MasterIndex:
+    """Indeks jednego słownika master {id: {'cas', 'name_en', 'name_pl', 'ref_no' / 'e_symbol'}}"""
+
+    def __init__(self, master: Dict[str, Dict]):
+        self.master = master
+        self.rebuild()
+
+    def rebuild(self):
+        """Pełna przebudowa (po załadowaniu / podmianie słownika)"""
+        self._exact: Dict[str, Dict[str, Set[str]]] = {f: {} for f in KEY_FIELDS}
+        self._sorted: List[Tuple[str, str]] = []  # (znormalizowana wartość, id) - prefiksy
+        self._ngrams: Dict[str, Set[str]] = {}
+        self._indexed: Dict[str, Dict[str, str]] = {}  # id → znormalizowane wartości w indeksie
+        self._next_id = 1
+
+        for s_id in self.master:
+            self._add(str(s_id))
+        self._sorted.sort()
+
+    # --- UTRZYMANIE ---
+
+    def update(self, s_id: str):
+        """Ponowne zaindeksowanie wpisu po edycji / dodaniu (brak w master = usunięcie)"""
+        s_id = str(s_id)
+        self._discard(s_id)
+        if s_id in self.master:
+            self._add(s_id, keep_sorted=True)
+
+    def remove(self, s_id: str):
+        self._discard(str(s_id))
+
+    def allocate_id(self) -> str:
+        """Rezerwuje kolejne wolne ID techniczne (max + 1)"""
+        s_id = str(self._next_id)
+        self._next_id += 1
+        return s_id
+
+    @property
+    def next_id(self) -> str:
+        return str(self._next_id)
+
+    def _add(self, s_id: str, keep_sorted: bool = False):
+        if s_id.isdigit():
+            self._next_id = max(self._next_id, int(s_id) + 1)
+
+        entry = self.master.get(s_id) or {}
+        values = {}
+        for field in SEARCH_FIELDS:
+            value = _normalize(entry.get(field))
+            if not value:
+                continue
+            values[field] = value
+            if field in self._exact:
+                self._exact[field].setdefault(value, set()).add(s_id)
+            if keep_sorted:
+                bisect.insort(self._sorted, (value, s_id))
+            else:
+                self._sorted.append((value, s_id))
+            for gram in _ngrams(value):
+                self._ngrams.setdefault(gram, set()).add(s_id)
+        self._indexed[s_id] = values
+
+    def _discard(self, s_id: str):
+        values = self._indexed.pop(s_id, None)
+        if not values:
+            return
+        for field, value in values.items():
+            if field in self._exact:
+                ids = self._exact[field].get(value)
+                if ids is not None:
+                    ids.discard(s_id)
+                    if not ids:
+                        del self._exact[field][value]
+            pos = bisect.bisect_left(self._sorted, (value, s_id))
+            if pos < len(self._sorted) and self._sorted[pos] == (value, s_id):
+                del self._sorted[pos]
+        for gram in set().union(*(_ngrams(value) for value in values.values())):
+            ids = self._ngrams.get(gram)
+            if ids is not None:
+                ids.discard(s_id)
+                if not ids:
+                    del self._ngrams[gram]
+
+    # --- ZAPYTANIA ---
+
+    def lookup(self, field: str, value: str) -> Set[str]:
+        """ID z dokładną wartością pola (bez rozróżniania wielkości liter)"""
+        return set(self._exact.get(field, {}).get(_normalize(value), ()))
+
+    def find(self, text: str, fields: Iterable[str] = KEY_FIELDS) -> Optional[str]:
+        """Pierwsze dokładne trafienie (CAS → nazwa EN → Nr REF → Symbol E); przy kilku - najmniejsze ID"""
+        for field in fields:
+            ids = self.lookup(field, text)
+            if ids:
+                return min(ids, key=_id_order)
+        return None
+
+    def search_prefix(self, prefix: str, limit: int = 20) -> List[str]:
+        """ID, w których któreś pole zaczyna się od 'prefix'"""
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        result, seen = [], set()
+        pos = bisect.bisect_left(self._sorted, (prefix, ''))
+        while pos < len(self._sorted) and len(result) < limit:
+            value, s_id = self._sorted[pos]
+            if not value.startswith(prefix):
+                break
+            if s_id not in seen:
+                seen.add(s_id)
+                result.append(s_id)
+            pos += 1
+        return result
+
+    def search(self, text: str, limit: int = 20) -> List[str]:
+        """
+        Podpowiedzi: najpierw trafienia po prefiksie, potem po podciągu.
+        Podciąg szukany przez przecięcie zbiorów trigramów (krótsze zapytania - tylko prefiks).
+        """
+        query = _normalize(text)
+        result = self.search_prefix(query, limit)
+        if len(result) >= limit or len(query) < NGRAM:
+            return result
+
+        candidates = None
+        for gram in sorted(_ngrams(query), key=lambda g: len(self._ngrams.get(g, ()))):
+            ids = self._ngrams.get(gram)
+            if not ids:
+                return result
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return result
+
+        seen = set(result)
+        for s_id in sorted(candidates - seen, key=_id_order):
+            if any(query in value for value in self._indexed.get(s_id, {}).values()):
+                result.append(s_id)
+                if len(result) >= limit:
+                    break
+        return result
+
+    def describe(self, s_id: str) -> str:
+        """Opis wpisu do list podpowiedzi: 'CAS | nazwa EN | REF/E'"""
+        entry = self.master.get(s_id, {})
+        code = entry.get('ref_no') or entry.get('e_symbol') or ''
+        return " | ".join(part for part in (entry.get('cas', ''), entry.get('name_en', ''), code) if part)
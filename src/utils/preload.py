@@ -0,0 +1,44 @@
+# utils/preload.py
+
+"""
+Preload - Import ciężkich bibliotek w tle, po pokazaniu okna
+Moduły usług importują je leniwie (przy pierwszym użyciu); wstępne ładowanie w wątku
+sprawia, że pierwsze kliknięcie "Generuj" nie czeka na import WeasyPrint czy python-docx.
+"""
+import importlib
+import threading
+import time
+from typing import Iterable
+
+# Kolejność: najpierw to, czego użytkownik potrzebuje najwcześniej (podgląd HTML → DOCX → baza → PDF)
+HEAVY_MODULES = (
+    'jinja2',
+    'lxml.html',
+    'docx',
+    'src.services.docx_builder',
+    'src.services.html_docx_converter',
+    'sqlalchemy',
+    'bs4',
+    'weasyprint',
+)
+
+
+def preload_modules(modules: Iterable[str] = HEAVY_MODULES) -> dict:
+    """Importuje moduły po kolei; zwraca {moduł: czas importu w s lub komunikat błędu}"""
+    results = {}
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            results[name] = time.perf_counter() - start
+        except Exception as e:
+            # Brak opcjonalnej biblioteki (np. WeasyPrint bez GTK) - zgłosi się dopiero przy użyciu
+            results[name] = f"{type(e).__name__}: {e}"
+    return results
+
+
+def preload_in_background(modules: Iterable[str] = HEAVY_MODULES) -> threading.Thread:
+    """Uruchamia preload_modules w wątku tła (daemon)"""
+    thread = threading.Thread(target=preload_modules, args=(tuple(modules),), name='ModulePreload', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,212 @@
+# utils/profiler.py
+
+"""
+SessionProfiler - Profilowanie działającej sesji programu (diagnostyka "dziś działa wolno")
+Dwa źródła danych, działające jednocześnie:
+- cProfile wątku, który uruchomił profilowanie (wątek GUI) → profile.pstats + profile.txt
+- próbkowanie stosów wszystkich wątków co kilka ms (sys._current_frames) → stacks.collapsed
+  (format "collapsed stacks" - do flamegraph.pl / speedscope)
+
+Do folderu zrzutu dołączany jest meta.json: wersje plików danych (czas modyfikacji, rozmiar,
+skrót), status połączenia sieciowego i podsumowanie pomiarów czasu (utils/timing.py).
+"""
+import cProfile
+import datetime
+import hashlib
+import io
+import json
+import platform
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+
+PROFILES_DIR_NAME = 'profiles'
+DEFAULT_SAMPLE_INTERVAL_S = 0.005
+PSTATS_TEXT_LIMIT = 60
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_name}"
+
+
+class StackSampler:
+    """Wątek próbkujący stosy wszystkich pozostałych wątków"""
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL_S):
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='StackSampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def write_collapsed(self, path: Path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class SessionProfiler:
+    """Profilowanie sesji: start() → ... → stop() zapisuje zrzut i zwraca jego folder"""
+
+    def __init__(self, output_dir: Optional[Path] = None, data_loader=None,
+                 use_cprofile: bool = True, sample_interval: Optional[float] = DEFAULT_SAMPLE_INTERVAL_S):
+        """
+        Args:
+            output_dir: Folder na zrzuty (domyślnie output/profiles)
+            data_loader: DataLoader - źródło statusu sieci dla meta.json (opcjonalny)
+            use_cprofile: Czy włączyć cProfile w bieżącym wątku
+            sample_interval: Okres próbkowania stosów w sekundach (None - bez próbkowania)
+        """
+        self.output_dir = output_dir
+        self.data_loader = data_loader
+        self.use_cprofile = use_cprofile
+        self.sample_interval = sample_interval
+
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._started_at: Optional[datetime.datetime] = None
+        self._start_perf = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._started_at is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._started_at = datetime.datetime.now()
+        self._start_perf = time.perf_counter()
+        if self.sample_interval:
+            self._sampler = StackSampler(self.sample_interval)
+            self._sampler.start()
+        if self.use_cprofile:
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError as e:
+                # Inny profiler jest już aktywny (np. debugger) - zostaje samo próbkowanie
+                print(f"⚠️ cProfile niedostępny: {e}")
+                self._profile = None
+
+    def stop(self) -> Optional[Path]:
+        """Kończy profilowanie i zapisuje zrzut; zwraca folder zrzutu"""
+        if not self.running:
+            return None
+
+        duration = time.perf_counter() - self._start_perf
+        if self._profile:
+            self._profile.disable()
+        if self._sampler:
+            self._sampler.stop()
+
+        target = self._resolve_output_dir() / f"profile_{self._started_at:%Y%m%d_%H%M%S}"
+        target.mkdir(parents=True, exist_ok=True)
+
+        if self._profile:
+            self._profile.dump_stats(str(target / 'profile.pstats'))
+            text = io.StringIO()
+            pstats.Stats(self._profile, stream=text).sort_stats('cumulative').print_stats(PSTATS_TEXT_LIMIT)
+            (target / 'profile.txt').write_text(text.getvalue(), encoding='utf-8')
+        if self._sampler:
+            self._sampler.write_collapsed(target / 'stacks.collapsed')
+
+        meta = self._collect_meta(duration)
+        with open(target / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2, default=str)
+
+        self._profile = None
+        self._sampler = None
+        self._started_at = None
+        print(f"✅ Zapisano profil: {target}")
+        return target
+
+    def _resolve_output_dir(self) -> Path:
+        if self.output_dir:
+            return Path(self.output_dir)
+        from src.config.constants import OUTPUT_PATH
+        return OUTPUT_PATH / PROFILES_DIR_NAME
+
+    def _collect_meta(self, duration: float) -> Dict:
+        from src.utils import timing
+
+        meta = {
+            'started_at': self._started_at.isoformat(timespec='seconds'),
+            'duration_s': round(duration, 3),
+            'python': sys.version,
+            'platform': platform.platform(),
+            'argv': sys.argv,
+            'samples': self._sampler.sample_count if self._sampler else 0,
+            'sample_interval_s': self.sample_interval,
+            'data_files': data_file_versions(),
+            'timing': timing.summary() if timing.is_enabled() else None,
+        }
+        try:
+            from src.config.constants import APP_NAME, APP_VERSION
+            meta['app'] = f"{APP_NAME} {APP_VERSION}"
+        except ImportError:
+            pass
+        try:
+            data_loader = self.data_loader
+            if data_loader is None:
+                # Tryb CLI - singleton DataLoader, jeśli został już utworzony
+                from src.services.data_loader import DataLoader
+                data_loader = DataLoader._instance
+            meta['network_status'] = data_loader.get_network_status() if data_loader else None
+        except Exception as e:
+            meta['network_status'] = f"Błąd: {e}"
+        return meta
+
+
+def data_file_versions() -> Dict[str, Dict]:
+    """Wersje plików danych: czas modyfikacji, rozmiar i skrót SHA-1 (lub błąd dostępu)"""
+    from src.config import constants
+
+    versions = {}
+    for name in ('MATERIALS_DB', 'SUBSTANCES_MASTER', 'DUAL_USE_MASTER', 'TEXTS_PL', 'TEXTS_EN'):
+        path = getattr(constants, name, None)
+        if path is None:
+            continue
+        try:
+            stat = Path(path).stat()
+            with open(path, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()[:12]
+            versions[name] = {
+                'path': str(path),
+                'modified': datetime.datetime.fromtimestamp(stat.st_mtime).isoformat(timespec='seconds'),
+                'size': stat.st_size,
+                'sha1': digest,
+            }
+        except OSError as e:
+            versions[name] = {'path': str(path), 'error': str(e)}
+    return versions
@@ -0,0 +1,128 @@
+# utils/sized_cache.py
+
+"""
+SizedCache - Cache LRU z limitem pamięci (rozmiar wpisu podaje wywołujący, np. liczba bajtów pliku)
+- przekroczenie budżetu usuwa najdawniej używane wpisy (poza przypiętymi i właśnie dodanym),
+- pin(): wpisy, które nigdy nie są usuwane (np. teksty deklaracji),
+- stats(): trafienia / chybienia / usunięcia, zajętość.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+ENV_BUDGET_MB = 'DECLGEN_CACHE_MB'
+DEFAULT_BUDGET_MB = 256
+
+_MISSING = object()
+
+
+def budget_from_env() -> int:
+    """Budżet w bajtach (DECLGEN_CACHE_MB, domyślnie 256 MB; 0 - bez limitu)"""
+    try:
+        megabytes = float(os.environ.get(ENV_BUDGET_MB, DEFAULT_BUDGET_MB))
+    except ValueError:
+        megabytes = DEFAULT_BUDGET_MB
+    return max(0, int(megabytes * 1024 * 1024))
+
+
+class SizedCache:
+    """Słownik LRU z rozliczaniem rozmiaru wpisów"""
+
+    def __init__(self, max_bytes: int = 0, on_evict: Optional[Callable[[str], None]] = None):
+        self.max_bytes = max_bytes  # 0 - bez limitu
+        self.on_evict = on_evict
+        self._entries: 'OrderedDict[str, Any]' = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._pinned = set()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value, size: int = 0):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._sizes[key]
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self._bytes += size
+            self._evict(keep=key)
+
+    def grow(self, key: str, size: int):
+        """Zwiększa rozmiar wpisu (np. leniwie doczytane pliki folii)"""
+        with self._lock:
+            if key not in self._entries:
+                return
+            self._sizes[key] += size
+            self._bytes += size
+            self._evict(keep=key)
+
+    def pop(self, key: str, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._bytes -= self._sizes.pop(key)
+            return self._entries.pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def pin(self, keys: Iterable[str]):
+        """Przypięte klucze nie są usuwane przy przekroczeniu budżetu (wliczają się do zajętości)"""
+        with self._lock:
+            self._pinned.update(keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, keep: str):
+        if not self.max_bytes or self._bytes <= self.max_bytes:
+            return
+        for key in list(self._entries):  # Od najdawniej używanego
+            if self._bytes <= self.max_bytes:
+                break
+            if key == keep or key in self._pinned:
+                continue
+            self._bytes -= self._sizes.pop(key)
+            del self._entries[key]
+            self.evictions += 1
+            if self.on_evict:
+                self.on_evict(key)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'pinned': sorted(k for k in self._pinned if k in self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        limit = f"{s['max_bytes'] / 1048576:.0f} MB" if s['max_bytes'] else "bez limitu"
+        return (f"{s['entries']} plików, {s['bytes'] / 1048576:.1f} MB / {limit}, "
+                f"trafienia {s['hit_ratio']:.0%} ({s['hits']}/{s['hits'] + s['misses']}), "
+                f"usunięte {s['evictions']}")
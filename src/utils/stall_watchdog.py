@@ -0,0 +1,178 @@
+# utils/stall_watchdog.py
+
+"""
+StallWatchdog - Wykrywanie zawieszeń pętli zdarzeń GUI
+Wątek GUI wywołuje beat() z QTimera; wątek strażnika sprawdza, czy ostatnie uderzenie nie jest
+starsze niż próg (domyślnie 200 ms). W trakcie zawieszenia próbkuje stos wątku głównego
+(sys._current_frames), a po jego zakończeniu zapisuje wpis JSON-lines: czas trwania,
+najczęstszy stos i miejsce wywołania (najgłębsza ramka z kodu programu).
+
+Próg: zmienna środowiskowa DECLGEN_STALL_MS (0 - wyłączone).
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ENV_THRESHOLD = 'DECLGEN_STALL_MS'
+DEFAULT_THRESHOLD_MS = 200
+HEARTBEAT_INTERVAL_MS = 50
+LOG_FILE_NAME = 'stalls.jsonl'
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+RECENT_STALLS = 50
+PROJECT_DIR = str(Path(__file__).resolve().parents[2])
+
+
+def threshold_from_env() -> int:
+    """Próg w ms ze zmiennej środowiskowej (0 - strażnik wyłączony)"""
+    try:
+        return max(0, int(os.environ.get(ENV_THRESHOLD, DEFAULT_THRESHOLD_MS)))
+    except ValueError:
+        return DEFAULT_THRESHOLD_MS
+
+
+class StallWatchdog:
+    """Strażnik pętli zdarzeń - wykrywa i loguje zawieszenia wątku głównego"""
+
+    def __init__(self, threshold_ms: int = DEFAULT_THRESHOLD_MS,
+                 heartbeat_interval_ms: int = HEARTBEAT_INTERVAL_MS,
+                 log_path: Optional[Path] = None):
+        self.threshold = threshold_ms / 1000
+        self.heartbeat_interval = heartbeat_interval_ms / 1000
+        self.log_path = log_path
+        self.recent = deque(maxlen=RECENT_STALLS)
+        self.stall_count = 0
+
+        self._last_beat = time.monotonic()
+        self._main_thread_id = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._logger: Optional[logging.Logger] = None
+
+    def beat(self):
+        """Uderzenie serca - wywoływane z wątku GUI (QTimer)"""
+        self._last_beat = time.monotonic()
+
+    def start(self):
+        if self._thread:
+            return
+        self._main_thread_id = threading.main_thread().ident
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='StallWatchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _stalled_for(self) -> float:
+        """Opóźnienie pętli zdarzeń ponad oczekiwany odstęp uderzeń"""
+        return time.monotonic() - self._last_beat - self.heartbeat_interval
+
+    def _run(self):
+        poll = max(self.threshold / 4, 0.01)
+        while not self._stop.wait(poll):
+            if self._stalled_for() <= self.threshold:
+                continue
+
+            # Zawieszenie - próbkuj stos wątku głównego aż do następnego uderzenia
+            beat_at_start = self._last_beat
+            samples = Counter()
+            while self._last_beat == beat_at_start and not self._stop.is_set():
+                stack = self._main_stack()
+                if stack:
+                    samples[stack] += 1
+                self._stop.wait(poll)
+            duration = (self._last_beat if self._last_beat != beat_at_start else time.monotonic()) \
+                - beat_at_start - self.heartbeat_interval
+            self._report(duration, samples)
+
+    def _main_stack(self) -> Optional[tuple]:
+        frame = sys._current_frames().get(self._main_thread_id)
+        if frame is None:
+            return None
+        return tuple(
+            f"{Path(fs.filename).name}:{fs.lineno} {fs.name}"
+            for fs in traceback.extract_stack(frame)
+        )
+
+    def _report(self, duration: float, samples: Counter):
+        stack = samples.most_common(1)[0][0] if samples else ()
+        entry = {
+            'ts': round(time.time(), 3),
+            'duration_ms': round(duration * 1000, 1),
+            'call_site': self._call_site_from_stack(stack),
+            'samples': sum(samples.values()),
+            'stack': list(stack),
+        }
+        self.stall_count += 1
+        self.recent.append(entry)
+        print(f"🐢 GUI zawieszone na {entry['duration_ms']:.0f} ms - {entry['call_site']}")
+
+        logger = self._get_logger()
+        if logger:
+            logger.warning(json.dumps(entry, ensure_ascii=False))
+
+    @staticmethod
+    def _call_site_from_stack(stack: tuple) -> str:
+        """Najgłębsza ramka z modułów programu (src/, main.py), w przeciwnym razie ostatnia ramka"""
+        for label in reversed(stack):
+            file_name = label.split(':', 1)[0]
+            if file_name in _project_file_names():
+                return label
+        return stack[-1] if stack else "?"
+
+    def _get_logger(self) -> Optional[logging.Logger]:
+        if self._logger is None:
+            logger = logging.getLogger('declaration_generator.stalls')
+            logger.propagate = False
+            if not logger.handlers:
+                try:
+                    path = Path(self.log_path) if self.log_path else _default_log_path()
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                                  encoding='utf-8')
+                    handler.setFormatter(logging.Formatter('%(message)s'))
+                    logger.addHandler(handler)
+                except Exception as e:
+                    print(f"⚠️ Nie udało się otworzyć logu zawieszeń: {e}")
+                    return None
+            self._logger = logger
+        return self._logger
+
+    def summary(self) -> Dict:
+        """Liczba zawieszeń i najdłuższe z ostatnich"""
+        recent: List[Dict] = list(self.recent)
+        longest = max(recent, key=lambda e: e['duration_ms']) if recent else None
+        return {'count': self.stall_count, 'longest': longest}
+
+
+_project_files_cache = None
+
+
+def _project_file_names() -> set:
+    """Nazwy plików .py programu - do rozpoznania miejsca wywołania w stosie"""
+    global _project_files_cache
+    if _project_files_cache is None:
+        root = Path(PROJECT_DIR)
+        names = {p.name for p in (root / 'src').rglob('*.py')}
+        names.add('main.py')
+        names.discard('__init__.py')
+        _project_files_cache = names
+    return _project_files_cache
+
+
+def _default_log_path() -> Path:
+    from src.config.constants import OUTPUT_PATH
+    return OUTPUT_PATH / 'logs' / LOG_FILE_NAME
@@ -0,0 +1,204 @@
+# utils/timing.py
+
+"""
+Timing - Pomiar czasu etapów generowania (spany)
+Wyłączony domyślnie: span() zwraca wtedy współdzielony pusty obiekt, a @timed wywołuje funkcję wprost.
+Włączanie: zmienna środowiskowa DECLGEN_TIMING=1 lub enable().
+
+Użycie:
+    with span('render.jinja', template=name):
+        ...
+
+    @timed('data.build_structure_data')
+    def build_structure_data(...): ...
+
+Pomiary trafiają do pliku JSON-lines z rotacją (jeden wpis na span) i do zbiorczych
+statystyk w pamięci (summary() / format_summary() - okno "📡 Status połączenia").
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ENV_FLAG = 'DECLGEN_TIMING'
+ENV_LOG_PATH = 'DECLGEN_TIMING_LOG'
+LOG_FILE_NAME = 'timings.jsonl'
+LOG_MAX_BYTES = 2 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()
+_stats: Dict[str, List[float]] = {}  # nazwa → [liczba, suma, max]
+_logger = logging.getLogger('declaration_generator.timing')
+_logger.propagate = False
+
+
+class _NullSpan:
+    """Span przy wyłączonym pomiarze - nic nie robi"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Mierzony odcinek - zapisywany przy wyjściu z bloku with"""
+    __slots__ = ('name', 'fields', 'start', 'parent')
+
+    def __init__(self, name: str, fields: Dict):
+        self.name = name
+        self.fields = fields
+        self.start = 0.0
+        self.parent = None
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _local.stack.pop()
+        if exc_type is not None:
+            self.fields['error'] = exc_type.__name__
+        _record(self.name, duration, self.fields, self.parent)
+        return False
+
+    def set(self, **fields):
+        """Dopisuje pola do wpisu (np. liczbę wierszy znaną dopiero po wykonaniu)"""
+        self.fields.update(fields)
+
+
+def span(name: str, **fields):
+    """Kontekst mierzący czas bloku; przy wyłączonym pomiarze zwraca pusty obiekt"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, fields)
+
+
+def timed(name: Optional[str] = None):
+    """Dekorator mierzący czas funkcji (domyślna nazwa: moduł.funkcja)"""
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _record(name: str, duration: float, fields: Dict, parent: Optional[str]):
+    with _lock:
+        entry = _stats.get(name)
+        if entry is None:
+            _stats[name] = [1, duration, duration]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+            if duration > entry[2]:
+                entry[2] = duration
+
+    if _logger.handlers:
+        record = {'ts': round(time.time(), 3), 'span': name, 'ms': round(duration * 1000, 3),
+                  'thread': threading.current_thread().name}
+        if parent:
+            record['parent'] = parent
+        record.update(fields)
+        _logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+
+def _default_log_path() -> Path:
+    if os.environ.get(ENV_LOG_PATH):
+        return Path(os.environ[ENV_LOG_PATH])
+    from src.config.constants import OUTPUT_PATH
+    return OUTPUT_PATH / 'logs' / LOG_FILE_NAME
+
+
+def enable(log_path: Optional[Path] = None):
+    """Włącza pomiar; log JSON-lines z rotacją (domyślnie output/logs/timings.jsonl)"""
+    global _enabled
+    if not _logger.handlers:
+        try:
+            path = Path(log_path) if log_path else _default_log_path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                          encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            _logger.addHandler(handler)
+            _logger.setLevel(logging.INFO)
+        except Exception as e:
+            # Statystyki w pamięci działają również bez pliku
+            print(f"⚠️ Nie udało się otworzyć logu pomiarów: {e}")
+    _enabled = True
+
+
+def disable():
+    """Wyłącza pomiar i zamyka plik logu"""
+    global _enabled
+    _enabled = False
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+        handler.close()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """Czyści zebrane statystyki"""
+    with _lock:
+        _stats.clear()
+
+
+def summary() -> List[Dict]:
+    """Statystyki spanów posortowane malejąco po łącznym czasie"""
+    with _lock:
+        items = [(name, list(values)) for name, values in _stats.items()]
+    rows = [
+        {'span': name, 'count': int(count), 'total_ms': total * 1000,
+         'avg_ms': total * 1000 / count, 'max_ms': max_s * 1000}
+        for name, (count, total, max_s) in items
+    ]
+    return sorted(rows, key=lambda r: r['total_ms'], reverse=True)
+
+
+def format_summary(limit: int = 15) -> str:
+    """Tekstowe podsumowanie do okna dialogowego"""
+    if not _enabled:
+        return f"Pomiar czasu wyłączony (ustaw {ENV_FLAG}=1 przed uruchomieniem)"
+    rows = summary()
+    if not rows:
+        return "Brak pomiarów"
+    lines = [f"{'Etap':<32} {'n':>5} {'suma ms':>10} {'śr. ms':>9} {'max ms':>9}"]
+    for row in rows[:limit]:
+        lines.append(f"{row['span']:<32} {row['count']:>5} {row['total_ms']:>10.1f} "
+                     f"{row['avg_ms']:>9.1f} {row['max_ms']:>9.1f}")
+    return "\n".join(lines)
+
+
+if os.environ.get(ENV_FLAG, '').strip().lower() in ('1', 'true', 'yes', 'on'):
+    enable()
@@ -0,0 +1,141 @@
+# utils/where_used_index.py
+
+"""
+WhereUsedIndex - Indeks odwrotny: substancja SML / surowiec Dual Use → (materiał, dostawca)
+Odpowiada bez skanowania materials.json, które folie i którzy dostawcy zawierają daną substancję.
+update() porównuje migawki materiałów i przepisuje wpisy tylko tych folii, które się zmieniły
+(z listą nazw od zapisu - tylko tych folii, bez wczytywania pozostałych plików folii).
+overlay(): widok z niezapisanymi zmianami edytora, bez modyfikowania wspólnego indeksu.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Wpis indeksu: (nazwa materiału, indeks dostawcy we wpisie materiału)
+Usage = Tuple[str, int]
+
+
+def _material_snapshot(entries: List[Dict]) -> tuple:
+    """Niezmienna migawka folii: ((dostawca, {ID SML}, {ID Dual Use}), ...) dla kolejnych dostawców"""
+    return tuple(
+        (
+            entry.get('supplier', ''),
+            frozenset(str(item.get('substanceId')) for item in entry.get('sml', [])),
+            frozenset(str(item) for item in entry.get('dualUse', [])),
+        )
+        for entry in entries
+    )
+
+
+class WhereUsedIndex:
+    """Indeks odwrotny dla materials.json ({'materials': {nazwa: [wpisy dostawców]}})"""
+
+    def __init__(self, materials_db: Optional[Dict] = None):
+        self._snapshots: Dict[str, tuple] = {}
+        self._sml: Dict[str, Set[Usage]] = {}
+        self._dual_use: Dict[str, Set[Usage]] = {}
+        if materials_db is not None:
+            self.update(materials_db)
+
+    # --- UTRZYMANIE ---
+
+    def update(self, materials_db: Dict, names: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Synchronizuje indeks z materials_db; zwraca nazwy folii, których wpisy się zmieniły.
+        'names' - folie zmienione przez zapis: sprawdzane są tylko one i folie dodane / usunięte
+        (None - pełne porównanie, wczytuje wszystkie folie).
+        """
+        materials = materials_db.get('materials', {})
+        if names is None:
+            candidates = set(self._snapshots) | set(materials)
+        else:
+            candidates = set(names) | (set(self._snapshots) ^ set(materials))  # Same nazwy - bez plików folii
+        changed = []
+        for name in candidates:
+            snapshot = _material_snapshot(materials[name]) if name in materials else None
+            if snapshot == self._snapshots.get(name):
+                continue
+            self._remove_material(name)
+            if snapshot is not None:
+                self._add_material(name, snapshot)
+            changed.append(name)
+        return sorted(changed)
+
+    def _add_material(self, name: str, snapshot: tuple):
+        self._snapshots[name] = snapshot
+        for supplier_index, (_, sml_ids, dual_use_ids) in enumerate(snapshot):
+            for s_id in sml_ids:
+                self._sml.setdefault(s_id, set()).add((name, supplier_index))
+            for d_id in dual_use_ids:
+                self._dual_use.setdefault(d_id, set()).add((name, supplier_index))
+
+    def _remove_material(self, name: str):
+        snapshot = self._snapshots.pop(name, None)
+        if snapshot is None:
+            return
+        for supplier_index, (_, sml_ids, dual_use_ids) in enumerate(snapshot):
+            for postings, ids in ((self._sml, sml_ids), (self._dual_use, dual_use_ids)):
+                for item_id in ids:
+                    usages = postings.get(item_id)
+                    if usages is None:
+                        continue
+                    usages.discard((name, supplier_index))
+                    if not usages:
+                        del postings[item_id]
+
+    def overlay(self, materials_db: Dict, names: Iterable[str]) -> 'WhereUsedOverlay':
+        """Indeks z niezapisanymi wersjami folii 'names' (ten indeks pozostaje bez zmian)"""
+        return WhereUsedOverlay(self, materials_db, names)
+
+    # --- ZAPYTANIA ---
+
+    def substance_usage(self, substance_id) -> List[Usage]:
+        """(materiał, indeks dostawcy) zawierające substancję SML"""
+        return sorted(self._sml.get(str(substance_id), ()))
+
+    def dual_use_usage(self, dual_use_id) -> List[Usage]:
+        """(materiał, indeks dostawcy) zawierające surowiec Dual Use"""
+        return sorted(self._dual_use.get(str(dual_use_id), ()))
+
+    def usage(self, item_id, dual_use: bool = False) -> List[Usage]:
+        return self.dual_use_usage(item_id) if dual_use else self.substance_usage(item_id)
+
+    def materials_using(self, item_id, dual_use: bool = False) -> List[str]:
+        """Nazwy folii (dowolny dostawca) zawierających substancję / surowiec"""
+        return sorted({name for name, _ in self.usage(item_id, dual_use)})
+
+    def supplier_name(self, material: str, supplier_index: int) -> str:
+        snapshot = self._snapshots.get(material, ())
+        return snapshot[supplier_index][0] if supplier_index < len(snapshot) else ''
+
+    def describe_usage(self, item_id, dual_use: bool = False) -> List[Dict]:
+        """Lista do wyświetlenia: [{'material', 'supplier_index', 'supplier'}]"""
+        return [
+            {'material': name, 'supplier_index': index, 'supplier': self.supplier_name(name, index)}
+            for name, index in self.usage(item_id, dual_use)
+        ]
+
+
+class WhereUsedOverlay(WhereUsedIndex):
+    """Wspólny indeks + własne wpisy wybranych folii (np. niezapisane zmiany w edytorze)"""
+
+    def __init__(self, base: WhereUsedIndex, materials_db: Dict, names: Iterable[str]):
+        super().__init__()
+        self._base_index = base
+        self._names = set(names)
+        materials = materials_db.get('materials', {})
+        for name in self._names:
+            if name in materials:
+                self._add_material(name, _material_snapshot(materials[name]))
+
+    def _merge(self, own: Set[Usage], shared: List[Usage]) -> List[Usage]:
+        return sorted({usage for usage in shared if usage[0] not in self._names} | own)
+
+    def substance_usage(self, substance_id) -> List[Usage]:
+        return self._merge(self._sml.get(str(substance_id), set()), self._base_index.substance_usage(substance_id))
+
+    def dual_use_usage(self, dual_use_id) -> List[Usage]:
+        return self._merge(self._dual_use.get(str(dual_use_id), set()), self._base_index.dual_use_usage(dual_use_id))
+
+    def supplier_name(self, material: str, supplier_index: int) -> str:
+        if material in self._names:
+            return super().supplier_name(material, supplier_index)
+        return self._base_index.supplier_name(material, supplier_index)
@@ -0,0 +1,91 @@
+# utils/working_copy.py
+
+"""
+WorkingCopy - Niezapisane wersje rekordów jednego dokumentu nad wspólnym dokumentem z cache DataLoader
+- edytor zmienia tylko kopie robocze (edit / set) - deklaracje generowane w tym samym procesie
+  widzą dane zapisane, nie porzucone edycje,
+- view: słownik kopii roboczych przed rekordami wspólnymi (ChainMap); przypisanie tworzy kopię roboczą,
+- changes(): funkcje dla DataLoader.update_records - zapis tylko zmienionych rekordów; rekord zmieniony
+  w międzyczasie inaczej przez innego użytkownika → MergeConflictError.
+"""
+import copy
+from collections import ChainMap
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.utils.json_merge import MergeConflictError
+
+
+class _WorkingView(ChainMap):
+    """Odczyt: kopia robocza lub rekord wspólny; view[klucz] = wartość → WorkingCopy.set()"""
+
+    def __init__(self, owner: 'WorkingCopy'):
+        super().__init__(owner._work, owner.records)
+        self._owner = owner
+
+    def __setitem__(self, key, value):
+        self._owner.set(key, value)
+
+
+class WorkingCopy:
+    """Kopie robocze rekordów {klucz: wartość}; wartość None - rekord usunięty / nieistniejący"""
+
+    def __init__(self, records: Dict):
+        self.records = records  # Wspólny słownik rekordów - tylko odczyt
+        self._work: Dict = {}
+        self._originals: Dict = {}  # Wersje wspólne z chwili utworzenia kopii (baza porównania przy zapisie)
+        self.view = _WorkingView(self)
+
+    def edit(self, key):
+        """Kopia robocza rekordu - tworzona przy pierwszym użyciu"""
+        if key not in self._work:
+            original = self.records.get(key)
+            self._originals[key] = copy.deepcopy(original)
+            self._work[key] = copy.deepcopy(original)
+        return self._work[key]
+
+    def set(self, key, value):
+        """Nowa wartość rekordu (np. nowy wpis master)"""
+        if key not in self._work:
+            self._originals[key] = copy.deepcopy(self.records.get(key))
+        self._work[key] = value
+
+    def is_new(self, key) -> bool:
+        """Rekord utworzony w kopii roboczej (brak go w wersji wspólnej)"""
+        return key in self._work and self._originals[key] is None
+
+    def keys(self) -> List:
+        """Klucze z kopią roboczą (zmienione lub tylko wyświetlane)"""
+        return list(self._work)
+
+    def changed(self) -> List:
+        """Klucze rekordów różniących się od wersji wspólnej"""
+        return [key for key, value in self._work.items() if value != self._originals[key]]
+
+    def has_changes(self) -> bool:
+        return any(value != self._originals[key] for key, value in self._work.items())
+
+    def changes(self, label: str, keys: Optional[Iterable] = None) -> Dict[object, Callable]:
+        """{klucz: funkcja(aktualna wartość) → wartość robocza} dla DataLoader.update_records"""
+        def change(key):
+            def apply(current):
+                value, original = self._work[key], self._originals[key]
+                if current != original and current != value:
+                    raise MergeConflictError(label, [f"/{key}"])
+                return copy.deepcopy(value)
+            return apply
+
+        changed = self.changed()
+        if keys is not None:
+            wanted = set(keys)
+            changed = [key for key in changed if key in wanted]
+        return {key: change(key) for key in changed}
+
+    def discard(self, keys: Optional[Iterable] = None):
+        """Usuwa kopie robocze (po zapisie - wersja wspólna jest już aktualna); keys=None - wszystkie"""
+        for key in list(self._work) if keys is None else list(keys):
+            self._work.pop(key, None)
+            self._originals.pop(key, None)
+
+    def discard_clean(self):
+        """Usuwa kopie bez zmian (np. po zapisie innej ścieżki, która zmieniła wersję wspólną)"""
+        self.discard([key for key, value in self._work.items() if value == self._originals[key]])
@@ -0,0 +1,11 @@
+# tests/conftest.py
+
+"""
+Conftest - wspólna konfiguracja testów (pytest uruchamiany z katalogu głównego repozytorium)
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
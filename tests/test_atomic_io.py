@@ -0,0 +1,129 @@
+# tests/test_atomic_io.py
+
+"""
+Testy atomic_io - zapis atomowy i blokada plikiem
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from src.utils import atomic_io
+from src.utils.atomic_io import atomic_write_bytes, file_lock, file_stamp
+
+
+def test_atomic_write_replaces_content_and_leaves_no_temp_files(tmp_path):
+    target = tmp_path / 'data.json'
+    target.write_bytes(b'old')
+    atomic_write_bytes(target, b'new content')
+    assert target.read_bytes() == b'new content'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['data.json']
+
+
+def test_atomic_write_failure_keeps_old_file(tmp_path, monkeypatch):
+    target = tmp_path / 'data.json'
+    target.write_bytes(b'old')
+
+    def failing_replace(src, dst):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(atomic_io.os, 'replace', failing_replace)
+    with pytest.raises(OSError):
+        atomic_write_bytes(target, b'new')
+    assert target.read_bytes() == b'old'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['data.json']
+
+
+def test_file_stamp_changes_with_content(tmp_path):
+    target = tmp_path / 'data.json'
+    assert file_stamp(target) is None
+    target.write_bytes(b'a')
+    first = file_stamp(target)
+    target.write_bytes(b'abc')
+    assert file_stamp(target) != first
+
+
+def test_lock_is_exclusive_and_removed(tmp_path):
+    target = tmp_path / 'data.json'
+    lock_path = tmp_path / 'data.json.lock'
+    with file_lock(target):
+        assert lock_path.exists()
+        with pytest.raises(TimeoutError):
+            with file_lock(target, timeout=0.05):
+                pass
+        assert lock_path.exists()  # Nieudana próba nie usuwa cudzej blokady
+    assert not lock_path.exists()
+
+
+def test_lock_waits_for_release(tmp_path):
+    target = tmp_path / 'data.json'
+    order = []
+
+    def holder():
+        with file_lock(target):
+            order.append('first')
+            time.sleep(0.1)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    while not (tmp_path / 'data.json.lock').exists():
+        time.sleep(0.005)
+    with file_lock(target, timeout=5):
+        order.append('second')
+    thread.join()
+    assert order == ['first', 'second']
+
+
+def test_stale_lock_is_taken_over(tmp_path):
+    target = tmp_path / 'data.json'
+    lock_path = tmp_path / 'data.json.lock'
+    lock_path.write_text('123 crashed token')
+    old = time.time() - 120
+    os.utime(lock_path, (old, old))
+    with file_lock(target, timeout=1, stale_after=60):
+        assert 'crashed' not in lock_path.read_text()
+    assert sorted(p.name for p in tmp_path.iterdir()) == []
+
+
+def test_release_keeps_lock_taken_over_by_another_process(tmp_path):
+    target = tmp_path / 'data.json'
+    lock_path = tmp_path / 'data.json.lock'
+    with file_lock(target):
+        lock_path.write_text('999 other token')  # Blokada przejęta w trakcie (uznana za nieaktualną)
+    assert lock_path.read_text() == '999 other token'
+
+
+def test_staleness_uses_share_clock(tmp_path, monkeypatch):
+    target = tmp_path / 'data.json'
+    lock_path = tmp_path / 'data.json.lock'
+    lock_path.write_text('123 fresh token')
+    # Zegar lokalny 10 min do przodu względem serwera - świeża blokada nie jest nieaktualna
+    real_time = time.time
+    monkeypatch.setattr(atomic_io.time, 'time', lambda: real_time() + 600)
+    with pytest.raises(TimeoutError):
+        with file_lock(target, timeout=0.1, stale_after=60):
+            pass
+    assert lock_path.read_text() == '123 fresh token'
+
+
+def test_parallel_writers_of_one_file_do_not_share_temp_file(tmp_path):
+    target = tmp_path / 'data.json'
+    contents = [bytes([65 + i]) * 200000 for i in range(8)]
+    errors = []
+
+    def writer(content):
+        try:
+            for _ in range(5):
+                atomic_write_bytes(target, content)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(content,)) for content in contents]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert target.read_bytes() in contents  # Cały plik jednego z wątków, nie mieszanka
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['data.json']
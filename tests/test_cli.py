@@ -0,0 +1,25 @@
+# tests/test_cli.py
+
+"""
+Testy trybu wiersza poleceń - unikalne nazwy plików wyjściowych
+"""
+import pytest
+
+from src import cli
+
+
+@pytest.fixture
+def stems(monkeypatch):
+    monkeypatch.setattr(cli, 'safe_file_stem', lambda declaration: declaration)
+    return cli.unique_stems
+
+
+def test_repeated_stems_get_suffixes(stems):
+    assert stems(['A', 'B', 'A', 'A']) == ['A', 'B', 'A_2', 'A_3']
+
+
+def test_suffix_skips_names_already_emitted(stems):
+    result = stems(['A', 'A', 'A_2', 'A'])
+    assert result == ['A', 'A_2', 'A_2_2', 'A_3']
+    assert len(set(result)) == len(result)
+    assert len(set(stems(['A_2', 'A', 'A']))) == 3
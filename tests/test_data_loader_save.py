@@ -0,0 +1,88 @@
+# tests/test_data_loader_save.py
+
+"""
+Testy DataLoader.save_json dla plików JSON - wersja z chwili odczytu, scalanie, konflikt
+Wymagają src/config/constants.py (konfiguracja stanowiska, poza repozytorium).
+"""
+import json
+
+import pytest
+
+pytest.importorskip('src.config.constants', reason="brak src/config/constants.py")
+
+from src.services.data_loader import DataLoader  # noqa: E402
+from src.utils.json_merge import MergeConflictError  # noqa: E402
+
+
+@pytest.fixture
+def master_file(tmp_path):
+    path = tmp_path / 'substances_master.json'
+    path.write_text(json.dumps({'1': {'name_pl': 'a', 'cas': 'x'}, '2': {'name_pl': 'b', 'cas': 'y'}}),
+                    encoding='utf-8')
+    return path
+
+
+@pytest.fixture
+def loader():
+    return DataLoader.from_documents({})
+
+
+def _write_other_user(path, change):
+    data = json.loads(path.read_text(encoding='utf-8'))
+    change(data)
+    path.write_text(json.dumps(data), encoding='utf-8')
+
+
+def test_save_without_other_changes(loader, master_file):
+    data = loader.load_json(master_file)
+    data['1']['name_pl'] = 'A'
+    assert loader.save_json(master_file, data) is False
+    assert json.loads(master_file.read_text(encoding='utf-8'))['1']['name_pl'] == 'A'
+    assert not master_file.with_name('substances_master.json.lock').exists()
+
+
+def test_save_merges_changes_of_other_records(loader, master_file):
+    data = loader.load_json(master_file)
+    data['1']['name_pl'] = 'A'
+    _write_other_user(master_file, lambda d: d['2'].update(name_pl='B'))
+
+    assert loader.save_json(master_file, data) is True
+    on_disk = json.loads(master_file.read_text(encoding='utf-8'))
+    assert on_disk['1']['name_pl'] == 'A' and on_disk['2']['name_pl'] == 'B'
+    assert data == on_disk  # Dokument z cache podmieniony w miejscu
+
+
+def test_save_conflict_leaves_file_unchanged(loader, master_file):
+    data = loader.load_json(master_file)
+    data['1']['name_pl'] = 'A'
+    _write_other_user(master_file, lambda d: d['1'].update(name_pl='Z'))
+    before = master_file.read_bytes()
+
+    with pytest.raises(MergeConflictError) as error:
+        loader.save_json(master_file, data)
+    assert error.value.paths == ['/1/name_pl']
+    assert master_file.read_bytes() == before
+
+
+def test_second_save_uses_new_version_as_base(loader, master_file):
+    data = loader.load_json(master_file)
+    data['1']['name_pl'] = 'A'
+    loader.save_json(master_file, data)
+    data['1']['name_pl'] = 'AA'  # Zmiana tego samego rekordu po własnym zapisie - bez konfliktu
+    assert loader.save_json(master_file, data) is False
+    assert json.loads(master_file.read_text(encoding='utf-8'))['1']['name_pl'] == 'AA'
+
+
+def test_touched_but_identical_file_is_not_merged(loader, master_file):
+    data = loader.load_json(master_file)
+    data['1']['name_pl'] = 'A'
+    master_file.write_bytes(master_file.read_bytes() + b' ')  # Inny stamp, ta sama treść JSON
+    master_file.write_bytes(master_file.read_bytes()[:-1])
+    assert loader.save_json(master_file, data) is False
+
+
+def test_generation_changes_on_save(loader, master_file):
+    data = loader.load_json(master_file)
+    generation = loader.generation
+    loader.save_json(master_file, data)
+    assert loader.generation > generation
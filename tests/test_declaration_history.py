@@ -0,0 +1,46 @@
+# tests/test_declaration_history.py
+
+"""
+Testy dziennika deklaracji - dopisywanie wpisów z kilku wątków / stanowisk
+"""
+import threading
+
+from src.models.declaration import ClientData, Declaration, Product
+from src.services import declaration_history
+from src.utils.atomic_io import file_lock
+
+
+def _declaration(index: int) -> Declaration:
+    return Declaration(declaration_type='bok', product=Product(name=f"Produkt {index}", structure='PET/PE'),
+                       client=ClientData(client_name=f"Klient {index}" * 200))
+
+
+def test_parallel_records_are_complete_lines(tmp_path):
+    path = tmp_path / 'declarations.jsonl'
+
+    def writer(offset):
+        for i in range(20):
+            declaration_history.record(_declaration(offset + i), f"out/{offset + i}.pdf", 'pdf', path=path)
+
+    threads = [threading.Thread(target=writer, args=(n * 100,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    entries = declaration_history.read_history(path)
+    assert len(entries) == 80
+    assert len(path.read_text(encoding='utf-8').splitlines()) == 80
+    assert sorted(e['output'] for e in entries) == sorted(f"out/{n * 100 + i}.pdf" for n in range(4) for i in range(20))
+
+
+def test_record_waits_for_lock_holder(tmp_path):
+    path = tmp_path / 'declarations.jsonl'
+    with file_lock(path):
+        thread = threading.Thread(target=declaration_history.record,
+                                  args=(_declaration(1), 'out/1.pdf', 'pdf'), kwargs={'path': path})
+        thread.start()
+        thread.join(0.2)
+        assert thread.is_alive() and not path.exists()
+    thread.join()
+    assert [e['output'] for e in declaration_history.read_history(path)] == ['out/1.pdf']
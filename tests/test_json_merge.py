@@ -0,0 +1,66 @@
+# tests/test_json_merge.py
+
+"""
+Testy three_way_merge - scalanie rekordów i wykrywanie konfliktów
+"""
+from src.utils.json_merge import MergeConflictError, three_way_merge
+
+
+def test_changes_in_different_records_are_combined():
+    base = {'PET': [1], 'PE': [2]}
+    ours = {'PET': [1, 3], 'PE': [2]}
+    theirs = {'PET': [1], 'PE': [2, 4]}
+    assert three_way_merge(base, ours, theirs) == ({'PET': [1, 3], 'PE': [2, 4]}, [])
+
+
+def test_same_change_on_both_sides_is_not_a_conflict():
+    base = {'1': {'name_pl': 'a'}}
+    changed = {'1': {'name_pl': 'b'}}
+    assert three_way_merge(base, changed, dict(changed)) == (changed, [])
+
+
+def test_different_changes_of_one_record_conflict():
+    base = {'1': {'name_pl': 'a', 'cas': 'x'}}
+    ours = {'1': {'name_pl': 'b', 'cas': 'x'}}
+    theirs = {'1': {'name_pl': 'c', 'cas': 'x'}}
+    result, conflicts = three_way_merge(base, ours, theirs)
+    assert conflicts == ['/1/name_pl']
+    assert result['1']['name_pl'] == 'c'  # W konflikcie wynik ma wersję 'theirs'
+
+
+def test_lists_are_atomic_records():
+    base = {'PET': [1, 2]}
+    result, conflicts = three_way_merge(base, {'PET': [1, 2, 3]}, {'PET': [2]})
+    assert conflicts == ['/PET']
+
+
+def test_fields_of_one_dict_record_merge_independently():
+    base = {'1': {'name_pl': 'a', 'cas': 'x'}}
+    ours = {'1': {'name_pl': 'b', 'cas': 'x'}}
+    theirs = {'1': {'name_pl': 'a', 'cas': 'y'}}
+    assert three_way_merge(base, ours, theirs) == ({'1': {'name_pl': 'b', 'cas': 'y'}}, [])
+
+
+def test_new_records_on_both_sides_are_kept():
+    result, conflicts = three_way_merge({}, {'a': 1}, {'b': 2})
+    assert result == {'a': 1, 'b': 2} and conflicts == []
+
+
+def test_removal_of_unchanged_record():
+    base = {'a': 1, 'b': 2}
+    assert three_way_merge(base, {'a': 1}, {'a': 1, 'b': 2}) == ({'a': 1}, [])
+    assert three_way_merge(base, {'a': 1, 'b': 2}, {'b': 2}) == ({'b': 2}, [])
+
+
+def test_removal_of_record_changed_by_other_side_conflicts():
+    base = {'a': 1}
+    result, conflicts = three_way_merge(base, {}, {'a': 5})
+    assert conflicts == ['/a'] and result == {'a': 5}
+    result, conflicts = three_way_merge(base, {'a': 5}, {})
+    assert conflicts == ['/a'] and result == {}
+
+
+def test_conflict_error_lists_paths():
+    error = MergeConflictError('materials.json', [f'/m{i}' for i in range(12)])
+    assert error.paths[0] == '/m0'
+    assert 'materials.json' in str(error) and '(+2)' in str(error)
@@ -0,0 +1,93 @@
+# tests/test_material_shards.py
+
+"""
+Testy MaterialShardStore - pliki folii + manifest przy równoległej pracy kilku użytkowników
+"""
+import json
+
+import pytest
+
+from src.services.material_shards import (
+    MANIFEST_NAME, MaterialShardStore, shard_file_name, split_materials_file
+)
+from src.utils.json_merge import MergeConflictError
+
+
+@pytest.fixture
+def shards(tmp_path):
+    materials_json = tmp_path / 'materials.json'
+    materials_json.write_text(json.dumps({
+        'materials': {
+            'PET': [{'supplier': 'A', 'sml': [], 'dualUse': []}],
+            'PE': [{'supplier': 'B', 'sml': [], 'dualUse': []}],
+            'ALU': [{'supplier': 'C', 'sml': [], 'dualUse': []}],
+        },
+        'meta': {'version': 1},
+    }), encoding='utf-8')
+    directory = tmp_path / 'materials'
+    split_materials_file(materials_json, directory)
+    return directory
+
+
+def test_file_name_never_matches_manifest():
+    assert shard_file_name('manifest') != MANIFEST_NAME
+    assert shard_file_name('MANIFEST').lower() != MANIFEST_NAME
+    assert shard_file_name('PET', ['pet.json']) != 'PET.json'
+
+
+def test_concurrent_add_and_remove_are_merged(shards):
+    store_a, store_b = MaterialShardStore(shards), MaterialShardStore(shards)
+    document_a, document_b = store_a.load(), store_b.load()
+
+    document_a['materials']['NOWA'] = [{'supplier': 'N', 'sml': [], 'dualUse': []}]
+    del document_b['materials']['PE']
+    del document_b['materials']['ALU']
+    document_b['materials']['INNA'] = []
+
+    assert store_a.save(document_a) == (False, {'NOWA'})
+    merged, written = store_b.save(document_b)
+    assert merged and written == {'INNA'}
+    assert sorted(document_b['materials']) == ['INNA', 'NOWA', 'PET']
+
+    fresh = MaterialShardStore(shards).load()
+    assert sorted(fresh['materials']) == ['INNA', 'NOWA', 'PET']
+    assert fresh['materials']['NOWA'][0]['supplier'] == 'N'
+    assert not (shards / 'PE.json').exists() and not (shards / 'ALU.json').exists()
+
+    # Zapis bez własnych zmian nanosi usunięcia innych użytkowników
+    document_a['materials']['PET'][0]['supplier'] = 'A2'
+    merged, written = store_a.save(document_a)
+    assert merged and written == {'PET'}
+    assert sorted(document_a['materials']) == ['INNA', 'NOWA', 'PET']
+
+
+def test_conflicting_shard_edit_raises_and_keeps_disk(shards):
+    store_a, store_b = MaterialShardStore(shards), MaterialShardStore(shards)
+    document_a, document_b = store_a.load(), store_b.load()
+
+    document_a['materials']['PET'][0]['supplier'] = 'Dostawca A'
+    document_b['materials']['PET'][0]['supplier'] = 'Inny dostawca B'
+    document_b['materials']['PE'][0]['supplier'] = 'B2'
+
+    store_a.save(document_a)
+    with pytest.raises(MergeConflictError) as error:
+        store_b.save(document_b)
+    assert error.value.paths == ['/materials/PET']
+
+    fresh = MaterialShardStore(shards).load()
+    assert fresh['materials']['PET'][0]['supplier'] == 'Dostawca A'
+    assert fresh['materials']['PE'][0]['supplier'] == 'B'  # Konflikt - nic nie zapisano
+
+
+def test_edits_of_different_materials_do_not_conflict(shards):
+    store_a, store_b = MaterialShardStore(shards), MaterialShardStore(shards)
+    document_a, document_b = store_a.load(), store_b.load()
+
+    document_a['materials']['PET'][0]['supplier'] = 'A2'
+    document_b['materials']['PE'][0]['supplier'] = 'B2'
+    store_a.save(document_a)
+    store_b.save(document_b)
+
+    fresh = MaterialShardStore(shards).load()
+    assert fresh['materials']['PET'][0]['supplier'] == 'A2'
+    assert fresh['materials']['PE'][0]['supplier'] == 'B2'
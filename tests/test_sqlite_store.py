@@ -0,0 +1,154 @@
+# tests/test_sqlite_store.py
+
+"""
+Testy SqliteStore - odczyt / zapis w układzie JSON, scalanie zapisów dwóch użytkowników, structure_data
+"""
+import copy
+import json
+
+import pytest
+
+from benchmarks.synthetic_data import generate_dataset, material_names
+from src.services.sqlite_store import SnapshotMissingError, SqliteStore, export_to_json, migrate_from_json
+from src.utils.json_merge import MergeConflictError
+
+MATERIALS = {
+    'materials': {
+        'PET': [{'supplier': 'A', 'lastUpdated': '2026-01-01', 'sml': [{'substanceId': 1, 'value': 5}],
+                 'dualUse': [1]}],
+        'PE': [{'supplier': 'B', 'sml': [{'substanceId': 1, 'value': 7.5}, {'substanceId': '2', 'value': 1}],
+                'dualUse': []},
+               {'supplier': 'C'}],  # Wpis bez list sml / dualUse
+    },
+    'version': 3,
+}
+SUBSTANCES = {'1': {'cas': '1-1', 'name_pl': 'Fu', 'name_en': 'Foo', 'ref_no': '12345', 'note': {'x': [1]}},
+              '2': {'cas': '2-2', 'name_pl': '', 'name_en': 'Bar', 'ref_no': 23456}}
+TEXTS = {'regulations': {'eu_10_2011': 'UE 10/2011'}, 'final_note': 'NOTA'}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    store = SqliteStore(tmp_path / 'data.db')
+    store.replace('materials', copy.deepcopy(MATERIALS))
+    store.replace('substances', copy.deepcopy(SUBSTANCES))
+    store.replace('texts_pl', copy.deepcopy(TEXTS))
+    store.close()
+    return tmp_path / 'data.db'
+
+
+@pytest.fixture
+def two_users(db_path):
+    first, second = SqliteStore(db_path), SqliteStore(db_path)
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_round_trip_keeps_documents(db_path):
+    store = SqliteStore(db_path)
+    assert store.load('materials') == MATERIALS
+    assert store.load('substances') == SUBSTANCES
+    assert store.load('texts_pl') == TEXTS
+    assert list(store.load('materials')['materials']) == ['PET', 'PE']  # Kolejność jak w pliku
+    store.close()
+
+
+def test_migrate_and_export(tmp_path):
+    source = tmp_path / 'materials.json'
+    source.write_text(json.dumps(MATERIALS), encoding='utf-8')
+    store = SqliteStore(tmp_path / 'data.db')
+    assert migrate_from_json(store, {'materials': source, 'substances': tmp_path / 'brak.json'}) == {'materials': 2}
+    [exported] = export_to_json(store, {'materials': tmp_path / 'out' / 'materials.json'})
+    assert json.loads(exported.read_text(encoding='utf-8')) == MATERIALS
+    store.close()
+
+
+def test_save_writes_only_changed_records(two_users):
+    first, second = two_users
+    document = first.load('materials')
+    document['materials']['PET'][0]['sml'].append({'substanceId': 2, 'value': 3})
+    document['materials']['NEW'] = []
+    assert first.save('materials', document) == (False, {'PET', 'NEW'})
+    assert second.load('materials') == document
+
+
+def test_save_merges_changes_of_other_records(two_users):
+    first, second = two_users
+    ours, theirs = first.load('materials'), second.load('materials')
+    theirs['materials']['PE'][0]['dualUse'] = [1]
+    second.save('materials', theirs)
+
+    ours['materials']['PET'][0]['dualUse'] = []
+    merged, names = first.save('materials', ours)
+    assert merged is True and names is None
+    assert ours['materials']['PE'][0]['dualUse'] == [1]  # Dokument odświeżony w miejscu
+    assert second.load('materials') == ours
+
+
+def test_save_conflict_on_same_record(two_users):
+    first, second = two_users
+    ours, theirs = first.load('substances'), second.load('substances')
+    theirs['1']['name_pl'] = 'Theirs'
+    second.save('substances', theirs)
+
+    ours['1']['name_pl'] = 'Ours'
+    with pytest.raises(MergeConflictError) as error:
+        first.save('substances', ours, 'substances_master.json')
+    assert error.value.paths == ['/1']
+    assert second.load('substances')['1']['name_pl'] == 'Theirs'
+
+
+def test_save_refuses_without_snapshot(two_users):
+    first, second = two_users
+    ours = first.load('substances')
+    theirs = second.load('substances')
+    theirs['2']['name_pl'] = 'Bar PL'
+    second.save('substances', theirs)
+
+    first.forget('substances')  # Dokument usunięty z cache DataLoader
+    ours['1']['name_pl'] = 'Ours'
+    with pytest.raises(SnapshotMissingError):
+        first.save('substances', ours)
+    assert second.load('substances')['2']['name_pl'] == 'Bar PL'  # Cudza zmiana nie nadpisana
+
+
+def test_save_refuses_document_from_older_load(two_users):
+    first, _ = two_users
+    stale = first.load('substances')
+    first.load('substances')  # Ponowny odczyt - migawka należy do nowego dokumentu
+    stale['1']['name_pl'] = 'Ours'
+    with pytest.raises(SnapshotMissingError):
+        first.save('substances', stale)
+
+
+def test_update_records_changes_only_given_records(two_users):
+    first, second = two_users
+    document = first.load('materials')
+    document['materials']['PE'] = []  # Niezapisana zmiana innej folii
+    first.update_records('materials', {('materials', 'PET'): lambda current: current + [{'supplier': 'D'}]})
+    on_disk = second.load('materials')['materials']
+    assert [entry['supplier'] for entry in on_disk['PET']] == ['A', 'D']
+    assert on_disk['PE'] == MATERIALS['materials']['PE']
+
+
+@pytest.mark.parametrize('language', ['pl', 'en'])
+def test_structure_data_matches_in_memory_build(tmp_path, language):
+    pytest.importorskip('src.config.constants', reason="brak src/config/constants.py")
+    from benchmarks.synthetic_data import make_loader
+
+    dataset = generate_dataset(12, substance_count=300, dual_use_count=40, sml_per_supplier=25)
+    dataset['materials']['materials']['PET'][0]['sml'].append({'substanceId': 99999, 'value': 1})  # Brak w master
+    dataset['materials']['materials']['PE'][0]['dualUse'].append(99999)
+    store = SqliteStore(tmp_path / 'data.db')
+    store.replace('materials', dataset['materials'])
+    store.replace('substances', dataset['substances_master'])
+    store.replace('dual_use', dataset['dual_use_master'])
+    loader = make_loader(dataset)
+
+    names = material_names(12)
+    for mat1, mat2, mat3 in zip(names, names[1:] + names[:1], names[2:] + names[:2]):
+        assert store.structure_data([mat1, mat2], language) == loader.build_structure_data(mat1, mat2, language)
+        assert store.structure_data([mat1, mat2, mat3], language) == \
+            loader.build_structure_data_trilayer(mat1, mat2, mat3, language)
+    store.close()
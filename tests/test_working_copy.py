@@ -0,0 +1,78 @@
+# tests/test_working_copy.py
+
+"""
+Testy WorkingCopy - kopie robocze edytora nad wspólnym dokumentem i zapis rekordów ze sprawdzeniem konfliktu
+"""
+import pytest
+
+from src.utils.json_merge import MergeConflictError
+from src.utils.working_copy import WorkingCopy
+
+
+@pytest.fixture
+def shared():
+    return {'PET': [{'supplier': 'A', 'sml': [{'substanceId': 1, 'value': 5}]}], 'PE': []}
+
+
+def test_edits_do_not_touch_shared_records(shared):
+    working = WorkingCopy(shared)
+    working.edit('PET')[0]['sml'].append({'substanceId': 2, 'value': 1})
+    working.view['NEW'] = []
+    assert shared == {'PET': [{'supplier': 'A', 'sml': [{'substanceId': 1, 'value': 5}]}], 'PE': []}
+    assert len(working.view['PET'][0]['sml']) == 2
+    assert sorted(working.view) == ['NEW', 'PE', 'PET']
+    assert sorted(working.changed()) == ['NEW', 'PET']
+    assert working.is_new('NEW') and not working.is_new('PET')
+
+
+def test_viewed_but_unchanged_copy_is_not_a_change(shared):
+    working = WorkingCopy(shared)
+    working.edit('PET')
+    assert working.changed() == [] and not working.has_changes()
+    working.discard_clean()
+    assert working.keys() == []
+
+
+def test_changes_write_working_value(shared):
+    working = WorkingCopy(shared)
+    working.edit('PET')[0]['supplier'] = 'B'
+    changes = working.changes('materials.json')
+    assert list(changes) == ['PET']
+    value = changes['PET'](shared['PET'])
+    assert value[0]['supplier'] == 'B'
+    value[0]['supplier'] = 'X'  # Zapisana wartość jest kopią - kopia robocza bez zmian
+    assert working.view['PET'][0]['supplier'] == 'B'
+
+
+def test_changes_accept_record_unchanged_or_already_equal(shared):
+    working = WorkingCopy(shared)
+    working.edit('PET')[0]['supplier'] = 'B'
+    apply = working.changes('materials.json')['PET']
+    assert apply([{'supplier': 'B', 'sml': [{'substanceId': 1, 'value': 5}]}])[0]['supplier'] == 'B'
+
+
+def test_changes_conflict_when_record_changed_by_other_user(shared):
+    working = WorkingCopy(shared)
+    working.edit('PET')[0]['supplier'] = 'B'
+    apply = working.changes('materials.json')['PET']
+    with pytest.raises(MergeConflictError) as error:
+        apply([{'supplier': 'C', 'sml': []}])
+    assert error.value.paths == ['/PET']
+
+
+def test_new_record_conflicts_with_id_taken_meanwhile():
+    working = WorkingCopy({'1': {'cas': 'x'}})
+    working.view['2'] = {'cas': 'new'}
+    apply = working.changes('substances_master.json')['2']
+    assert apply(None) == {'cas': 'new'}
+    with pytest.raises(MergeConflictError):
+        apply({'cas': 'other'})
+
+
+def test_changes_limited_to_keys_and_discard(shared):
+    working = WorkingCopy(shared)
+    working.edit('PET')[0]['supplier'] = 'B'
+    working.view['NEW'] = []
+    assert list(working.changes('materials.json', ['NEW'])) == ['NEW']
+    working.discard(['NEW'])
+    assert 'NEW' not in working.view and working.changed() == ['PET']